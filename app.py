@@ -2,7 +2,7 @@ import streamlit as st
 from streamlit_option_menu import option_menu
 # import streamlit_antd_components as sac
 
-from utilities.nav_utils import render_header_enhanced, get_connection_status
+from utilities.nav_utils import render_header_enhanced, get_connection_status, release_connection
 from pages import get_page_renderer
 
 
@@ -93,6 +93,8 @@ def app():
 
             # Logout button
             if st.button("Logout", use_container_width=True, key="logout_btn"):
+                # Other sessions may share the pool and keepalive; only drop this session's hold
+                release_connection(st.session_state.active_connection)
                 st.session_state.active_connection = None
                 st.session_state.current_page = "Connection Manager"
                 st.rerun()
@@ -1,6 +1,12 @@
 import streamlit as st
 import streamlit_antd_components as sac
 
+from utilities.rule_condition import UNVERIFIED, validate_condition, validate_mask_columns
+from utilities.rule_conflicts import get_rule_conflicts
+from utilities.rule_model import DEFAULT_COLOR, Action, Rule, parse_columns
+from utilities.rule_store import get_rule_repository
+from utilities.rule_stats import get_rule_stats
+
 
 def render() -> None:
     # Enhanced page header
@@ -16,8 +22,8 @@ def render() -> None:
         unsafe_allow_html=True,
     )
 
-    if "rules" not in st.session_state:
-        st.session_state["rules"] = []
+    active_conn = st.session_state.get("active_connection")
+    repo = get_rule_repository(active_conn)
 
     col1, col2 = st.columns([1, 1])
 
@@ -118,6 +124,12 @@ def render() -> None:
                 align='start',
             )
 
+            mask_columns = st.text_input(
+                "Masked columns",
+                placeholder="e.g. ssn, email",
+                help="Mask rules only: comma-separated columns hidden in the enforced view. The condition selects the rows; its own columns are left intact."
+            )
+
             colp1, colp2 = st.columns([1, 2])
             with colp1:
                 priority = st.number_input(
@@ -136,20 +148,41 @@ def render() -> None:
             submitted = st.form_submit_button("💾 Save Rule", use_container_width=True)
 
         if submitted:
+            action = Action.parse(act)
+            masked = parse_columns(mask_columns) if action is Action.MASK else []
+            cond_ok, cond_msg = validate_condition(condition, active_conn, scope_schema, scope_table)
+            mask_ok, mask_msg = (
+                validate_mask_columns(masked, active_conn, scope_schema, scope_table)
+                if action is Action.MASK else (True, "")
+            )
             if not rule_name:
                 st.error("❌ Please provide a Rule Name.")
+            elif not mask_ok:
+                st.error(f"❌ {mask_msg}")
+            elif not cond_ok:
+                st.error(f"❌ {cond_msg}")
             else:
-                rule = {
-                    "name": rule_name,
-                    "schema": scope_schema,
-                    "table": scope_table,
-                    "condition": condition,
-                    "action": act,
-                    "priority": int(priority),
-                    "connection": st.session_state.get("active_connection"),
-                }
-                st.session_state["rules"].append(rule)
+                rule = Rule(
+                    name=rule_name,
+                    schema=scope_schema,
+                    table=scope_table,
+                    condition=condition,
+                    action=action,
+                    mask_columns=masked,
+                    priority=int(priority),
+                    connection=active_conn,
+                )
+                rule.id = repo.add(rule)
                 st.success(f"✅ Rule '{rule_name}' saved successfully!")
+                for msg in (cond_msg, mask_msg):
+                    if msg.startswith(UNVERIFIED):
+                        st.warning(f"⚠️ {msg}")
+                    elif msg:
+                        st.caption(msg)
+                # Only the rules on the same table are compared
+                for finding in get_rule_conflicts(repo, active_conn).check(rule):
+                    icon = "⚔️" if finding["kind"] == "conflict" else "🌓"
+                    st.warning(f"{icon} {finding['message']}")
                 st.toast("Rule created!", icon="✅")
 
         st.markdown("</div>", unsafe_allow_html=True)
@@ -175,7 +208,8 @@ def render() -> None:
             unsafe_allow_html=True,
         )
 
-        st.metric("Rules", len(st.session_state.get("rules", [])))
+        stats = get_rule_stats(repo, active_conn)
+        st.metric("Rules", stats.total)
 
         st.divider()
 
@@ -189,21 +223,18 @@ def render() -> None:
             unsafe_allow_html=True,
         )
 
-        rules = st.session_state.get("rules", [])
+        by_action = stats.by("action")
 
         col_a1, col_a2, col_a3 = st.columns(3)
 
         with col_a1:
-            allow_count = len([r for r in rules if "Allow" in str(r.get("action", ""))])
-            st.metric("Allow", allow_count)
+            st.metric("Allow", by_action.get(Action.ALLOW, 0))
 
         with col_a2:
-            block_count = len([r for r in rules if "Block" in str(r.get("action", ""))])
-            st.metric("Block", block_count)
+            st.metric("Block", by_action.get(Action.BLOCK, 0))
 
         with col_a3:
-            mask_count = len([r for r in rules if "Mask" in str(r.get("action", ""))])
-            st.metric("Mask", mask_count)
+            st.metric("Mask", by_action.get(Action.MASK, 0))
 
         st.divider()
 
@@ -217,13 +248,11 @@ def render() -> None:
             unsafe_allow_html=True,
         )
 
+        # Newest three, shown oldest first
+        rules = list(reversed(stats.recent(3)))
         if rules:
-            for rule in rules[-3:]:
-                action_color = {
-                    "✅ Allow": "#1F8A70",
-                    "🚫 Block": "#B91C1C",
-                    "🎭 Mask": "#B7791F"
-                }.get(str(rule.get("action", "")), "#6B7280")
+            for rule in rules:
+                action_color = rule.action.color if rule.action else DEFAULT_COLOR
 
                 st.markdown(
                     f"""
@@ -242,4 +271,16 @@ def render() -> None:
         else:
             st.info("📭 No rules created yet. Create your first rule on the left!")
 
+        # Full sweep over every table; saving a rule already checks its own table
+        if st.toggle("🧩 Analyze conflicts & shadowed rules", key="cr_conflict_report"):
+            findings = get_rule_conflicts(repo, active_conn).report()
+            st.caption(f"{len(findings)} finding(s)")
+            if findings:
+                for finding in findings[:50]:
+                    st.caption(f"**{finding['kind'].title()}** — {finding['message']}")
+                if len(findings) > 50:
+                    st.caption(f"…and {len(findings) - 50} more")
+            else:
+                st.caption("No overlapping rules with contradicting actions.")
+
         st.markdown("</div>", unsafe_allow_html=True)
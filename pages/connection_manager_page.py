@@ -11,6 +11,18 @@ from utilities.conn_manager import (
     delete_connection,
     decrypt_password,
     test_sql_server_connection,
+    import_connections,
+    export_connections,
+    parse_connection_definitions,
+)
+from utilities.conn_pool import hold_pool, release_pool, warm_pool
+from utilities.nav_utils import activate_connection, release_connection
+from utilities import conn_tasks, conn_timing
+from utilities.conn_health import (
+    cached_health,
+    check_all_connections,
+    forget as forget_health,
+    test_connection_definitions,
 )
 
 ConnectionRecord = dict[str, Any]
@@ -136,6 +148,7 @@ def render() -> None:
         if not connections:
             _render_empty_connections_state()
             _render_add_connection_form()
+            _render_pending_task()
             return
 
         tab = sac.tabs(
@@ -153,6 +166,9 @@ def render() -> None:
         else:
             _render_add_connection_form()
 
+        _render_pending_task()
+        _render_timing_panel()
+
 
 def _render_page_intro() -> None:
     st.markdown(
@@ -178,8 +194,11 @@ def _render_connections_tab(connections: List[ConnectionRecord], active_name: st
 
     # Use a container with border to group table and action buttons
     with st.container(border=True):
+        _render_check_all_button(connections)
+
         # Render table OUTSIDE form so changes are detected immediately
         selected_name = _render_connections_table(connections, selected_name, active_name)
+        _cancel_stale_connect(selected_name)
 
         with st.form("cm_connections_form", clear_on_submit=False, border=False):
             selected = next((c for c in connections if c.get("name") == selected_name), None)
@@ -244,14 +263,28 @@ def _ensure_selected_connection(connections: List[ConnectionRecord], active_name
     return default
 
 
+def _render_check_all_button(connections: List[ConnectionRecord]) -> None:
+    _pad, col_btn = st.columns([6, 1])
+    if col_btn.button("Check all", key="cm_check_all", use_container_width=True):
+        with st.spinner(f"Checking {len(connections)} connections..."):
+            results = check_all_connections([c.get("name") for c in connections if c.get("name")], force=True)
+        down = sum(1 for r in results.values() if not r.get("ok"))
+        if down:
+            st.warning(f"{down} of {len(results)} connections are unreachable.")
+        else:
+            st.success(f"All {len(results)} connections are reachable.")
+
+
 def _render_connections_table(
     connections: List[ConnectionRecord],
     selected_name: str,
     active_name: str | None,
 ) -> str:
     # Build the dataframe with only the selected_name checked
+    health = cached_health()
     rows = []
     for conn in connections:
+        probe = health.get(conn.get("name"), {})
         rows.append(
             {
                 "Selected": conn.get("name") == selected_name,
@@ -259,6 +292,10 @@ def _render_connections_table(
                 "Host": conn.get("host", "-"),
                 "Username": conn.get("user", "-"),
                 "Database": conn.get("database", "-"),
+                "Status": ("🟢 Up" if probe.get("ok") else "🔴 Down") if probe else "-",
+                "Connect (ms)": probe.get("connect_ms"),
+                "SELECT 1 (ms)": probe.get("query_ms"),
+                "Error": probe.get("error_class") or "",
             }
         )
 
@@ -283,8 +320,12 @@ def _render_connections_table(
             "Host": st.column_config.TextColumn("Host", disabled=True),
             "Username": st.column_config.TextColumn("Username", disabled=True),
             "Database": st.column_config.TextColumn("Database", disabled=True),
+            "Status": st.column_config.TextColumn("Status", disabled=True),
+            "Connect (ms)": st.column_config.NumberColumn("Connect (ms)", format="%.1f", disabled=True),
+            "SELECT 1 (ms)": st.column_config.NumberColumn("SELECT 1 (ms)", format="%.1f", disabled=True),
+            "Error": st.column_config.TextColumn("Error", disabled=True),
         },
-        disabled=["Connection Name", "Host", "Username", "Database"],
+        disabled=["Connection Name", "Host", "Username", "Database", "Status", "Connect (ms)", "SELECT 1 (ms)", "Error"],
         key="cm_connections_table",
     )
     # st.markdown('</div>', unsafe_allow_html=True)
@@ -451,6 +492,8 @@ def _render_inline_edit_form(selected: ConnectionRecord) -> None:
 def _execute_delete(target: str) -> None:
     try:
         delete_connection(target)
+        release_connection(target)
+        forget_health(target)
         if st.session_state.get("active_connection") == target:
             st.session_state.pop("active_connection", None)
         st.session_state.pop("cm_pending_delete", None)
@@ -494,6 +537,56 @@ def _render_add_connection_form() -> None:
         if submit_connect:
             _handle_test_and_save(name, host, user, password, database)
 
+        _render_bulk_import_export()
+
+
+def _render_bulk_import_export() -> None:
+    with st.expander("Bulk import / export", expanded=False):
+        st.caption("Upload a CSV or JSON file with columns: name, host, database, user, password.")
+        uploaded = st.file_uploader("Connection definitions", type=["csv", "json"], key="cm_bulk_upload")
+        run_tests = st.checkbox("Test connectivity before importing", value=False, key="cm_bulk_test")
+        if st.button("Import", type="primary", key="cm_bulk_import", disabled=uploaded is None):
+            _handle_bulk_import(uploaded, run_tests)
+
+        existing = export_connections()
+        if existing:
+            import json
+            st.download_button(
+                "Export definitions (JSON, without passwords)",
+                data=json.dumps(existing, indent=2).encode("utf-8"),
+                file_name="connections_export.json",
+                mime="application/json",
+                key="cm_bulk_export",
+            )
+
+
+def _handle_bulk_import(uploaded: Any, run_tests: bool) -> None:
+    try:
+        records = parse_connection_definitions(uploaded.getvalue(), uploaded.name)
+    except Exception as exc:
+        st.error(f"Could not read {uploaded.name}: {exc}")
+        return
+    if not records:
+        st.warning("The file does not contain any connections.")
+        return
+    if run_tests:
+        with st.spinner(f"Testing {len(records)} connections..."):
+            results = test_connection_definitions(records)
+        failed = {name: msg for name, (ok, msg) in results.items() if not ok}
+        if failed:
+            st.error(f"{len(failed)} of {len(records)} connections failed the test; nothing was imported.")
+            with st.expander("Technical details", expanded=False):
+                st.code("\n".join(f"{name}: {msg}" for name, msg in failed.items()))
+            return
+    try:
+        counts = import_connections(records)
+    except (ValueError, RuntimeError) as exc:
+        st.error(str(exc))
+        return
+    for rec in records:
+        forget_health(str(rec.get("name") or "").strip())
+    st.toast(f"Imported {counts['created']} new and updated {counts['updated']} existing connections.", icon="✅")
+    st.rerun()
 
 
 def _handle_test_action(host: str, user: str, password: str, database: str) -> None:
@@ -516,6 +609,7 @@ def _handle_save_action(name: str, host: str, user: str, password: str, database
         if not is_new and get_connection(name):
             st.info(f"Updating existing connection '{name}'.")
         save_connection(name, host, user, password, database)
+        forget_health(name)
         st.success("Connection saved.")
         st.rerun()
     except Exception as exc:
@@ -526,21 +620,27 @@ def _handle_test_and_save(name: str, host: str, user: str, password: str, databa
     if not all([name, host, user, password, database]):
         st.error("Complete all fields, including database, before testing and saving.")
         return
-    with st.spinner("Testing credentials..."):
-        ok, msg = test_sql_server_connection(host, user, password, database)
+    # Test in the background; _finish_test_and_save runs once the future resolves
+    future = conn_tasks.submit(test_sql_server_connection, host, user, password, database, name)
+
+    def save() -> None:
+        # The password stays in this closure, held by the task registry rather than session_state
+        save_connection(name, host, user, password, database)
+
+    _start_task(conn_tasks.new_task("test_and_save", name, future, save=save))
+
+
+def _finish_test_and_save(task: dict, ok: bool, msg: str) -> None:
     if not ok:
-        _show_connection_error(msg)
+        st.session_state["cm_task_error"] = msg
         return
     try:
-        if get_connection(name):
-            st.info(f"Updating existing connection '{name}'.")
-        save_connection(name, host, user, password, database)
-        st.session_state["active_connection"] = name
-        st.success("Connection verified and saved.")
+        task["save"]()
+        forget_health(task["name"])
+        activate_connection(task["name"])
         st.session_state["current_page"] = "Dashboard"
-        st.rerun()
     except Exception as exc:
-        st.error(f"Error: {exc}")
+        st.session_state["cm_task_error"] = f"Error: {exc}"
 
 
 def _format_date(raw: Any) -> str:
@@ -575,13 +675,6 @@ def _test_connection(conn: ConnectionRecord) -> None:
     st.success(f"✅ {msg}") if ok else st.error(f"❌ {msg}")
 
 
-def _set_active_connection(conn_name: str) -> None:
-    st.session_state["active_connection"] = conn_name
-    st.success(f"Connected to {conn_name}.")
-    st.session_state["current_page"] = "Dashboard"
-    st.rerun()
-
-
 def _show_connection_error(details: str) -> None:
     st.error("Unable to connect. Please confirm the host, username, and password, then try again.")
     with st.expander("Technical details", expanded=False):
@@ -597,18 +690,109 @@ def _handle_connect_action(selected: ConnectionRecord) -> None:
     record = get_connection(name) or selected
     host = record.get("host", "")
     user = record.get("user", "")
-    pw = decrypt_password(record)
     database = record.get("database", "")
 
-    if not all([host, user, pw, database]):
+    # Presence only: the pool decrypts the password when it builds the connection string
+    if not all([host, user, record.get("enc_password"), database]):
         st.error("Stored credentials are incomplete. Please edit and save this connection before connecting.")
         return
 
-    with st.spinner(f"Connecting to {name}..."):
-        ok, msg = test_sql_server_connection(host, user, pw, database)
+    # Warming the pool both verifies the login and keeps the handle for later work.
+    # It runs in the background so the page stays responsive; see _render_pending_task.
+    task_id = conn_tasks.new_task("connect", name, conn_tasks.submit(warm_pool, name))
+    # The attempt holds the pool under its own task ID, so ending it never drops this session's hold
+    hold_pool(name, task_id)
+    _start_task(task_id)
 
-    if not ok:
-        _show_connection_error(msg)
+
+def _start_task(task_id: str) -> None:
+    _cancel_pending_task()
+    st.session_state.pop("cm_task_error", None)
+    st.session_state["cm_pending_task"] = task_id
+
+
+def _cancel_pending_task() -> None:
+    task = conn_tasks.pop_task(st.session_state.pop("cm_pending_task", None))
+    if task:
+        # A login already in flight cannot be interrupted; its result is simply ignored
+        task["future"].cancel()
+        if task["kind"] == "connect":
+            # Drop the attempt's hold once the warm-up ends; the pool closes only if nobody else holds it
+            task["future"].add_done_callback(lambda _f, name=task["name"], attempt=task["id"]: release_pool(name, attempt))
+
+
+def _cancel_stale_connect(selected_name: str) -> None:
+    task = conn_tasks.get_task(st.session_state.get("cm_pending_task"))
+    if task and task["kind"] == "connect" and task["name"] != selected_name:
+        _cancel_pending_task()
+
+
+def _render_timing_panel() -> None:
+    with st.expander("⏱️ Connection timings", expanded=False):
+        rows = conn_timing.summary()
+        if not rows:
+            st.caption("No timings recorded yet in this server process.")
+            return
+        st.dataframe(
+            pd.DataFrame(rows).rename(columns={"name": "Connection", "op": "Operation", "count": "Calls",
+                                               "p50": "p50 (ms)", "p95": "p95 (ms)", "p99": "p99 (ms)", "errors": "Errors"}),
+            hide_index=True,
+            use_container_width=True,
+        )
+        threshold = st.select_slider("Slow call threshold (ms)", options=[100, 250, 500, 1000, 2500, 5000], value=500,
+                                     key="cm_timing_threshold")
+        slow = conn_timing.recent_slow(threshold)
+        if slow:
+            st.dataframe(
+                pd.DataFrame([
+                    {"When": datetime.fromtimestamp(s["ts"]).strftime("%H:%M:%S"), "Connection": s["name"],
+                     "Operation": s["op"], "ms": round(s["ms"], 1), "OK": s["ok"]}
+                    for s in slow
+                ]),
+                hide_index=True,
+                use_container_width=True,
+            )
+        else:
+            st.caption(f"No calls slower than {threshold} ms.")
+
+
+def _render_pending_task() -> None:
+    error = st.session_state.pop("cm_task_error", None)
+    if error:
+        _show_connection_error(error)
+    if st.session_state.get("cm_pending_task"):
+        _poll_pending_task()
+
+
+@st.fragment(run_every=0.5)
+def _poll_pending_task() -> None:
+    task = conn_tasks.get_task(st.session_state.get("cm_pending_task"))
+    if not task:
+        st.session_state.pop("cm_pending_task", None)
+        return
+    future = task["future"]
+    if not future.done():
+        label = "Testing credentials" if task["kind"] == "test_and_save" else "Connecting to"
+        col_msg, col_cancel = st.columns([5, 1])
+        col_msg.info(f"⏳ {label} {task['name']}... {conn_tasks.elapsed(task):.0f}s")
+        if col_cancel.button("Cancel", key="cm_task_cancel", use_container_width=True):
+            _cancel_pending_task()
+            st.rerun(scope="app")
         return
 
-    _set_active_connection(name)
+    conn_tasks.pop_task(st.session_state.pop("cm_pending_task", None))
+    try:
+        ok, msg = future.result()
+    except Exception as exc:
+        ok, msg = False, f"Connection failed: {exc}"
+    if task["kind"] == "connect":
+        if ok:
+            activate_connection(task["name"])
+            st.session_state["current_page"] = "Dashboard"
+        else:
+            st.session_state["cm_task_error"] = msg
+        # Closes the pool the attempt opened unless a session (this one included) holds it
+        release_pool(task["name"], task["id"])
+    else:
+        _finish_test_and_save(task, ok, msg)
+    st.rerun(scope="app")
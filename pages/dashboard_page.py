@@ -1,15 +1,44 @@
 """Dashboard page - main overview of the system."""
 import streamlit as st
 import streamlit_antd_components as sac
-from utilities.nav_utils import render_metric_card
+from utilities.nav_utils import render_metric_card, session_holder
+from utilities.conn_keepalive import keepalive_status, start_keepalive
+from utilities.rule_model import DEFAULT_COLOR, Action
+from utilities.rule_store import get_rule_repository
+from utilities.rule_stats import get_rule_stats
+
+
+def _connection_caption(ka: dict | None) -> str:
+    if not ka or ka.get("status") == "starting":
+        return "Status: Checking... ⏳"
+    latency = ka.get("last_latency_ms")
+    if ka["status"] == "online":
+        return f"Status: Online ✅ • Latency: {latency} ms"
+    if ka["status"] == "degraded":
+        return f"Status: Reconnected after a drop ⚠️ • Latency: {latency} ms"
+    return "Status: Unreachable ❌"
+
+
+def _uptime_caption(ka: dict | None) -> str:
+    if not ka or not ka.get("checks"):
+        return "Uptime: measuring..."
+    avg = ka.get("avg_latency_ms")
+    avg_text = f" • Avg latency: {avg} ms" if avg is not None else ""
+    return f"Uptime: {ka['uptime_pct']}% ({ka['successes']}/{ka['checks']} checks){avg_text}"
 
 
 def render() -> None:
     """Render the dashboard page with system overview."""
 
     # Get data
-    rules = st.session_state.get("rules", [])
     active_conn = st.session_state.get("active_connection")
+    stats = get_rule_stats(get_rule_repository(active_conn), active_conn)
+    by_action = stats.by("action")
+    total_rules = stats.total
+    # Measured by the background keepalive; reading it never blocks on the network
+    if active_conn:
+        start_keepalive(active_conn, session_holder())
+    ka = keepalive_status(active_conn)
 
     # Page header
     st.markdown(
@@ -42,14 +71,14 @@ def render() -> None:
         render_metric_card("Active Connection", "✅" if active_conn else "❌", "🔗", "#1F8A70")
 
     with col2:
-        render_metric_card("Total Rules", str(len(rules)), "📋", "#0F62FE")
+        render_metric_card("Total Rules", str(total_rules), "📋", "#0F62FE")
 
     with col3:
-        allow_rules = len([r for r in rules if r.get("action") == "Allow"])
+        allow_rules = by_action.get(Action.ALLOW, 0)
         render_metric_card("Allow Rules", str(allow_rules), "✅", "#1F8A70")
 
     with col4:
-        block_rules = len([r for r in rules if r.get("action") == "Block"])
+        block_rules = by_action.get(Action.BLOCK, 0)
         render_metric_card("Block Rules", str(block_rules), "🚫", "#B91C1C")
 
     st.divider()
@@ -84,7 +113,7 @@ def render() -> None:
 
         if active_conn:
             st.success(f"Connected to: **{active_conn}**")
-            st.caption("Status: Online ✅")
+            st.caption(_connection_caption(ka))
         else:
             st.warning("No active connection")
             st.caption("Status: Offline ⚠️")
@@ -105,8 +134,13 @@ def render() -> None:
             unsafe_allow_html=True,
         )
 
-        st.success("All systems operational ✅")
-        st.caption("Uptime: 99.9%")
+        if ka and ka.get("status") == "offline":
+            st.error("Database unreachable ❌")
+            if ka.get("last_error"):
+                st.caption(f"Last error: {ka['last_error']}")
+        else:
+            st.success("All systems operational ✅")
+        st.caption(_uptime_caption(ka))
 
         st.markdown("</div></div>", unsafe_allow_html=True)
 
@@ -124,16 +158,12 @@ def render() -> None:
         unsafe_allow_html=True,
     )
 
-    if rules:
+    if total_rules:
         # Display last 5 rules in a nice format
-        recent_rules = sorted(rules, key=lambda x: rules.index(x), reverse=True)[:5]
+        recent_rules = stats.recent(5)
 
         for idx, rule in enumerate(recent_rules):
-            action_color = {
-                "Allow": "#1F8A70",
-                "Block": "#B91C1C",
-                "Mask": "#B7791F"
-            }.get(rule.get("action"), "#6B7280")
+            action_color = rule.action.color if rule.action else DEFAULT_COLOR
 
             st.markdown(
                 f"""
@@ -1,10 +1,50 @@
+import math
+
+import pandas as pd
 import streamlit as st
 import streamlit_antd_components as sac
 
-
-def _rules_df():
-    import pandas as pd
-    return pd.DataFrame(st.session_state.get("rules", []))
+from utilities.rule_model import Action, Rule
+from utilities.rule_store import get_rule_repository
+from utilities.rule_search import get_rule_search_index
+
+
+PAGE_SIZES = [10, 25, 50, 100, 250]
+SORT_OPTIONS = {
+    "Priority (low → high)": ("priority", False),
+    "Priority (high → low)": ("priority", True),
+    "Name (A → Z)": ("name", False),
+    "Newest first": ("id", True),
+}
+RELEVANCE = "Relevance"
+
+
+def _query_page(
+    repo, connection: str | None, q: str, action: Action | None, sort: str, page: int, page_size: int
+) -> tuple[list[Rule], int]:
+    """Return (``connection``'s rules on the requested page, total matches); only the page is materialized."""
+    offset = (page - 1) * page_size
+    if not q:
+        order_by, descending = SORT_OPTIONS[sort]
+        total = repo.count(action=action, connection=connection)
+        rows = repo.list(order_by=order_by, descending=descending, limit=page_size, offset=offset,
+                         action=action, connection=connection)
+        return rows, total
+
+    ids = get_rule_search_index(repo, connection).search(q)
+    if sort == RELEVANCE and not action:
+        # Ranked ids are enough to slice; fetch just the visible rows
+        return repo.get_many(ids[offset:offset + page_size]), len(ids)
+    matches = repo.get_many(ids)
+    if action:
+        matches = [r for r in matches if r.action == action]
+    if sort != RELEVANCE:
+        key, descending = SORT_OPTIONS[sort]
+        if key == "name":
+            matches.sort(key=lambda r: str(r.get("name") or "").lower(), reverse=descending)
+        else:
+            matches.sort(key=lambda r: r.get(key) if r.get(key) is not None else 0, reverse=descending)
+    return matches[offset:offset + page_size], len(matches)
 
 
 def render() -> None:
@@ -21,8 +61,10 @@ def render() -> None:
         unsafe_allow_html=True,
     )
 
-    rules = st.session_state.get("rules", [])
-    if not rules:
+    active_conn = st.session_state.get("active_connection")
+    repo = get_rule_repository(active_conn)
+    total_rules = repo.count(connection=active_conn)
+    if not total_rules:
         st.info("📭 No rules yet. Go to **Configure Rule** to add one.")
         return
 
@@ -41,7 +83,7 @@ def render() -> None:
     col1, col2 = st.columns([2, 1])
 
     with col1:
-        q = st.text_input("Search rules", placeholder="Filter by name, schema, table, or action")
+        q = st.text_input("Search rules", placeholder="Filter by name, schema, table, action, or condition")
 
     with col2:
         action_filter = sac.segmented(
@@ -55,121 +97,143 @@ def render() -> None:
             size='sm',
         )
 
-    st.markdown("</div>", unsafe_allow_html=True)
+    col_sort, col_size = st.columns([2, 1])
+    with col_sort:
+        sort_choices = ([RELEVANCE] if q else []) + list(SORT_OPTIONS)
+        sort = st.selectbox("Sort by", sort_choices, key="er_sort" if not q else "er_sort_q")
+    with col_size:
+        page_size = st.selectbox("Rules per page", PAGE_SIZES, index=1, key="er_page_size")
 
-    # Filter data
-    data = rules
-    if q:
-        ql = q.lower()
-        data = [r for r in data if any(str(r.get(k, "")).lower().find(ql) >= 0 for k in ("name", "schema", "table", "action"))]
+    st.markdown("</div>", unsafe_allow_html=True)
 
-    if action_filter != 'All':
-        # Handle both old format and new with icons
-        action_key = action_filter.split()[-1] if ' ' in action_filter else action_filter
-        data = [r for r in data if action_key in str(r.get("action", ""))]
+    # Back to page 1 whenever the result set changes shape
+    action = None if action_filter == 'All' else Action.parse(action_filter)
+    view_key = (q, action, sort, page_size)
+    if st.session_state.get("_er_view_key") != view_key:
+        st.session_state["_er_view_key"] = view_key
+        st.session_state["er_page"] = 1
+        st.session_state.pop("_confirm_delete_ids", None)
+
+    page = int(st.session_state.get("er_page", 1))
+    data, total = _query_page(repo, active_conn, q, action, sort, page, page_size)
+    pages = max(1, math.ceil(total / page_size))
+    if page > pages:
+        st.session_state["er_page"] = page = pages
+        data, total = _query_page(repo, active_conn, q, action, sort, page, page_size)
 
     # Display rules
     st.markdown(
         """
         <div style="margin-bottom: 20px;">
             <p style="margin: 0; color: #6B7280; font-size: 12px;">
-                Showing <strong>{}</strong> of <strong>{}</strong> rules
+                Showing <strong>{}</strong> of <strong>{}</strong> matching rules ({} total)
             </p>
         </div>
-        """.format(len(data), len(rules)),
+        """.format(len(data), total, total_rules),
         unsafe_allow_html=True,
     )
 
-    if data:
-        df = _rules_df()
-        if data != rules:
-            import pandas as pd
-            df = pd.DataFrame(data)
-
-        # Custom dataframe display
-        for idx, rule in enumerate(data):
-            action_color = {
-                "✅ Allow": "#1F8A70",
-                "🚫 Block": "#B91C1C",
-                "🎭 Mask": "#B7791F"
-            }.get(str(rule.get("action", "")), "#6B7280")
-
-            st.markdown(
+    if not data:
+        st.info("🔍 No rules match your filters. Try adjusting your search or filters.")
+        return
+
+    df = pd.DataFrame(
+        [
+            {
+                "Select": False,
+                "ID": r.id,
+                "Name": r.get("name") or "(Unnamed)",
+                "Schema": r.get("schema") or "",
+                "Table": r.get("table") or "",
+                "Action": r.action.label if r.action else "",
+                "Priority": r.get("priority"),
+                "Condition": r.get("condition") or "",
+            }
+            for r in data
+        ]
+    )
+    edited = st.data_editor(
+        df,
+        hide_index=True,
+        use_container_width=True,
+        num_rows="fixed",
+        column_config={
+            "Select": st.column_config.CheckboxColumn(label=""),
+            "ID": st.column_config.NumberColumn("ID", width="small"),
+            "Priority": st.column_config.NumberColumn("Priority", width="small"),
+            "Condition": st.column_config.TextColumn("Condition", width="large"),
+        },
+        disabled=["ID", "Name", "Schema", "Table", "Action", "Priority", "Condition"],
+        key=f"er_table_{page}_{hash(view_key)}",
+    )
+
+    nav_prev, nav_label, nav_next = st.columns([1, 2, 1])
+    with nav_prev:
+        if st.button("◀ Previous", disabled=page <= 1, use_container_width=True, key="er_prev"):
+            st.session_state["er_page"] = page - 1
+            st.rerun()
+    with nav_label:
+        st.markdown(
+            f"<p style='text-align:center;margin:8px 0;color:#6B7280;font-size:13px;'>Page {page} of {pages}</p>",
+            unsafe_allow_html=True,
+        )
+    with nav_next:
+        if st.button("Next ▶", disabled=page >= pages, use_container_width=True, key="er_next"):
+            st.session_state["er_page"] = page + 1
+            st.rerun()
+
+    # Action bar for the selected rows
+    selected_ids = [int(i) for i in edited.loc[edited["Select"], "ID"].tolist()] if isinstance(edited, pd.DataFrame) else []
+    selected = [r for r in data if r.id in selected_ids]
+
+    col_d1, col_d2, col_d3 = st.columns(3)
+
+    with col_d1:
+        view_clicked = st.button("🔍 View", disabled=not selected, use_container_width=True, key="er_view")
+
+    with col_d2:
+        if st.button("✏️ Edit", disabled=len(selected) != 1, use_container_width=True, key="er_edit"):
+            st.info("Edit functionality coming soon!")
+
+    with col_d3:
+        if st.button("🗑️ Delete", disabled=not selected, use_container_width=True, key="er_delete"):
+            st.session_state["_confirm_delete_ids"] = selected_ids
+
+    if view_clicked:
+        for rule in selected:
+            st.info(
                 f"""
-                <div style="background:white;border:1px solid #E5E7EB;border-radius:12px;padding:16px;
-                            margin-bottom:12px;box-shadow: 0 1px 3px rgba(0,0,0,0.05);">
-                    <div style="display:flex;justify-content:space-between;align-items:flex-start;margin-bottom:12px;">
-                        <div>
-                            <h4 style="margin:0 0 4px 0;color:#1F2937;font-weight:600;font-size:15px;">
-                                {rule.get('name', '(Unnamed)')}
-                            </h4>
-                            <p style="margin:0;color:#6B7280;font-size:12px;">
-                                {rule.get('schema', 'N/A')}.{rule.get('table', 'N/A')}
-                            </p>
-                        </div>
-                        <div style="display:flex;gap:8px;">
-                            <span style="background:{action_color};color:white;padding:4px 12px;border-radius:8px;
-                                        font-size:11px;font-weight:600;">
-                                {rule.get('action', 'N/A')}
-                            </span>
-                            <span style="background:#F3F4F6;color:#6B7280;padding:4px 12px;border-radius:8px;
-                                        font-size:11px;font-weight:600;">
-                                P{rule.get('priority', 'N/A')}
-                            </span>
-                        </div>
-                    </div>
-                    <div style="background:#F9FAFB;border-radius:8px;padding:10px;margin-bottom:12px;
-                                border-left:3px solid {action_color};">
-                        <p style="margin:0;color:#6B7280;font-size:12px;font-family:monospace;">
-                            {rule.get('condition', '(No condition)')}
-                        </p>
-                    </div>
-                """,
-                unsafe_allow_html=True,
+                **Rule Name:** {rule.get('name')}
+
+                **Schema:** {rule.get('schema')}
+
+                **Table:** {rule.get('table')}
+
+                **Action:** {rule.get('action')}
+
+                **Masked columns:** {rule.get('mask_columns', '-')}
+
+                **Priority:** {rule.get('priority')}
+
+                **Condition:** {rule.get('condition')}
+                """
             )
 
-            col_d1, col_d2, col_d3 = st.columns(3)
-
-            with col_d1:
-                if st.button("🔍 View", key=f"view_{idx}", use_container_width=True):
-                    st.info(
-                        f"""
-                        **Rule Name:** {rule.get('name')}
-                        
-                        **Schema:** {rule.get('schema')}
-                        
-                        **Table:** {rule.get('table')}
-                        
-                        **Action:** {rule.get('action')}
-                        
-                        **Priority:** {rule.get('priority')}
-                        
-                        **Condition:** {rule.get('condition')}
-                        """
-                    )
-
-            with col_d2:
-                if st.button("✏️ Edit", key=f"edit_{idx}", use_container_width=True):
-                    st.info("Edit functionality coming soon!")
-
-            with col_d3:
-                if st.button("🗑️ Delete", key=f"del_{idx}", use_container_width=True):
-                    st.session_state["_confirm_delete_idx"] = idx
-
-            # Confirmation dialog
-            if st.session_state.get("_confirm_delete_idx") == idx:
-                st.warning(f"⚠️ Are you sure you want to delete '{rule.get('name')}'?")
-                cc1, cc2 = st.columns(2)
-                with cc1:
-                    if st.button("Cancel", key=f"cancel_{idx}"):
-                        st.session_state.pop("_confirm_delete_idx", None)
-                with cc2:
-                    if st.button("Confirm Delete", type="primary", key=f"confirm_{idx}"):
-                        st.session_state["rules"].pop(idx)
-                        st.session_state.pop("_confirm_delete_idx", None)
-                        st.success(f"✅ Rule '{rule.get('name')}' deleted!")
-                        st.rerun()
-
-            st.markdown("</div>", unsafe_allow_html=True)
-    else:
-        st.info("🔍 No rules match your filters. Try adjusting your search or filters.")
+    # Confirmation dialog
+    pending = st.session_state.get("_confirm_delete_ids")
+    if pending:
+        names = [r.get("name") for r in repo.get_many(pending)]
+        label = f"'{names[0]}'" if len(names) == 1 else f"{len(names)} rules"
+        st.warning(f"⚠️ Are you sure you want to delete {label}?")
+        cc1, cc2 = st.columns(2)
+        with cc1:
+            if st.button("Cancel", key="er_cancel_delete"):
+                st.session_state.pop("_confirm_delete_ids", None)
+                st.rerun()
+        with cc2:
+            if st.button("Confirm Delete", type="primary", key="er_confirm_delete"):
+                for rule_id in pending:
+                    repo.delete(rule_id)
+                st.session_state.pop("_confirm_delete_ids", None)
+                st.success(f"✅ Deleted {label}!")
+                st.rerun()
@@ -1,6 +1,11 @@
 import streamlit as st
 import streamlit_antd_components as sac
 
+from utilities.export_manifest import list_manifests
+from utilities.rule_export import COMPRESSIONS, DELTA_FORMATS, FORMATS, export_extension, export_file, preview_export
+from utilities.rule_planner import build_plan, execute_plan, explain, plan_script
+from utilities.rule_store import get_rule_repository
+
 
 def render() -> None:
     # Enhanced page header
@@ -16,9 +21,12 @@ def render() -> None:
         unsafe_allow_html=True,
     )
 
-    rules = st.session_state.get("rules", [])
-    if not rules:
+    active_conn = st.session_state.get("active_connection")
+    repo = get_rule_repository(active_conn)
+    total = repo.count(connection=active_conn)
+    if not total:
         st.info("📭 No rules to export. Create some rules first in **Configure Rule**.")
+        _render_columnar_import(repo, active_conn)
         return
 
     # Export options section
@@ -38,10 +46,14 @@ def render() -> None:
             sac.SegmentedItem(label='📄 JSON', icon='filetype-json'),
             sac.SegmentedItem(label='📊 CSV', icon='filetype-csv'),
             sac.SegmentedItem(label='📋 YAML', icon='filetype-yml'),
+            sac.SegmentedItem(label='🧱 Parquet', icon='grid-3x3'),
+            sac.SegmentedItem(label='🏹 Arrow', icon='lightning'),
         ],
         align='start',
         size='lg'
     )
+    fmt_key = next(k for k in FORMATS if k.upper() in fmt.upper())
+    fmt_name = fmt_key.upper() if fmt_key in ("json", "csv", "yaml") else fmt_key.title()
 
     st.markdown(
         """
@@ -51,12 +63,16 @@ def render() -> None:
         unsafe_allow_html=True,
     )
 
-    if "JSON" in fmt:
+    if fmt_key == "json":
         st.write("**JSON** - Human-readable with full fidelity. Best for backups and integrations.")
-    elif "CSV" in fmt:
+    elif fmt_key == "csv":
         st.write("**CSV** - Tabular format for spreadsheets and data pipelines.")
-    else:
+    elif fmt_key == "yaml":
         st.write("**YAML** - Configuration-friendly format for DevOps workflows.")
+    elif fmt_key == "parquet":
+        st.write("**Parquet** - Compressed columnar file with typed columns. Best for analytics and data lakes.")
+    else:
+        st.write("**Arrow** - Arrow IPC file with typed columns for zero-copy loading into pandas, Spark or DuckDB.")
 
     st.markdown("</p></div>", unsafe_allow_html=True)
 
@@ -83,7 +99,58 @@ def render() -> None:
         )
 
     with col2:
-        st.metric("Rules", len(rules))
+        st.metric("Rules", total)
+
+    # Delta exports: only what changed since an earlier export's manifest
+    scope = {"connection": active_conn} if active_conn else {}
+    manifests = [m for m in list_manifests() if m.get("store") == repo.store_id and (m.get("scope") or {}) == scope]
+    col_m1, col_m2 = st.columns([1, 2])
+    with col_m1:
+        mode = st.radio(
+            "Export mode",
+            ["Full", "Delta since manifest"],
+            key="export_mode",
+            disabled=not manifests or fmt_key not in DELTA_FORMATS,
+            help="Every export records a manifest; a delta holds only rules added, changed or deleted since one"
+        )
+    since = None
+    with col_m2:
+        if mode != "Full" and manifests and fmt_key in DELTA_FORMATS:
+            labels = {
+                m["id"]: f"{m['id']} · {m.get('kind', 'full')} {m.get('format', '').upper()} · {m.get('rules', 0)} rules"
+                for m in manifests
+            }
+            since = st.selectbox("Changes since", list(labels), format_func=labels.get, key="export_since")
+        elif not manifests:
+            st.caption("No manifests yet: prepare a full export first to enable delta exports.")
+        elif fmt_key not in DELTA_FORMATS:
+            st.caption("Delta exports are available as JSON, CSV or YAML.")
+
+    col_c1, col_c2 = st.columns(2)
+    with col_c1:
+        compression = st.selectbox(
+            "Compression",
+            ["None"] + list(COMPRESSIONS),
+            key="export_compression",
+            disabled=fmt_key == "parquet",
+            help="Compressed while writing, so large exports download faster (Parquet is already compressed)"
+        )
+    with col_c2:
+        chunk_rows = st.number_input(
+            "Split into chunks of N rules",
+            min_value=0,
+            value=0,
+            step=10000,
+            key="export_chunk_rows",
+            disabled=since is not None,
+            help="0 = one file. Otherwise a zip of chunk files plus manifest.json with row counts and SHA-256 checksums"
+        )
+    options = {
+        "compression": None if compression == "None" or fmt_key == "parquet" else compression,
+        "chunk_rows": None if since else int(chunk_rows) or None,
+        "since": since,
+        "connection": active_conn,
+    }
 
     st.divider()
 
@@ -98,16 +165,26 @@ def render() -> None:
             unsafe_allow_html=True,
         )
 
-        if "JSON" in fmt:
-            import json
-            st.code(json.dumps(rules[:2], indent=2), language="json")
-        elif "CSV" in fmt:
+        # Only this slice is serialized on rerun; the full export is spooled on demand
+        if fmt_key == "json":
+            st.code(preview_export(repo.list(limit=2, connection=active_conn), "json"), language="json")
+        elif fmt_key == "csv":
             import pandas as pd
-            df = pd.DataFrame(rules[:5])
+            df = pd.DataFrame([r.to_dict() for r in repo.list(limit=5, connection=active_conn)])
             st.dataframe(df, use_container_width=True, hide_index=True)
+        elif fmt_key == "yaml":
+            try:
+                st.code(preview_export(repo.list(limit=2, connection=active_conn), "yaml"), language="yaml")
+            except ImportError:
+                st.caption("YAML preview requires 'pyyaml'.")
         else:
-            import yaml
-            st.code(yaml.dump(rules[:2], default_flow_style=False), language="yaml")
+            try:
+                from utilities.rule_columnar import preview_frame
+                df = preview_frame(repo, 5, connection=active_conn)
+                st.dataframe(df, use_container_width=True, hide_index=True)
+                st.caption(" • ".join(f"{c}: {t}" for c, t in df.dtypes.astype(str).items()))
+            except ImportError:
+                st.caption("Columnar preview requires 'pyarrow'.")
 
     st.divider()
 
@@ -121,57 +198,120 @@ def render() -> None:
         unsafe_allow_html=True,
     )
 
-    if "JSON" in fmt:
-        import json
-        data = json.dumps(rules, indent=2).encode("utf-8")
-        col1, col2 = st.columns([3, 1])
+    ext, mime = export_extension(fmt_key, options)
+    # Cached per rule-set version, format and options; only a miss writes anything
+    spooled = export_file(repo, fmt_key, options, build=False)
+    # The download button reads the whole file on every rerun, so it is only
+    # shown for the file this session prepared, and only until it is downloaded
+    if spooled is not None and st.session_state.get("export_prepared") != spooled["path"]:
+        spooled = None
+    what = "changes" if since else f"{total} rules"
+
+    col1, col2 = st.columns([3, 1])
+    if spooled is None:
         with col1:
-            st.info(f"✅ Ready to export {len(rules)} rules as JSON")
+            st.info(f"📦 {what} will be written to a file as {fmt_name}")
         with col2:
-            st.download_button(
-                "⬇️ Download JSON",
-                data=data,
-                file_name=f"{filename}.json",
-                mime="application/json",
-                use_container_width=True
-            )
-    elif "CSV" in fmt:
-        import csv
-        import io
-        output = io.StringIO()
-        if rules:
-            fieldnames = sorted({k for r in rules for k in r.keys()})
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            for r in rules:
-                writer.writerow(r)
-        col1, col2 = st.columns([3, 1])
+            if st.button(f"⚙️ Prepare {fmt_name}", use_container_width=True, key="export_prepare"):
+                try:
+                    with st.spinner(f"Writing {what}..."):
+                        st.session_state["export_prepared"] = export_file(repo, fmt_key, options)["path"]
+                    st.rerun()
+                except ValueError as exc:
+                    st.error(f"Could not export: {exc}")
+                except ImportError:
+                    if fmt_key == "yaml":
+                        st.warning("⚠️ YAML support requires 'pyyaml' package. Please install it with: pip install pyyaml")
+                    else:
+                        st.warning("⚠️ Parquet/Arrow support requires 'pyarrow' package. Please install it with: pip install pyarrow")
+    else:
         with col1:
-            st.info(f"✅ Ready to export {len(rules)} rules as CSV")
+            detail = f"{spooled['chunks']} chunks, " if spooled.get("chunks") is not None else ""
+            if spooled.get("changes") is not None:
+                c = spooled["changes"]
+                st.info(
+                    f"✅ Ready to export {c['add']} added, {c['change']} changed and {c['delete']} deleted rules "
+                    f"as {fmt_name} ({spooled['bytes'] / 1024:,.1f} KB, .{ext})"
+                )
+            else:
+                st.info(f"✅ Ready to export {spooled['rows']} rules as {fmt_name} ({detail}{spooled['bytes'] / 1024:,.1f} KB, .{ext})")
+            if spooled.get("manifest"):
+                st.caption(f"Manifest {spooled['manifest']} — use it as the base of the next delta export.")
         with col2:
-            st.download_button(
-                "⬇️ Download CSV",
-                data=output.getvalue(),
-                file_name=f"{filename}.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
-    else:
-        try:
-            import yaml
-            data = yaml.dump(rules, default_flow_style=False).encode("utf-8")
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.info(f"✅ Ready to export {len(rules)} rules as YAML")
-            with col2:
+            with open(spooled["path"], "rb") as f:
                 st.download_button(
-                    "⬇️ Download YAML",
-                    data=data,
-                    file_name=f"{filename}.yaml",
-                    mime="application/x-yaml",
+                    f"⬇️ Download {fmt_name}",
+                    data=f,
+                    file_name=f"{filename}_delta.{ext}" if since else f"{filename}.{ext}",
+                    mime=mime,
+                    on_click=lambda: st.session_state.pop("export_prepared", None),
                     use_container_width=True
                 )
-        except ImportError:
-            st.warning("⚠️ YAML support requires 'pyyaml' package. Please install it with: pip install pyyaml")
+
+    st.divider()
+
+    # Enforcement plan: one set-based view per target table
+    st.markdown(
+        """
+        <p style="margin: 16px 0 12px 0; font-size: 13px; font-weight: 600; color: #374151; text-transform: uppercase; letter-spacing: 0.5px;">
+            Enforcement Plan
+        </p>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    if st.toggle("🧭 Explain enforcement plan", key="export_explain_plan"):
+        plan = build_plan(repo.iter_all(connection=active_conn))
+        statements = sum(1 for tp in plan if tp.sql)
+        st.caption(f"{total} rules → {statements} view(s) across {len(plan)} table(s)")
+        st.code(explain(plan), language="text")
+        if statements:
+            st.download_button(
+                "⬇️ Download SQL script",
+                data=plan_script(plan).encode("utf-8"),
+                file_name=f"{filename}_plan.sql",
+                mime="application/sql",
+                use_container_width=True
+            )
+            _render_plan_execution(plan)
+
+    _render_columnar_import(repo, active_conn)
 
     st.markdown("</div>", unsafe_allow_html=True)
+
+
+def _render_plan_execution(plan) -> None:
+    active_conn = st.session_state.get("active_connection")
+    views = [tp.view for tp in plan if tp.sql and (tp.connection or "") == (active_conn or "")]
+    if not active_conn or not views:
+        return
+    # The views are created on the live server, so the plan above must be confirmed first
+    confirmed = st.checkbox(
+        f"I reviewed the plan; create or alter {len(views)} view(s) on {active_conn}",
+        key="export_plan_confirm",
+    )
+    if st.button("▶️ Apply enforcement plan", disabled=not confirmed, use_container_width=True, key="export_plan_apply"):
+        with st.spinner("Creating enforced views..."):
+            results = execute_plan(plan, active_conn)
+        for view, ok, msg in results:
+            st.success(f"✅ {msg}") if ok else st.error(f"❌ {view}: {msg}")
+
+
+def _render_columnar_import(repo, active_conn) -> None:
+    with st.expander("📥 Import rules (Parquet / Arrow)", expanded=False):
+        st.caption("Rows are added as new rules; id and timestamps in the file are ignored.")
+        uploaded = st.file_uploader("Rules file", type=["parquet", "arrow", "feather"], key="export_import_upload")
+        if st.button("Import", type="primary", key="export_import", disabled=uploaded is None):
+            try:
+                from utilities.rule_columnar import import_rules_frame, read_rules_frame
+                df = read_rules_frame(uploaded.getvalue(), uploaded.name)
+                added = import_rules_frame(repo, df, active_conn)
+            except ImportError:
+                st.warning("⚠️ Parquet/Arrow support requires 'pyarrow' package. Please install it with: pip install pyarrow")
+                return
+            except Exception as exc:
+                st.error(f"Could not import {uploaded.name}: {exc}")
+                return
+            # A toast survives the rerun; st.success would be discarded before it renders
+            st.toast(f"Imported {added} rules.", icon="✅")
+            st.rerun()
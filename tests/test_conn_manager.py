@@ -0,0 +1,143 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from utilities import conn_manager
+from utilities.conn_manager import STORE_FORMAT_VERSION, ConnectionManager, ConnectionStoreError, load_app_config
+
+
+def test_app_config_is_reparsed_only_when_the_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / "config.toml"
+    path.write_text('[rules]\nbackend = "sqlite"\n')
+    monkeypatch.setattr(conn_manager, "APP_CONFIG_FILE", str(path))
+    monkeypatch.setattr(conn_manager, "_app_config", None)
+
+    first = load_app_config()
+    assert first == {"rules": {"backend": "sqlite"}}
+    assert load_app_config() is first
+
+    path.write_text('[rules]\nbackend = "mssql"\n')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_app_config() == {"rules": {"backend": "mssql"}}
+
+
+def test_missing_app_config_is_empty(tmp_path, monkeypatch):
+    monkeypatch.setattr(conn_manager, "APP_CONFIG_FILE", str(tmp_path / "absent.toml"))
+    assert load_app_config() == {}
+
+
+# --- Encrypted connection store ---
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Point the store, key and lock files at tmp_path, with no legacy files next to the module."""
+    monkeypatch.setattr(conn_manager, "KEY_DAT", str(tmp_path / "key.dat"))
+    monkeypatch.setattr(conn_manager, "ENCRYPTED_CONNECTIONS_FILE", str(tmp_path / "connections.enc"))
+    monkeypatch.setattr(conn_manager, "STORE_LOCK_FILE", str(tmp_path / "connections.enc.lock"))
+    monkeypatch.setattr(conn_manager, "__file__", str(tmp_path / "utilities" / "conn_manager.py"))
+    return tmp_path
+
+
+def _envelope(path):
+    return json.loads((path / "connections.enc").read_text(encoding="utf-8"))
+
+
+def test_store_writes_a_v2_envelope_with_one_token_per_password(store):
+    mgr = ConnectionManager()
+    mgr.upsert("prod", "db.example", "app", "s3cret", "Sales")
+    mgr.upsert("test", "db-test.example", "app", "other", "Sales")
+
+    doc = _envelope(store)
+    assert doc["format"] == STORE_FORMAT_VERSION
+    assert doc["revision"] == 2
+    assert len(doc["secrets"]) == 2
+    raw = (store / "connections.enc").read_text(encoding="utf-8")
+    assert "db.example" not in raw and "s3cret" not in raw
+
+    fresh = ConnectionManager()
+    assert sorted(c["name"] for c in fresh.list()) == ["prod", "test"]
+    assert fresh.decrypt_password(fresh.get("prod")) == "s3cret"
+
+
+def test_v1_store_is_rewritten_as_v2_on_first_read(store):
+    mgr = ConnectionManager()
+    token = mgr._fernet.encrypt(b"pw").decode("utf-8")
+    payload = {"connections": {"old": {"host": "h", "user": "u", "database": "d", "enc_password": token}}}
+    (store / "connections.enc").write_bytes(mgr._fernet.encrypt(json.dumps(payload).encode("utf-8")))
+
+    fresh = ConnectionManager()
+    assert [c["name"] for c in fresh.list()] == ["old"]
+    doc = _envelope(store)
+    assert doc["format"] == STORE_FORMAT_VERSION and doc["revision"] == 1
+    assert doc["secrets"] == [token]
+    assert fresh.decrypt_password(fresh.get("old")) == "pw"
+
+
+def test_legacy_json_is_migrated_once(store):
+    (store / "connections.json").write_text(
+        json.dumps([{"name": "legacy", "host": "h", "user": "u", "password": "pw", "database": "d"}]), encoding="utf-8"
+    )
+    mgr = ConnectionManager()
+    assert [c["name"] for c in mgr.list()] == ["legacy"]
+    assert json.loads((store / "key.dat").read_text(encoding="utf-8"))["legacy_migrated_at"]
+
+    # A deleted legacy record is not brought back by the next start
+    mgr.delete("legacy")
+    assert ConnectionManager().list() == []
+
+
+def test_write_retries_when_another_process_saved_first(store):
+    mgr = ConnectionManager()
+    other = ConnectionManager()
+    mgr.upsert("a", "h", "u", "pw", "d")
+    calls = []
+
+    def change(items):
+        calls.append(len(calls))
+        if len(calls) == 1:
+            # Lands between this writer's snapshot and its compare-and-write
+            other.upsert("b", "h", "u", "pw", "d")
+        items["c"] = {"host": "h", "user": "u", "database": "d"}
+        return True
+
+    mgr._mutate(change)
+    assert len(calls) == 2
+    assert sorted(c["name"] for c in ConnectionManager().list()) == ["a", "b", "c"]
+    assert _envelope(store)["revision"] == 3
+
+
+def test_unreadable_store_refuses_writes_without_retrying(store, monkeypatch):
+    ConnectionManager().upsert("a", "h", "u", "pw", "d")
+    doc = _envelope(store)
+    doc["index"] = "not-a-token"
+    (store / "connections.enc").write_text(json.dumps(doc), encoding="utf-8")
+    before = (store / "connections.enc").read_bytes()
+    monkeypatch.setattr(conn_manager.time, "sleep", lambda s: pytest.fail("write was retried"))
+
+    mgr = ConnectionManager()
+    assert mgr.list() == []
+    with pytest.raises(ConnectionStoreError, match="corrupt"):
+        mgr.upsert("b", "h", "u", "pw", "d")
+    assert (store / "connections.enc").read_bytes() == before
+
+
+def _upsert_in_process(paths, name):
+    conn_manager.KEY_DAT, conn_manager.ENCRYPTED_CONNECTIONS_FILE, conn_manager.STORE_LOCK_FILE, conn_manager.__file__ = paths
+    ConnectionManager().upsert(name, "h", "u", "pw", "d")
+
+
+def test_concurrent_processes_do_not_lose_writes(store):
+    ConnectionManager()  # create key.dat once so every process shares the key
+    paths = (conn_manager.KEY_DAT, conn_manager.ENCRYPTED_CONNECTIONS_FILE, conn_manager.STORE_LOCK_FILE, conn_manager.__file__)
+    names = [f"conn{i}" for i in range(6)]
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_upsert_in_process, args=(paths, name)) for name in names]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(60)
+    assert [p.exitcode for p in procs] == [0] * len(procs)
+    assert sorted(c["name"] for c in ConnectionManager().list()) == names
+    assert _envelope(store)["revision"] == len(names)
@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from utilities import conn_pool
+from utilities.conn_pool import ConnectionPool, close_all_pools, hold_pool, release_pool
+
+
+class _Conn:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def register(monkeypatch):
+    """Install pools into a fresh registry that is restored after the test."""
+    monkeypatch.setattr(conn_pool, "_pools", {})
+    monkeypatch.setattr(conn_pool, "_holders", {})
+
+    def _register(name):
+        pool = ConnectionPool(name, _Conn)
+        conn_pool._pools[name] = ((name,), pool)
+        return pool
+
+    return _register
+
+
+def test_pool_closes_only_when_the_last_holder_releases(register):
+    pool = register("shared")
+    hold_pool("shared", "session-a")
+    hold_pool("shared", "session-b")
+    release_pool("shared", "session-a")
+    assert conn_pool._pools["shared"][1] is pool
+    release_pool("shared", "session-b")
+    assert "shared" not in conn_pool._pools
+    assert "shared" not in conn_pool._holders
+
+
+def test_release_by_a_non_holder_keeps_a_held_pool(register):
+    pool = register("held")
+    hold_pool("held", "session-a")
+    release_pool("held", "session-b")
+    assert conn_pool._pools["held"][1] is pool
+    release_pool("held", "session-a")
+    assert "held" not in conn_pool._pools
+
+
+def test_close_all_pools_closes_every_pool_and_forgets_holders(register):
+    first, second = register("one"), register("two")
+    conns = [first.acquire(), second.acquire()]
+    for pool, conn in zip((first, second), conns):
+        pool.release(conn)
+    hold_pool("one", "session-a")
+    close_all_pools()
+    assert conn_pool._pools == {} and conn_pool._holders == {}
+    assert all(conn.closed for conn in conns)
+
+
+def test_idle_eviction_closes_handles_outside_the_pool_lock():
+    lock_free = []
+
+    class _SlowClose(_Conn):
+        def close(self):
+            # Another thread must be able to take the pool lock while a handle closes
+            probe = threading.Thread(target=lambda: lock_free.append(pool._cond.acquire(timeout=1) and pool._cond.release() is None))
+            probe.start()
+            probe.join()
+            super().close()
+
+    pool = ConnectionPool("evict", _SlowClose, min_size=0, max_size=2, idle_timeout=0)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    pool.evict_idle()
+    assert pool.stats()["idle"] == 0
+    assert first.closed and second.closed
+    assert lock_free and all(lock_free)
@@ -0,0 +1,55 @@
+import pytest
+
+from utilities import export_manifest
+from utilities.export_manifest import ManifestRecorder, compute_delta
+from utilities.rule_store import RuleRepository, _SqliteConnector
+
+
+@pytest.fixture(autouse=True)
+def _manifest_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_manifest, "MANIFEST_DIR", str(tmp_path))
+
+
+def _repo():
+    return RuleRepository(_SqliteConnector(":memory:"), "sqlite")
+
+
+def _rule(name, **kw):
+    return {"name": name, "schema": "dbo", "table": "T", "action": "Block", "priority": 1, **kw}
+
+
+def _full_export(repo, **scope):
+    recorder = ManifestRecorder(repo, scope)
+    for _ in recorder.tap(repo.iter_rows(**scope)):
+        pass
+    return recorder.save("csv")
+
+
+def test_delta_reports_adds_changes_and_deletes():
+    repo = _repo()
+    kept, changed, dropped = repo.add(_rule("a")), repo.add(_rule("b")), repo.add(_rule("c"))
+    manifest = _full_export(repo)
+    repo.update(changed, {"priority": 5})
+    repo.update(kept, {"priority": 1})  # rewritten with the same content
+    repo.delete(dropped)
+    added = repo.add(_rule("d"))
+
+    upserts, deleted, recorder = compute_delta(repo, manifest)
+    assert [(kind, rule.id) for kind, rule in upserts] == [("change", changed), ("add", added)]
+    assert deleted == [dropped]
+    assert sorted(recorder.hashes) == [kept, changed, added]
+
+
+def test_delta_sees_a_write_whose_timestamp_predates_the_export():
+    repo = _repo()
+    repo.add(_rule("a"))
+    late = repo.add(_rule("b"))
+    manifest = _full_export(repo)
+    # A writer that stamped its update before the export started but committed after it
+    repo.update(late, {"priority": 9})
+    with repo._cursor(write=True) as cur:
+        cur.execute("UPDATE erm_rules SET updated_at = 0 WHERE id = ?", [late])
+
+    upserts, deleted, _ = compute_delta(repo, manifest)
+    assert [(kind, rule.id) for kind, rule in upserts] == [("change", late)]
+    assert deleted == []
@@ -0,0 +1,39 @@
+import pytest
+
+from utilities.rule_condition import UNVERIFIED, UnsupportedConditionError, compile_condition, validate_condition
+
+
+@pytest.mark.parametrize("text, sql, columns", [
+    ("created < DATEADD(day, -30, GETDATE())", "[created] < DATEADD(day, -30, GETDATE())", {"created"}),
+    ("DATEDIFF(dd, opened, closed) > 7", "DATEDIFF(dd, [opened], [closed]) > 7", {"opened", "closed"}),
+    ("CAST(x AS INT) > 3", "CAST([x] AS INT) > 3", {"x"}),
+    ("CONVERT(decimal(18, 2), amt) = 1.50", "CONVERT(DECIMAL(18, 2), [amt]) = 1.50", {"amt"}),
+    ("code LIKE 'a\\_%' ESCAPE '\\'", "[code] LIKE N'a\\_%' ESCAPE N'\\'", {"code"}),
+    ("amt = 12345678901234567.89", "[amt] = 12345678901234567.89", {"amt"}),
+    ("v > -1e10", "[v] > -1e10", {"v"}),
+])
+def test_tsql_constructs_round_trip(text, sql, columns):
+    compiled = compile_condition(text)
+    assert compiled.sql == sql
+    assert compiled.columns == frozenset(columns)
+
+
+def test_syntax_error_is_refused():
+    ok, message = validate_condition("a = = 1")
+    assert not ok
+    assert message.startswith("Syntax error:")
+
+
+@pytest.mark.parametrize("text", [
+    "id IN (SELECT id FROM dbo.vip)",
+    "EXISTS (SELECT 1 FROM dbo.vip)",
+    "CASE WHEN a = 1 THEN 1 ELSE 0 END = 1",
+    "name COLLATE Latin1_General_CS_AS = 'x'",
+    "region = @region",
+])
+def test_unsupported_tsql_is_a_warning_not_a_refusal(text):
+    with pytest.raises(UnsupportedConditionError):
+        compile_condition(text)
+    ok, message = validate_condition(text)
+    assert ok
+    assert message.startswith(UNVERIFIED)
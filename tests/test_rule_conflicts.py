@@ -0,0 +1,62 @@
+import itertools
+import random
+
+from utilities.rule_conflicts import RuleConflictIndex, _Entry
+from utilities.rule_model import Rule
+
+
+def _index(rules):
+    index = RuleConflictIndex()
+    for rule in rules:
+        index.apply("add", rule.id, rule)
+    return index
+
+
+def _random_rules(n, seed=7):
+    rnd = random.Random(seed)
+    conditions = [
+        lambda: f"region = 'R{rnd.randint(0, 5)}'",
+        lambda: f"amount BETWEEN {rnd.randint(0, 50)} AND {rnd.randint(50, 100)}",
+        lambda: f"region IN ('R{rnd.randint(0, 5)}', 'R{rnd.randint(0, 5)}') AND amount > {rnd.randint(0, 100)}",
+        lambda: f"status = {rnd.randint(0, 3)}",
+        lambda: f"name LIKE 'A{rnd.randint(0, 3)}%'",
+        lambda: "ssn IS NOT NULL",
+        lambda: "",
+    ]
+    return [
+        Rule(id=i, name=f"r{i}", schema="dbo", table=rnd.choice(["A", "B"]), condition=rnd.choice(conditions)(),
+             action=rnd.choice(["Allow", "Block", "Mask"]), priority=rnd.randint(1, 3))
+        for i in range(1, n + 1)
+    ]
+
+
+def test_conflicts_match_pairwise_check():
+    rules = _random_rules(300)
+    found = {(f["rule_id"], f["other_id"]) for f in _index(rules).report() if f["kind"] == "conflict"}
+    expected = set()
+    for a, b in itertools.combinations(rules, 2):
+        if a.table != b.table or a.priority != b.priority or a.action == b.action:
+            continue
+        if _Entry(a).overlaps(_Entry(b)):
+            later, earlier = (a, b) if (a.priority, a.id) > (b.priority, b.id) else (b, a)
+            expected.add((later.id, earlier.id))
+    assert found == expected
+
+
+def test_shadowed_by_earlier_allow():
+    rules = [
+        Rule(id=1, name="vip", schema="dbo", table="T", condition="region IN ('EU', 'US')", action="Allow", priority=1),
+        Rule(id=2, name="eu", schema="dbo", table="T", condition="region = 'EU' AND amount > 5", action="Block", priority=5),
+    ]
+    (finding,) = _index(rules).report()
+    assert (finding["kind"], finding["rule_id"], finding["other_id"]) == ("shadowed", 2, 1)
+
+
+def test_report_is_recomputed_after_a_write():
+    index = _index(_random_rules(50))
+    before = index.report()
+    rule = Rule(id=999, name="new", schema="dbo", table="A", condition="", action="Block", priority=1)
+    index.apply("add", rule.id, rule)
+    assert any(f["rule_id"] == 999 or f["other_id"] == 999 for f in index.report())
+    index.apply("delete", 999, None)
+    assert index.report() == before
@@ -0,0 +1,175 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import zipfile
+
+import pytest
+import yaml
+
+from utilities import export_cache, export_manifest, rule_export
+from utilities.export_cache import cached_export, evict, export_key, store_export
+from utilities.rule_columnar import import_rules_frame, read_rules_frame
+from utilities.rule_export import FIELDNAMES, MANIFEST_NAME, export_file, iter_export, write_delta, write_export
+from utilities.rule_model import Rule
+from utilities.rule_store import RuleRepository, _SqliteConnector
+
+
+@pytest.fixture(autouse=True)
+def _app_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_manifest, "MANIFEST_DIR", str(tmp_path / "manifests"))
+    monkeypatch.setattr(export_cache, "CACHE_DIR", str(tmp_path / "cache"))
+
+
+def _repo(n=0):
+    repo = RuleRepository(_SqliteConnector(":memory:"), "sqlite")
+    for i in range(n):
+        repo.add(_rule(f"r{i}", priority=i, connection="prod" if i % 2 else "test"))
+    return repo
+
+
+def _rule(name, **kw):
+    return {"name": name, "schema": "dbo", "table": "T", "action": "Block", "priority": 1, **kw}
+
+
+def _portable(rule_dict):
+    return {k: v for k, v in rule_dict.items() if k not in ("id", "created_at", "updated_at")}
+
+
+# --- Streaming text writers ---
+@pytest.mark.parametrize("n", [0, 1, 5])
+def test_streamed_text_matches_dumping_the_whole_list(n, monkeypatch):
+    monkeypatch.setattr(rule_export, "CSV_FLUSH_ROWS", 2)
+    rules = [Rule(id=i, name=f"r{i}", action="Mask", mask_columns="ssn", priority=i) for i in range(n)]
+    dicts = [r.to_dict() for r in rules]
+
+    assert "".join(iter_export(rules, "json")) == json.dumps(dicts, indent=2)
+    assert "".join(iter_export(rules, "yaml")) == yaml.dump(dicts, default_flow_style=False)
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=FIELDNAMES)
+    writer.writeheader()
+    writer.writerows(dicts)
+    assert "".join(iter_export(rules, "csv")) == buf.getvalue()
+
+
+def test_compressed_export_streams_every_matching_rule(tmp_path):
+    repo = _repo(5)
+    path = str(tmp_path / "rules.json.gz")
+    info = write_export(repo, "json", path, "gzip", connection="prod")
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        exported = json.load(f)
+    assert info["rows"] == len(exported) == 2
+    assert {r["connection"] for r in exported} == {"prod"}
+    assert export_manifest.load_manifest(info["manifest"])["scope"] == {"connection": "prod"}
+
+
+def test_chunked_export_zips_chunks_with_counts_and_checksums(tmp_path, monkeypatch):
+    monkeypatch.setattr(rule_export, "BATCH_ROWS", 3)
+    repo = _repo(5)
+    path = str(tmp_path / "rules.zip")
+    info = write_export(repo, "csv", path, chunk_rows=2)
+    assert (info["rows"], info["chunks"]) == (5, 3)
+    with zipfile.ZipFile(path) as zf:
+        manifest = json.loads(zf.read(MANIFEST_NAME))
+        assert [c["rows"] for c in manifest["chunks"]] == [2, 2, 1]
+        assert [(c["first_id"], c["last_id"]) for c in manifest["chunks"]] == [(1, 2), (3, 4), (5, 5)]
+        for c in manifest["chunks"]:
+            data = zf.read(c["file"])
+            assert hashlib.sha256(data).hexdigest() == c["sha256"]
+            assert len(list(csv.DictReader(io.StringIO(data.decode("utf-8"))))) == c["rows"]
+
+
+# --- Export cache ---
+def test_export_key_changes_with_writes_format_and_options():
+    repo = _repo(1)
+    key = export_key(repo, "json", {"connection": "prod"})
+    assert export_key(repo, "json", {"connection": "prod"}) == key
+    assert export_key(repo, "csv", {"connection": "prod"}) != key
+    assert export_key(repo, "json", {"connection": "test"}) != key
+    repo.add(_rule("another"))
+    assert export_key(repo, "json", {"connection": "prod"}) != key
+
+
+def test_export_file_is_built_once_per_rule_set_version():
+    repo = _repo(3)
+    assert export_file(repo, "json", build=False) is None
+    first = export_file(repo, "json")
+    assert export_file(repo, "json", build=False)["path"] == first["path"]
+    assert export_file(repo, "json")["path"] == first["path"]
+    repo.add(_rule("another"))
+    assert export_file(repo, "json", build=False) is None
+
+
+def test_evict_drops_the_least_recently_used_entries(monkeypatch):
+    monkeypatch.setattr(export_cache, "_limits", lambda: (10 ** 9, 2))
+
+    def build(path):
+        with open(path, "w") as f:
+            f.write("x")
+        return {}
+
+    old = store_export("old", build)
+    store_export("used", build)
+    os.utime(old["path"], (1, 1))
+    os.utime(store_export("used", build)["path"], (2, 2))
+    store_export("new", build)
+    assert cached_export("old") is None
+    assert cached_export("used") is not None and cached_export("new") is not None
+    assert not os.path.exists(old["path"])
+
+    monkeypatch.setattr(export_cache, "_limits", lambda: (0, 2))
+    evict(keep="new")
+    assert cached_export("used") is None and cached_export("new") is not None
+
+
+# --- Columnar round trip ---
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_columnar_export_imports_back_unchanged(fmt, tmp_path, monkeypatch):
+    monkeypatch.setattr(rule_export, "BATCH_ROWS", 2)  # several batches, so dictionaries grow between them
+    repo = _repo()
+    repo.add(_rule("a", action="Mask", mask_columns="ssn, email", condition="Region = 'EU'", connection="prod"))
+    repo.add(_rule("b", schema="hr", table="People", action="Allow", priority=None))
+    repo.add(_rule("c", table="Other", connection="test"))
+    path = str(tmp_path / f"rules.{fmt}")
+    write_export(repo, fmt, path)
+
+    with open(path, "rb") as f:
+        frame = read_rules_frame(f.read(), os.path.basename(path))
+    target = _repo()
+    assert import_rules_frame(target, frame) == 3
+    assert [_portable(r.to_dict()) for r in target.list()] == [_portable(r.to_dict()) for r in repo.list()]
+
+
+# --- Delta exports ---
+def _records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [(r["op"], r["id"]) for r in json.load(f)]
+
+
+def test_delta_exports_chain_adds_changes_and_deletes(tmp_path):
+    repo = _repo(3)
+    full = write_export(repo, "json", str(tmp_path / "full.json"))
+    repo.update(2, {"priority": 7})
+    repo.delete(3)
+    added = repo.add(_rule("new"))
+
+    delta = write_delta(repo, "json", str(tmp_path / "delta.json"), full["manifest"])
+    assert delta["changes"] == {"add": 1, "change": 1, "delete": 1}
+    assert _records(str(tmp_path / "delta.json")) == [("change", 2), ("add", added), ("delete", 3)]
+
+    # The delta's own manifest is the base of the next one
+    repo.delete(1)
+    again = write_delta(repo, "csv", str(tmp_path / "delta2.csv"), delta["manifest"])
+    assert again["changes"] == {"add": 0, "change": 0, "delete": 1}
+    with open(tmp_path / "delta2.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["op"], r["id"]) for r in rows] == [("delete", "1")]
+
+
+def test_delta_refuses_a_manifest_from_another_scope(tmp_path):
+    repo = _repo(2)
+    full = write_export(repo, "json", str(tmp_path / "full.json"), connection="prod")
+    with pytest.raises(ValueError, match="different connection"):
+        write_delta(repo, "json", str(tmp_path / "delta.json"), full["manifest"], connection="test")
@@ -0,0 +1,36 @@
+import io
+
+import pandas as pd
+import pytest
+
+from utilities.rule_columnar import read_rules_frame
+from utilities.rule_model import ACTION_LABELS, Action
+
+
+@pytest.mark.parametrize("value", ["Allow", "allow", " ALLOW ", "✅ Allow", 1, Action.ALLOW])
+def test_action_parse_accepts_names_labels_and_values(value):
+    assert Action.parse(value) is Action.ALLOW
+
+
+def test_action_parse_accepts_every_ui_label():
+    assert {Action.parse(label) for label in ACTION_LABELS.values()} == set(Action)
+
+
+@pytest.mark.parametrize("value", ["Disallow", "Unmask", "Allowed", "Block all", "Mask/Allow"])
+def test_action_parse_rejects_text_that_only_contains_a_name(value):
+    with pytest.raises(ValueError):
+        Action.parse(value)
+
+
+def _parquet(df):
+    buf = io.BytesIO()
+    df.to_parquet(buf, index=False)
+    return buf.getvalue()
+
+
+def test_read_rules_frame_normalizes_actions_exactly():
+    frame = read_rules_frame(_parquet(pd.DataFrame({"name": ["a", "b", "c"], "action": ["🎭 Mask", "block", None]})), "r.parquet")
+    assert list(frame["action"]) == ["Mask", "Block", None]
+
+    with pytest.raises(ValueError, match="row\\(s\\) 2"):
+        read_rules_frame(_parquet(pd.DataFrame({"name": ["a", "b"], "action": ["Allow", "Disallow"]})), "r.parquet")
@@ -0,0 +1,79 @@
+from utilities.rule_model import Rule
+from utilities.rule_planner import build_plan, plan_script
+
+COLUMNS = ["id", "name", "SSN", "email", "region", "age", "vip", "role"]
+
+
+def _columns(connection, schema, table):
+    return COLUMNS
+
+
+def _rule(rule_id, action, condition, priority=10, **kw):
+    return Rule(id=rule_id, name=f"r{rule_id}", schema="dbo", table="Customers",
+                condition=condition, action=action, priority=priority, **kw)
+
+
+def test_mask_projects_only_listed_columns_in_the_view():
+    rule = _rule(1, "Mask", "ssn IS NOT NULL AND role = 'customer'", mask_columns="ssn")
+    (tp,) = build_plan([rule], columns_of=_columns)
+    assert list(tp.masks) == ["SSN"]
+    assert tp.sql == (
+        "CREATE OR ALTER VIEW [dbo].[Customers_enforced] AS\n"
+        "SELECT [id],\n       [name],\n"
+        "       CASE WHEN ([ssn] IS NOT NULL AND [role] = N'customer') THEN NULL ELSE [SSN] END AS [SSN],\n"
+        "       [email],\n       [region],\n       [age],\n       [vip],\n       [role]\n"
+        "FROM [dbo].[Customers];"
+    )
+
+
+def test_plan_never_updates_or_deletes_the_base_table():
+    rules = [_rule(1, "Mask", "1 = 1", mask_columns="email"), _rule(2, "Block", "region = 'EU'")]
+    script = plan_script(build_plan(rules, columns_of=_columns))
+    for word in ("UPDATE", "DELETE", "MERGE"):
+        assert word not in script
+
+
+def test_mask_without_columns_is_skipped_with_warning():
+    (tp,) = build_plan([_rule(1, "Mask", "ssn IS NOT NULL")], columns_of=_columns)
+    assert tp.sql is None
+    assert any("lists no columns" in w for w in tp.warnings)
+
+
+def test_unknown_mask_column_is_skipped_with_warning():
+    (tp,) = build_plan([_rule(1, "Mask", "", mask_columns="ssn, emial")], columns_of=_columns)
+    assert list(tp.masks) == ["SSN"]
+    assert any("emial" in w for w in tp.warnings)
+
+
+def test_masks_need_the_column_list():
+    (tp,) = build_plan([_rule(1, "Mask", "", mask_columns="ssn")], columns_of=lambda *a: None)
+    assert tp.sql is None
+    assert any("could not be read" in w for w in tp.warnings)
+
+
+def test_blocks_filter_a_view_without_a_column_lookup():
+    def no_lookup(*args):
+        raise AssertionError("block-only tables select *")
+
+    rules = [_rule(1, "Block", "region = 'EU'"), _rule(2, "Block", "age < 18")]
+    (tp,) = build_plan(rules, columns_of=no_lookup)
+    assert tp.sql == (
+        "CREATE OR ALTER VIEW [dbo].[Customers_enforced] AS\n"
+        "SELECT *\n"
+        "FROM [dbo].[Customers]\n"
+        "WHERE CASE WHEN ([region] = N'EU' OR [age] < 18) THEN 1 ELSE 0 END = 0;"
+    )
+
+
+def test_masks_and_blocks_share_one_statement_with_allow_precedence():
+    rules = [
+        _rule(1, "Allow", "vip = 1", priority=1),
+        _rule(2, "Block", "region = 'EU'", priority=5),
+        _rule(3, "Mask", "ssn IS NOT NULL", priority=10, mask_columns=["ssn", "email"]),
+    ]
+    (tp,) = build_plan(rules, columns_of=_columns)
+    assert tp.masks["email"] == "CASE WHEN [vip] = 1 THEN [email] WHEN [ssn] IS NOT NULL THEN NULL ELSE [email] END"
+    assert tp.sql.count("CREATE OR ALTER VIEW") == 1
+    assert "AS [email]" in tp.sql and "AS [SSN]" in tp.sql
+    assert tp.sql.endswith("WHERE CASE WHEN [vip] = 1 THEN 0 WHEN [region] = N'EU' THEN 1 ELSE 0 END = 0;")
+    assert plan_script([tp]).count("\nGO") == 1
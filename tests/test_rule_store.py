@@ -0,0 +1,95 @@
+import pytest
+
+from utilities.rule_model import Action, Rule
+from utilities.rule_search import get_rule_search_index
+from utilities.rule_stats import RuleStats, get_rule_stats
+from utilities.rule_store import DerivedView, RuleRepository, _SqliteConnector
+
+
+def _repo():
+    return RuleRepository(_SqliteConnector(":memory:"), "sqlite")
+
+
+def _rule(name, **kw):
+    return {"name": name, "schema": "dbo", "table": "T", "action": "Block", "priority": 1, **kw}
+
+
+def test_derived_view_requires_apply_and_rebuild():
+    class Partial(DerivedView):
+        def apply(self, event, rule_id, rule):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_stats_add_is_idempotent_for_a_tracked_id():
+    stats = RuleStats()
+    rule = Rule(id=1, name="a", schema="dbo", table="T", action="Block", priority=1)
+    stats.apply("add", 1, rule)
+    stats.apply("add", 1, rule)
+    assert stats.total == 1
+    assert stats.by("table") == {"T": 1}
+    assert [r.id for r in stats.recent()] == [1]
+
+
+def test_write_committed_before_rebuild_is_not_applied_twice():
+    repo = _repo()
+    stats = RuleStats()
+    # The write commits, a rebuild reads it, and only then is its notification delivered
+    rule_id = repo.add(_rule("a"))
+    stats.sync(repo)
+    stats.on_write("add", rule_id, repo.get(rule_id), repo.version())
+    assert stats.total == 1
+    assert stats.version == repo.version()
+
+
+def test_stats_track_writes_to_rules_counted_by_a_rebuild():
+    repo = _repo()
+    first = repo.add(_rule("a"))
+    second = repo.add(_rule("b", table="U"))
+    stats = get_rule_stats(repo)
+    # Both rules were counted by GROUP BY, so their previous buckets are not tracked per rule
+    repo.update(first, {"action": "Mask"})
+    repo.delete(second)
+    assert stats.total == 1
+    assert stats.by("table") == {"T": 1}
+    assert stats.by("action") == {Action.MASK: 1}
+    assert [r.id for r in stats.recent()] == [first]
+
+
+def test_sync_retries_when_a_write_lands_during_rebuild():
+    repo = _repo()
+    repo.add(_rule("a"))
+
+    class Racing(RuleStats):
+        raced = False
+
+        def rebuild(self, repo):
+            super().rebuild(repo)
+            if not self.raced:
+                self.raced = True
+                repo.add(_rule("b"))
+
+    stats = repo.view(Racing)
+    assert stats.total == 2
+    assert stats.version == repo.version()
+
+
+def test_views_are_scoped_to_one_connection():
+    repo = _repo()
+    repo.add(_rule("a", connection="prod"))
+    moved = repo.add(_rule("relocated", connection="prod"))
+    repo.add(_rule("c", connection="test"))
+    stats = get_rule_stats(repo, "prod")
+    assert stats.total == 2
+    assert get_rule_stats(repo).total == 3
+    assert repo.count(connection="prod") == 2
+    assert repo.count_by("connection") == {"prod": 2, "test": 1}
+
+    # Writes outside the scope are ignored, and a rule moved out of it leaves
+    repo.add(_rule("d", connection="test"))
+    repo.update(moved, {"connection": "test"})
+    assert stats.total == 1
+    assert get_rule_search_index(repo, "prod").search("relocated") == []
+    assert get_rule_search_index(repo, "test").search("relocated") == [moved]
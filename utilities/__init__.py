@@ -1,6 +1,23 @@
 """Utilities package: shared helpers for the Streamlit app.
 
 Contains:
-- nav_utils: sidebar/header rendering and navigation helpers
+- nav_utils: sidebar/header rendering, navigation and per-session connection holds
 - conn_manager: encrypted SQL Server connection manager (singleton)
+- conn_pool: pooled pyodbc connections keyed by saved connection name
+- conn_health: parallel reachability probes with latency reporting
+- conn_breaker: per-host circuit breaker that fails fast while a host is down
+- conn_tasks: shared background executor for connection attempts
+- conn_timing: ring buffer of timing spans with per-connection percentiles
+- conn_keepalive: background pings of the active connection (latency, uptime)
+- rule_model: slotted Rule record and the Action enum (Allow, Block, Mask)
+- rule_store: persistent, indexed rule repository (SQLite or SQL Server)
+- rule_condition: WHERE-clause compiler with cached ASTs and column validation
+- rule_export: streaming JSON/CSV/YAML writers backed by the export cache
+- rule_columnar: Parquet and Arrow IPC export/import with typed columns (pyarrow optional)
+- export_cache: bounded on-disk LRU of export files keyed by rule-set version
+- export_manifest: per-export manifests (watermark, rule hashes) and delta computation
+- rule_planner: set-based enforcement plan (one view per table) with explain
+- rule_conflicts: per-table index of overlapping, conflicting and shadowed rules
+- rule_search: inverted-index rule search with prefix and fuzzy matching
+- rule_stats: incrementally maintained rule counters and recency list
 """
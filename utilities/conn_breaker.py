@@ -0,0 +1,123 @@
+"""Per-host circuit breaker for SQL Server connection attempts.
+
+Provides:
+- HostCircuitBreaker: closed / open / half-open state per host with
+  exponential backoff and the last error cached while open
+- CircuitOpenError: raised instead of dialing a host that is known to be down
+- guarded_connect(host, connect): run a connect call through the shared breaker
+"""
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+DEFAULT_BASE_BACKOFF = 5.0  # seconds the breaker stays open after the first failure
+DEFAULT_MAX_BACKOFF = 300.0
+
+# SQLSTATEs that mean "could not reach the server", as opposed to e.g. a bad login (28000)
+CONNECTIVITY_SQLSTATES = {"08001", "08004", "08S01", "HYT00", "HYT01"}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a host's breaker is open and the attempt is rejected without dialing."""
+
+
+def is_connectivity_error(exc: BaseException) -> bool:
+    if isinstance(exc, (OSError, TimeoutError)):
+        return True
+    args = getattr(exc, "args", ())
+    return bool(args) and isinstance(args[0], str) and args[0] in CONNECTIVITY_SQLSTATES
+
+
+class HostCircuitBreaker:
+    """Tracks connect failures per host and short-circuits attempts while a host is down.
+
+    After a connectivity failure the host is *open* for a backoff that doubles
+    on each consecutive failure (capped at ``max_backoff``). Attempts during
+    that window fail immediately with the cached error. When the window ends,
+    exactly one caller is let through as a *half-open* probe; its success
+    closes the breaker, its failure re-opens it with a longer backoff.
+    """
+
+    def __init__(self, base_backoff: float = DEFAULT_BASE_BACKOFF, max_backoff: float = DEFAULT_MAX_BACKOFF) -> None:
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._hosts: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(host: str) -> str:
+        return (host or "").strip().lower()
+
+    def before_attempt(self, host: str) -> None:
+        """Raise CircuitOpenError if the host is open; otherwise allow the attempt."""
+        key = self._key(host)
+        with self._lock:
+            state = self._hosts.get(key)
+            if state is None:
+                return
+            now = time.monotonic()
+            if state["probing"] or now < state["open_until"]:
+                retry_in = max(1, math.ceil(state["open_until"] - now))
+                raise CircuitOpenError(
+                    f"{host} is unreachable (retrying in {retry_in}s). Last error: {state['last_error']}"
+                )
+            # Backoff elapsed: let this caller through as the half-open probe
+            state["probing"] = True
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            self._hosts.pop(self._key(host), None)
+
+    def record_failure(self, host: str, exc: BaseException) -> None:
+        if not is_connectivity_error(exc):
+            # The server answered (e.g. login failed), so the host itself is up
+            self.record_success(host)
+            return
+        key = self._key(host)
+        with self._lock:
+            state = self._hosts.get(key) or {"failures": 0}
+            state["failures"] += 1
+            backoff = min(self.max_backoff, self.base_backoff * (2 ** (state["failures"] - 1)))
+            state.update(open_until=time.monotonic() + backoff, last_error=str(exc), probing=False)
+            self._hosts[key] = state
+
+    def status(self, host: str) -> Optional[Dict]:
+        """Return {"failures", "retry_in", "last_error"} for an open host, else None."""
+        with self._lock:
+            state = self._hosts.get(self._key(host))
+            if state is None:
+                return None
+            return {
+                "failures": state["failures"],
+                "retry_in": max(0.0, state["open_until"] - time.monotonic()),
+                "last_error": state["last_error"],
+            }
+
+    def reset(self, host: Optional[str] = None) -> None:
+        with self._lock:
+            if host is None:
+                self._hosts.clear()
+            else:
+                self._hosts.pop(self._key(host), None)
+
+    def call(self, host: str, fn: Callable[[], T]) -> T:
+        self.before_attempt(host)
+        try:
+            result = fn()
+        except BaseException as e:
+            self.record_failure(host, e)
+            raise
+        self.record_success(host)
+        return result
+
+
+host_breaker = HostCircuitBreaker()
+
+
+def guarded_connect(host: str, connect: Callable[[], T]) -> T:
+    """Run ``connect`` through the process-wide breaker for ``host``."""
+    return host_breaker.call(host, connect)
@@ -0,0 +1,125 @@
+"""Parallel reachability checks for saved connections.
+
+Provides:
+- probe_connection(name): connect + SELECT 1 for one record, with timings
+- check_all_connections(): probe every saved record on a bounded thread pool
+- cached_health(): last results that are still within their TTL
+- test_connection_definitions(): test unsaved definitions (bulk import) in parallel
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utilities.conn_breaker import guarded_connect
+from utilities.conn_manager import get_connection, get_connection_string, list_connections, test_sql_server_connection
+from utilities.conn_timing import record as record_timing
+
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TTL = 60.0  # seconds a probe result is reused
+PROBE_TIMEOUT = 5  # pyodbc login timeout, matches test_sql_server_connection
+
+_results: Dict[str, Dict] = {}
+_results_lock = threading.Lock()
+
+
+def _error_class(exc: BaseException) -> str:
+    """Exception type plus SQLSTATE when pyodbc provides one, e.g. 'OperationalError (HYT00)'."""
+    name = type(exc).__name__
+    args = getattr(exc, "args", ())
+    if args and isinstance(args[0], str) and len(args[0]) == 5:
+        return f"{name} ({args[0]})"
+    return name
+
+
+def probe_connection(name: str) -> Dict:
+    """Open a fresh connection for a saved record and time the login and a SELECT 1."""
+    result: Dict = {
+        "name": name,
+        "ok": False,
+        "connect_ms": None,
+        "query_ms": None,
+        "error_class": None,
+        "error": None,
+        "checked_at": time.time(),
+    }
+    try:
+        import pyodbc
+
+        conn_str = get_connection_string(name)
+        if conn_str is None:
+            raise RuntimeError("Stored password is missing or invalid.")
+        host = (get_connection(name) or {}).get("host", "")
+        start = time.perf_counter()
+        conn = guarded_connect(host, lambda: pyodbc.connect(conn_str, timeout=PROBE_TIMEOUT))
+        result["connect_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        record_timing("login", name, result["connect_ms"])
+        try:
+            start = time.perf_counter()
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchone()
+            result["query_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            record_timing("probe", name, result["query_ms"])
+        finally:
+            conn.close()
+        result["ok"] = True
+    except Exception as e:
+        result["error_class"] = _error_class(e)
+        result["error"] = str(e)
+    return result
+
+
+def cached_health(ttl: float = DEFAULT_TTL) -> Dict[str, Dict]:
+    """Return probe results younger than ``ttl`` seconds, keyed by connection name."""
+    cutoff = time.time() - ttl
+    with _results_lock:
+        return {n: r for n, r in _results.items() if r["checked_at"] >= cutoff}
+
+
+def check_all_connections(
+    names: Optional[Iterable[str]] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    ttl: float = DEFAULT_TTL,
+    force: bool = False,
+) -> Dict[str, Dict]:
+    """Probe saved connections concurrently; fresh cached results are reused unless ``force``."""
+    if names is None:
+        names = [c.get("name") for c in list_connections() if c.get("name")]
+    names = list(names)
+    fresh = {} if force else cached_health(ttl)
+    pending = [n for n in names if n not in fresh]
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+            for result in pool.map(probe_connection, pending):
+                fresh[result["name"]] = result
+        with _results_lock:
+            for n in pending:
+                _results[n] = fresh[n]
+    return {n: fresh[n] for n in names}
+
+
+def forget(name: str) -> None:
+    """Drop the cached result for a connection (e.g. after it was edited or deleted)."""
+    with _results_lock:
+        _results.pop(name, None)
+
+
+def test_connection_definitions(records: List[Dict], max_workers: int = DEFAULT_MAX_WORKERS) -> Dict[str, Tuple[bool, str]]:
+    """Run test_sql_server_connection for unsaved definitions concurrently, keyed by name."""
+    if not records:
+        return {}
+
+    def _test(rec: Dict) -> Tuple[bool, str]:
+        return test_sql_server_connection(
+            str(rec.get("host") or ""),
+            str(rec.get("user") or ""),
+            str(rec.get("password") or ""),
+            str(rec.get("database") or ""),
+            name=str(rec.get("name") or "") or None,
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(records)))) as pool:
+        results = list(pool.map(_test, records))
+    return {str(rec.get("name") or f"row {i}"): res for i, (rec, res) in enumerate(zip(records, results), start=1)}
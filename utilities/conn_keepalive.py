@@ -0,0 +1,143 @@
+"""Background keepalive for the active connection.
+
+Provides:
+- start_keepalive(name, holder): ping the pooled connection on an interval and
+  register ``holder`` (a session ID) as a user of it (idempotent)
+- release_keepalive(name, holder): drop the holder; the last one stops pinging
+- keepalive_status(name): measured status, latency and uptime for the UI
+
+One daemon thread runs per connection name and is shared by every session
+using it; it stops when the last session releases it. Readers also renew a
+lease, and a keepalive nobody has looked at for LEASE_SECONDS stops on its
+own, so abandoned sessions that never release do not leak threads.
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Set
+
+from utilities.conn_pool import get_pool
+
+
+DEFAULT_INTERVAL = 30.0  # seconds between pings
+RECONNECT_ATTEMPTS = 3  # tries per tick before the connection counts as offline
+RECONNECT_BACKOFF = 1.0  # seconds, doubled between reconnect attempts
+LEASE_SECONDS = 600.0
+LATENCY_WINDOW = 20  # pings averaged for the reported latency
+
+
+class _KeepAlive(threading.Thread):
+    def __init__(self, name: str, interval: float) -> None:
+        super().__init__(name=f"keepalive-{name}", daemon=True)
+        self.conn_name = name
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.lease_until = time.monotonic() + LEASE_SECONDS
+        self.holders: Set[str] = set()  # guarded by _registry_lock
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._stats: Dict = {
+            "status": "starting",
+            "checks": 0,
+            "successes": 0,
+            "reconnects": 0,
+            "last_latency_ms": None,
+            "last_ok_at": None,
+            "last_error": None,
+            "started_at": time.time(),
+        }
+
+    def renew(self) -> None:
+        self.lease_until = time.monotonic() + LEASE_SECONDS
+
+    def stats(self) -> Dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["avg_latency_ms"] = round(sum(self._latencies) / len(self._latencies), 1) if self._latencies else None
+        out["uptime_pct"] = round(100.0 * out["successes"] / out["checks"], 2) if out["checks"] else None
+        return out
+
+    def _ping_once(self) -> float:
+        start = time.perf_counter()
+        # Checkout already validates with SELECT 1 and transparently replaces dead handles
+        with get_pool(self.conn_name).connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchone()
+            cur.close()
+        return (time.perf_counter() - start) * 1000
+
+    def _tick(self) -> None:
+        error: Optional[str] = None
+        for attempt in range(RECONNECT_ATTEMPTS):
+            try:
+                ms = self._ping_once()
+            except Exception as e:
+                error = str(e)
+                if self.stop_event.wait(RECONNECT_BACKOFF * (2 ** attempt)):
+                    return
+                continue
+            with self._lock:
+                self._stats["checks"] += 1
+                self._stats["successes"] += 1
+                self._stats["reconnects"] += 1 if attempt else 0
+                self._stats.update(status="degraded" if attempt else "online", last_latency_ms=round(ms, 1),
+                                   last_ok_at=time.time(), last_error=None)
+                self._latencies.append(ms)
+            return
+        with self._lock:
+            self._stats["checks"] += 1
+            self._stats.update(status="offline", last_error=error)
+
+    def run(self) -> None:
+        while not self.stop_event.is_set():
+            if time.monotonic() > self.lease_until:
+                break
+            self._tick()
+            self.stop_event.wait(self.interval)
+        with _registry_lock:
+            if _registry.get(self.conn_name) is self:
+                _registry.pop(self.conn_name, None)
+
+
+_registry: Dict[str, _KeepAlive] = {}
+_registry_lock = threading.Lock()
+
+
+def start_keepalive(name: str, holder: str, interval: float = DEFAULT_INTERVAL) -> None:
+    """Ensure a keepalive is running for ``name``, held by ``holder``, and renew its lease."""
+    if not name:
+        return
+    with _registry_lock:
+        ka = _registry.get(name)
+        if ka is not None and ka.is_alive() and not ka.stop_event.is_set():
+            ka.holders.add(holder)
+            ka.renew()
+            return
+        ka = _KeepAlive(name, interval)
+        ka.holders.add(holder)
+        _registry[name] = ka
+    ka.start()
+
+
+def release_keepalive(name: Optional[str], holder: str) -> None:
+    """Drop ``holder``'s claim on the keepalive for ``name``; stop it once nobody holds it."""
+    with _registry_lock:
+        ka = _registry.get(name) if name else None
+        if ka is None:
+            return
+        ka.holders.discard(holder)
+        if ka.holders:
+            return
+        _registry.pop(name, None)
+    ka.stop_event.set()
+
+
+def keepalive_status(name: Optional[str]) -> Optional[Dict]:
+    """Latest measured stats for ``name`` without any network call, or None if not running."""
+    with _registry_lock:
+        ka = _registry.get(name) if name else None
+    if ka is None:
+        return None
+    ka.renew()
+    return ka.stats()
@@ -2,8 +2,13 @@ import base64
 import getpass
 import json
 import os
+import tempfile
 import threading
-from typing import Dict, List, Optional, Tuple
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utilities.conn_breaker import guarded_connect
+from utilities.conn_timing import span
 
 
 # New secure storage under the user's roaming AppData (Windows)
@@ -26,6 +31,73 @@ def _appdata_dir() -> str:
 APP_DIR = _appdata_dir()
 KEY_DAT = os.path.join(APP_DIR, "key.dat")
 ENCRYPTED_CONNECTIONS_FILE = os.path.join(APP_DIR, "connections.enc")
+STORE_LOCK_FILE = ENCRYPTED_CONNECTIONS_FILE + ".lock"
+APP_CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.toml")
+DEFAULT_ODBC_DRIVER = "ODBC Driver 17 for SQL Server"
+STORE_FORMAT_VERSION = 2
+WRITE_RETRIES = 8
+
+
+class ConnectionStoreError(RuntimeError):
+    """connections.enc exists but cannot be read (corrupt file, or key.dat does not match it)."""
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """Write via a temp file in the same directory and rename over the target."""
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class _FileLock:
+    """Exclusive advisory lock on a sidecar file, shared by all processes using APP_DIR.
+
+    Only writers take it; readers rely on atomic renames and never block.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._fh = None
+
+    def __enter__(self) -> "_FileLock":
+        self._fh = open(self._path, "a+b")
+        if os.name == "nt":
+            import msvcrt
+            self._fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ~10s; keep waiting for the other writer
+                    continue
+        else:
+            import fcntl
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        try:
+            if os.name == "nt":
+                import msvcrt
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._fh.close()
+            self._fh = None
 
 
 class ConnectionManager:
@@ -34,7 +106,12 @@ class ConnectionManager:
     - Stores data under %APPDATA%\sampleapp (Windows)
     - Derives a Fernet key using Windows username + random salt (PBKDF2HMAC)
     - Persists key metadata in key.dat
-    - Encrypts the entire connections file (connections.enc) and each password
+    - Stores connections.enc in format v2: an encrypted index of names and
+      non-secret metadata plus one separately encrypted token per password
+    - Migrates v1 files (one Fernet blob over the whole map) on first read
+    - Keeps a decrypted in-memory snapshot, reloaded only when the file changes
+    - Serializes writers across processes with a lock file and a revision
+      counter in the store (optimistic concurrency with retry)
     - Provides list/get/save/delete/test helpers
     - Performs one-time migration from legacy files if present
     """
@@ -51,7 +128,16 @@ class ConnectionManager:
         self._hashes = hashes
         self._Fernet = Fernet
 
+        self._key_meta: Dict = {}
         self._fernet = self._init_fernet()
+        # Parsed snapshot of connections.enc, keyed by the file signature it was read from
+        self._cache: Optional[Dict[str, Dict]] = None
+        self._cache_sig: Optional[Tuple[int, int, int]] = None
+        self._cache_rev = 0
+        self._cache_error: Optional[str] = None
+        self._store_lock = threading.RLock()
+        # Compiled connection strings per record name (contain the decrypted password)
+        self._conn_strs: Dict[str, str] = {}
         # Attempt legacy migration once (best-effort)
         self._migrate_from_legacy_if_needed()
 
@@ -119,31 +205,168 @@ class ConnectionManager:
         return fernet_key, meta
 
     def _init_fernet(self):
-        key, _ = self._load_or_create_key()
+        key, meta = self._load_or_create_key()
+        self._key_meta = meta
         return self._Fernet(key)
 
+    def _update_key_meta(self, **fields) -> None:
+        """Merge fields into key.dat (atomically), preserving the stored key and salt."""
+        meta: Dict = {}
+        try:
+            with open(KEY_DAT, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except Exception:
+            meta = dict(self._key_meta)
+        meta.update(fields)
+        _atomic_write(KEY_DAT, json.dumps(meta, indent=2).encode("utf-8"))
+        self._key_meta.update(fields)
+
     # --- Storage helpers (encrypted file) ---
-    def _load_all(self) -> Dict[str, Dict]:
-        if not os.path.exists(ENCRYPTED_CONNECTIONS_FILE):
-            return {}
+    @staticmethod
+    def _file_signature() -> Optional[Tuple[int, int, int]]:
+        """Return (mtime_ns, size, inode) of connections.enc, or None if missing."""
+        try:
+            st = os.stat(ENCRYPTED_CONNECTIONS_FILE)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _read_file(self) -> Tuple[Dict[str, Dict], int]:
+        """Parse connections.enc into ({name: record}, revision).
+
+        Records keep enc_password as a token: only the v2 index is decrypted
+        here, passwords stay encrypted until decrypt_password() is called.
+        Raises ConnectionStoreError if the file is corrupt or was written with
+        another key.
+        """
         try:
             with open(ENCRYPTED_CONNECTIONS_FILE, "rb") as f:
-                token = f.read()
-            data_json = self._fernet.decrypt(token).decode("utf-8")
-            payload = json.loads(data_json)
-            if isinstance(payload, dict) and isinstance(payload.get("connections"), dict):
-                return payload["connections"]
-        except Exception:
-            # Corrupted or wrong key
-            return {}
+                raw = f.read()
+            if raw.lstrip().startswith(b"{"):
+                return self._parse_v2(json.loads(raw.decode("utf-8")))
+            items = self._parse_v1(raw)
+        except Exception as e:
+            raise ConnectionStoreError(
+                f"{ENCRYPTED_CONNECTIONS_FILE} cannot be read: the file is corrupt or key.dat does not match it "
+                f"({type(e).__name__}). Restore both files from a backup, or move connections.enc aside to start empty."
+            ) from e
+        if items:
+            # Rewrite v1 as v2 once; the existing per-password tokens are reused as-is
+            try:
+                with _FileLock(STORE_LOCK_FILE):
+                    if self._disk_revision() is None:
+                        self._write_file(items, 1)
+                        return items, 1
+            except Exception:
+                pass
+        return items, 0
+
+    def _parse_v1(self, token: bytes) -> Dict[str, Dict]:
+        payload = json.loads(self._fernet.decrypt(token).decode("utf-8"))
+        if isinstance(payload, dict) and isinstance(payload.get("connections"), dict):
+            return payload["connections"]
         return {}
 
-    def _save_all(self, items: Dict[str, Dict]) -> None:
-        payload = {"version": 1, "connections": items}
-        data = json.dumps(payload, indent=2).encode("utf-8")
-        token = self._fernet.encrypt(data)
-        with open(ENCRYPTED_CONNECTIONS_FILE, "wb") as f:
-            f.write(token)
+    def _parse_v2(self, doc: Dict) -> Tuple[Dict[str, Dict], int]:
+        if doc.get("format") != STORE_FORMAT_VERSION:
+            raise ValueError(f"unsupported store format {doc.get('format')!r}")
+        index = json.loads(self._fernet.decrypt(doc["index"].encode("utf-8")).decode("utf-8"))
+        secrets: List[Optional[str]] = doc.get("secrets", [])
+        items: Dict[str, Dict] = {}
+        for name, meta in index.items():
+            rec = {k: v for k, v in meta.items() if k != "slot"}
+            slot = meta.get("slot")
+            if isinstance(slot, int) and 0 <= slot < len(secrets) and secrets[slot]:
+                rec["enc_password"] = secrets[slot]
+            items[name] = rec
+        return items, int(doc.get("revision", 0))
+
+    @staticmethod
+    def _disk_revision() -> Optional[int]:
+        """Revision stamped in the v2 envelope (plain JSON, no decryption); 0 if absent, None if v1."""
+        try:
+            with open(ENCRYPTED_CONNECTIONS_FILE, "rb") as f:
+                raw = f.read()
+        except OSError:
+            return 0
+        if not raw.lstrip().startswith(b"{"):
+            return None
+        try:
+            return int(json.loads(raw.decode("utf-8")).get("revision", 0))
+        except Exception:
+            return None
+
+    def _write_file(self, items: Dict[str, Dict], revision: int) -> None:
+        index: Dict[str, Dict] = {}
+        secrets: List[str] = []
+        for name, rec in items.items():
+            meta = {k: v for k, v in rec.items() if k not in ("password", "enc_password")}
+            enc = rec.get("enc_password")
+            if enc:
+                meta["slot"] = len(secrets)
+                secrets.append(enc)
+            index[name] = meta
+        doc = {
+            "format": STORE_FORMAT_VERSION,
+            "revision": revision,
+            # Names and metadata are small; encrypt them as one token so hosts/users stay private
+            "index": self._fernet.encrypt(json.dumps(index).encode("utf-8")).decode("utf-8"),
+            "secrets": secrets,
+        }
+        with span("save_all"):
+            _atomic_write(ENCRYPTED_CONNECTIONS_FILE, json.dumps(doc, indent=2).encode("utf-8"))
+
+    def _load_all(self) -> Dict[str, Dict]:
+        """Return a shallow copy of the connection map.
+
+        The decrypted map is kept in memory and only re-read when the file's
+        mtime, size or inode changes (e.g. another process saved it). An
+        unreadable store lists as empty; writes refuse it (see _mutate).
+        """
+        with self._store_lock:
+            sig = self._file_signature()
+            if sig is None:
+                self._cache, self._cache_sig, self._cache_rev, self._cache_error = {}, None, 0, None
+            elif self._cache is None or sig != self._cache_sig:
+                with span("load_all"):
+                    try:
+                        self._cache, self._cache_rev = self._read_file()
+                        self._cache_error = None
+                    except ConnectionStoreError as e:
+                        self._cache, self._cache_rev, self._cache_error = {}, 0, str(e)
+                self._cache_sig = sig
+                self._conn_strs.clear()
+            return dict(self._cache)
+
+    def _mutate(self, change: Callable[[Dict[str, Dict]], bool]) -> None:
+        """Apply ``change`` to the current map and persist it if it returns True.
+
+        Writers hold the cross-process lock only for the compare-and-write.
+        If another process bumped the revision since our snapshot was read,
+        the snapshot is reloaded and ``change`` is re-applied. Raises
+        ConnectionStoreError at once if the store cannot be read, rather than
+        overwriting it or retrying against a revision that will never match.
+        """
+        for attempt in range(WRITE_RETRIES):
+            with self._store_lock:
+                items = self._load_all()
+                if self._cache_error:
+                    raise ConnectionStoreError(self._cache_error)
+                base_rev = self._cache_rev
+                if not change(items):
+                    return
+                with _FileLock(STORE_LOCK_FILE):
+                    if self._disk_revision() == base_rev:
+                        self._write_file(items, base_rev + 1)
+                        # Writes refresh the snapshot directly; no need to decrypt what we just wrote
+                        self._cache = dict(items)
+                        self._cache_rev = base_rev + 1
+                        self._cache_sig = self._file_signature()
+                        return
+                # Lost the race: force a reload before retrying
+                self._cache = None
+            time.sleep(0.01 * (2 ** attempt))
+        raise RuntimeError("Could not save connections: the store kept changing underneath this write")
 
     # --- Public operations ---
     def list(self) -> List[Dict]:
@@ -172,36 +395,129 @@ class ConnectionManager:
         database = (database or "").strip()
         if not (name and host and user and database):
             raise ValueError("name, host, user, and database are required")
-        items = self._load_all()
         enc_pw = self._fernet.encrypt(password.encode("utf-8")).decode("utf-8")
-        # Preserve created_date if updating, otherwise set new date
-        existing = items.get(name, {})
-        created_date = existing.get("created_date") or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        items[name] = {"host": host, "user": user, "database": database, "enc_password": enc_pw, "created_date": created_date}
-        self._save_all(items)
+
+        def _apply(items: Dict[str, Dict]) -> bool:
+            # Preserve created_date if updating, otherwise set new date
+            existing = items.get(name, {})
+            created_date = existing.get("created_date") or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            items[name] = {"host": host, "user": user, "database": database, "enc_password": enc_pw, "created_date": created_date}
+            return True
+
+        with self._store_lock, span("upsert", name):
+            self._mutate(_apply)
+            self._conn_strs.pop(name, None)
+
+    def bulk_upsert(self, records: List[Dict]) -> Dict[str, int]:
+        """Validate, encrypt and save many connections with a single store write.
+
+        Every record needs name, host, user, password and database. If any
+        record is invalid nothing is written and ValueError lists all problems.
+        Returns {"created": n, "updated": m}.
+        """
+        from datetime import datetime
+        cleaned: Dict[str, Dict] = {}
+        errors: List[str] = []
+        for i, raw in enumerate(records, start=1):
+            rec = {k: str(raw.get(k) or "").strip() for k in ("name", "host", "user", "database")}
+            password = str(raw.get("password") or "")
+            missing = [k for k in ("name", "host", "user", "database") if not rec[k]]
+            if not password:
+                missing.append("password")
+            if missing:
+                errors.append(f"row {i}: missing {', '.join(missing)}")
+            elif rec["name"] in cleaned:
+                errors.append(f"row {i}: duplicate name '{rec['name']}'")
+            else:
+                rec["password"] = password
+                cleaned[rec["name"]] = rec
+        if errors:
+            raise ValueError("Invalid connection definitions: " + "; ".join(errors))
+
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        encrypted = {
+            name: {
+                "host": rec["host"],
+                "user": rec["user"],
+                "database": rec["database"],
+                "enc_password": self._fernet.encrypt(rec["password"].encode("utf-8")).decode("utf-8"),
+            }
+            for name, rec in cleaned.items()
+        }
+        counts = {"created": 0, "updated": 0}
+
+        def _apply(items: Dict[str, Dict]) -> bool:
+            counts["created"] = counts["updated"] = 0
+            for name, rec in encrypted.items():
+                existing = items.get(name)
+                counts["updated" if existing else "created"] += 1
+                items[name] = {**rec, "created_date": (existing or {}).get("created_date") or now}
+            return bool(encrypted)
+
+        with self._store_lock:
+            self._mutate(_apply)
+            for name in encrypted:
+                self._conn_strs.pop(name, None)
+        return counts
+
+    def export(self, include_passwords: bool = False) -> List[Dict]:
+        """Connection definitions in the same shape bulk_upsert accepts (passwords optional)."""
+        out: List[Dict] = []
+        for name, rec in self._load_all().items():
+            row = {"name": name, "host": rec.get("host", ""), "user": rec.get("user", ""), "database": rec.get("database", "")}
+            if include_passwords:
+                row["password"] = self.decrypt_password(rec) or ""
+            out.append(row)
+        return out
 
     def delete(self, name: str) -> None:
-        items = self._load_all()
-        if name in items:
-            items.pop(name)
-            self._save_all(items)
+        with self._store_lock:
+            self._mutate(lambda items: items.pop(name, None) is not None)
+            self._conn_strs.pop(name, None)
 
     def decrypt_password(self, record: Dict) -> Optional[str]:
         enc = record.get("enc_password")
         if not enc:
             return None
         try:
-            return self._fernet.decrypt(enc.encode("utf-8")).decode("utf-8")
+            with span("decrypt_password", record.get("name")):
+                return self._fernet.decrypt(enc.encode("utf-8")).decode("utf-8")
         except Exception:
             return None
 
+    def connection_string(self, name: str) -> Optional[str]:
+        """Return the ODBC connection string for a saved record, built once and cached.
+
+        The entry is dropped on upsert/delete of that name and whenever the
+        store is reloaded from disk.
+        """
+        with self._store_lock:
+            cached = self._conn_strs.get(name)
+            if cached is not None and self._file_signature() == self._cache_sig:
+                return cached
+            rec = self.get(name)
+            if not rec:
+                return None
+            password = self.decrypt_password(rec)
+            if password is None:
+                return None
+            conn_str = build_connection_string(
+                resolve_odbc_driver(), rec.get("host", ""), rec.get("user", ""), password, rec.get("database", "")
+            )
+            self._conn_strs[name] = conn_str
+            return conn_str
+
     # --- Migration from legacy JSON files ---
     def _migrate_from_legacy_if_needed(self) -> None:
         """Best-effort one-time migration from project-local legacy files.
 
         Looks for connections.json and .conn_key.key next to this module.
-        If not found or unreadable, silently skips. Never raises.
+        If not found or unreadable, silently skips. Never raises. Once a
+        migration has run, key.dat records "legacy_migrated_at" and later
+        processes return before touching the legacy files or the store.
         """
+        if self._key_meta.get("legacy_migrated_at"):
+            return
         try:
             base_dir = os.path.dirname(os.path.dirname(__file__))  # project root
             legacy_json = os.path.join(base_dir, "connections.json")
@@ -230,9 +546,11 @@ class ConnectionManager:
             except Exception:
                 legacy_fernet = None
 
-            # Convert to new dict form and merge
+            # Convert to new dict form and merge; records already in the store win
             from datetime import datetime
-            new_items: Dict[str, Dict] = self._load_all()
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            existing = self._load_all()
+            legacy_items: Dict[str, Dict] = {}
             for it in legacy:
                 name = it.get("name")
                 host = it.get("host")
@@ -245,13 +563,25 @@ class ConnectionManager:
                         pw = None
                 if pw is None:
                     pw = it.get("password")
-                if name and host and user and pw:
+                if name and host and user and pw and name not in existing:
                     enc_pw = self._fernet.encrypt(pw.encode("utf-8")).decode("utf-8")
-                    created_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    new_items[name] = {"host": host, "user": user, "enc_password": enc_pw, "created_date": created_date}
+                    legacy_items[name] = {
+                        "host": host,
+                        "user": user,
+                        "database": it.get("database", ""),
+                        "enc_password": enc_pw,
+                        "created_date": it.get("created_date") or now,
+                    }
+
+            def _apply(items: Dict[str, Dict]) -> bool:
+                added = {k: v for k, v in legacy_items.items() if k not in items}
+                items.update(added)
+                return bool(added)
 
             # Persist and stop using legacy
-            self._save_all(new_items)
+            if legacy_items:
+                self._mutate(_apply)
+            self._update_key_meta(legacy_migrated_at=now)
         except Exception:
             # Never allow migration to break initialization
             return
@@ -278,11 +608,115 @@ def decrypt_password(record: Dict) -> Optional[str]:
     return _mgr().decrypt_password(record)
 
 
+def get_connection_string(name: str) -> Optional[str]:
+    return _mgr().connection_string(name)
+
+
 def delete_connection(name: str) -> None:
     _mgr().delete(name)
 
 
-def test_sql_server_connection(host: str, user: str, password: str, database: str) -> (bool, str):
+def import_connections(records: List[Dict]) -> Dict[str, int]:
+    return _mgr().bulk_upsert(records)
+
+
+def export_connections(include_passwords: bool = False) -> List[Dict]:
+    return _mgr().export(include_passwords)
+
+
+def parse_connection_definitions(data: bytes, filename: str) -> List[Dict]:
+    """Parse an uploaded CSV or JSON file of connection definitions into dicts."""
+    text = data.decode("utf-8-sig")
+    if filename.lower().endswith(".json"):
+        payload = json.loads(text)
+        if isinstance(payload, dict):
+            payload = payload.get("connections", [])
+        if not isinstance(payload, list) or not all(isinstance(r, dict) for r in payload):
+            raise ValueError("JSON must be a list of connection objects")
+        return payload
+    import csv
+    import io
+    return [dict(row) for row in csv.DictReader(io.StringIO(text))]
+
+
+_driver_lock = threading.Lock()
+_resolved_driver: Optional[str] = None
+
+
+# ((mtime_ns, size) of config.toml, parsed contents) from the last read
+_app_config: Optional[Tuple[Tuple[int, int], Dict]] = None
+
+
+def load_app_config() -> Dict:
+    """Parse the project's config.toml; returns {} if it is missing or unreadable.
+
+    The parsed file is cached and only re-read when its mtime or size
+    changes, so callers on every render pay one stat(). Treat the result as
+    read-only.
+    """
+    global _app_config
+    try:
+        stat = os.stat(APP_CONFIG_FILE)
+    except OSError:
+        return {}
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _app_config
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    config = _read_app_config()
+    _app_config = (stamp, config)
+    return config
+
+
+def _read_app_config() -> Dict:
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        try:
+            import tomli as tomllib
+        except ImportError:
+            return {}
+    try:
+        with open(APP_CONFIG_FILE, "rb") as f:
+            return tomllib.load(f)
+    except Exception:
+        return {}
+
+
+def _pinned_odbc_driver() -> Optional[str]:
+    """Driver preference from SAMPLEAPP_ODBC_DRIVER or [database].odbc_driver in config.toml."""
+    pinned = os.environ.get("SAMPLEAPP_ODBC_DRIVER", "").strip()
+    if pinned:
+        return pinned
+    return str(load_app_config().get("database", {}).get("odbc_driver", "")).strip() or None
+
+
+def resolve_odbc_driver() -> str:
+    """Return the SQL Server ODBC driver name, resolved once per process.
+
+    A pinned driver is used as-is; otherwise pyodbc.drivers() is enumerated a
+    single time and the newest "ODBC Driver NN for SQL Server" wins.
+    """
+    global _resolved_driver
+    if _resolved_driver is None:
+        with _driver_lock:
+            if _resolved_driver is None:
+                driver = _pinned_odbc_driver()
+                if not driver:
+                    import pyodbc
+                    drivers = [d for d in pyodbc.drivers() if "ODBC Driver" in d and "SQL Server" in d]
+                    driver = drivers[-1] if drivers else DEFAULT_ODBC_DRIVER
+                _resolved_driver = driver
+    return _resolved_driver
+
+
+def build_connection_string(driver: str, host: str, user: str, password: str, database: str) -> str:
+    return f"DRIVER={{{driver}}};SERVER={host};UID={user};PWD={password};DATABASE={database};"
+
+
+def test_sql_server_connection(host: str, user: str, password: str, database: str, name: Optional[str] = None) -> (bool, str):
+    """Open a connection and run SELECT 1; timing spans are labelled with ``name`` (or the host)."""
+    label = name or host
     try:
         import pyodbc
     except Exception:
@@ -291,18 +725,21 @@ def test_sql_server_connection(host: str, user: str, password: str, database: st
             "and ensure the appropriate SQL Server ODBC Driver is installed."
         )
 
-    drivers = [d for d in pyodbc.drivers() if "ODBC Driver" in d and "SQL Server" in d]
-    driver = drivers[-1] if drivers else "ODBC Driver 17 for SQL Server"
+    with span("driver_lookup", label):
+        driver = resolve_odbc_driver()
     if not database:
         return False, "Database name is required for all connections."
-    conn_str = (
-        f"DRIVER={{{driver}}};SERVER={host};UID={user};PWD={password};DATABASE={database};"
-    )
+    conn_str = build_connection_string(driver, host, user, password, database)
     try:
-        with pyodbc.connect(conn_str, timeout=5) as conn:
-            cur = conn.cursor()
-            cur.execute("SELECT 1")
-            cur.fetchone()
+        # Fails fast with the cached error while the host's circuit breaker is open.
+        # pyodbc does name resolution inside connect, so "login" includes DNS.
+        with span("login", label):
+            conn = guarded_connect(host, lambda: pyodbc.connect(conn_str, timeout=5))
+        with conn:
+            with span("probe", label):
+                cur = conn.cursor()
+                cur.execute("SELECT 1")
+                cur.fetchone()
         return True, f"Connected successfully using driver '{driver}'."
     except Exception as e:
         return False, f"Connection failed: {e}"
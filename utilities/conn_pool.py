@@ -0,0 +1,328 @@
+"""Pooled pyodbc connections keyed by saved connection name.
+
+Provides:
+- ConnectionPool: bounded pool with idle eviction and health check on checkout
+- warm_pool(name): open the minimum number of connections for a saved record
+- pooled_connection(name): context manager that borrows a live connection
+- hold_pool(name, holder) / release_pool(name, holder): reference-count a
+  pool per session; the last release closes it
+- close_pool(name) / close_all_pools(): release server-side sessions;
+  close_all_pools also runs when the server process exits
+"""
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from utilities.conn_breaker import guarded_connect
+from utilities.conn_manager import get_connection, get_connection_string
+from utilities.conn_timing import span
+
+
+DEFAULT_MIN_SIZE = 1
+DEFAULT_MAX_SIZE = 5
+DEFAULT_IDLE_TIMEOUT = 300.0  # seconds a surplus idle connection is kept
+DEFAULT_CHECKOUT_TIMEOUT = 10.0  # seconds to wait for a free slot
+CONNECT_TIMEOUT = 5  # pyodbc login timeout, matches test_sql_server_connection
+
+
+class ConnectionPool:
+    """Thread-safe pool of pyodbc connections for a single saved connection.
+
+    Connections are created lazily up to ``max_size``. Idle connections beyond
+    ``min_size`` are closed once they sit unused for ``idle_timeout`` seconds,
+    and every checkout is validated with ``SELECT 1`` so callers never receive
+    a handle the server already dropped.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connect: Callable[[], object],
+        min_size: int = DEFAULT_MIN_SIZE,
+        max_size: int = DEFAULT_MAX_SIZE,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ) -> None:
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self.name = name
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        # (connection, returned_at) pairs; most recently returned at the end
+        self._idle: List[Tuple[object, float]] = []
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    # --- Introspection ---
+    @property
+    def size(self) -> int:
+        with self._cond:
+            return len(self._idle) + self._in_use
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"idle": len(self._idle), "in_use": self._in_use, "max_size": self.max_size}
+
+    # --- Lifecycle ---
+    def warm(self) -> None:
+        """Open connections until ``min_size`` are available. Raises on connect failure."""
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle) + self._in_use >= max(self.min_size, 1):
+                    return
+                self._in_use += 1  # reserve the slot while connecting outside the lock
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+            self.release(conn)
+
+    def acquire(self, timeout: float = DEFAULT_CHECKOUT_TIMEOUT) -> object:
+        deadline = time.monotonic() + timeout
+        while True:
+            conn = None
+            reserved = True
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError(f"Connection pool '{self.name}' is closed")
+                evicted = self._evict_idle_locked()
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    self._in_use += 1
+                elif self._in_use < self.max_size:
+                    self._in_use += 1
+                else:
+                    reserved = False
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0:
+                        self._cond.wait(remaining)
+            # Closing evicted handles and other network work happens outside the lock
+            self._discard_all(evicted)
+            if not reserved:
+                if time.monotonic() >= deadline:
+                    raise RuntimeError(f"Connection pool '{self.name}' exhausted ({self.max_size} in use)")
+                continue
+            if conn is not None:
+                if self._is_healthy(conn):
+                    return conn
+                self._discard(conn)
+                with self._cond:
+                    self._in_use -= 1
+                continue
+            try:
+                return self._connect()
+            except Exception:
+                with self._cond:
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+
+    def release(self, conn: object, broken: bool = False) -> None:
+        if not broken:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+        with self._cond:
+            self._in_use -= 1
+            keep = not broken and not self._closed
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            evicted = self._evict_idle_locked()
+            self._cond.notify()
+        if not keep:
+            evicted.append(conn)
+        self._discard_all(evicted)
+
+    @contextmanager
+    def connection(self, timeout: float = DEFAULT_CHECKOUT_TIMEOUT) -> Iterator[object]:
+        """Borrow a connection; it is returned to the pool (or dropped if it failed)."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except Exception:
+            self.release(conn, broken=not self._is_healthy(conn))
+            raise
+        else:
+            self.release(conn)
+
+    def evict_idle(self) -> None:
+        with self._cond:
+            evicted = self._evict_idle_locked()
+        self._discard_all(evicted)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        self._discard_all(conn for conn, _ in idle)
+
+    # --- Internals ---
+    def _evict_idle_locked(self) -> List[object]:
+        """Drop expired surplus idle handles from the pool and return them.
+
+        Callers close the returned handles with _discard_all after releasing
+        the lock, so a slow close never blocks other checkouts.
+        """
+        if self.idle_timeout is None:
+            return []
+        cutoff = time.monotonic() - self.idle_timeout
+        surplus = len(self._idle) + self._in_use - self.min_size
+        keep: List[Tuple[object, float]] = []
+        evicted: List[object] = []
+        # Oldest first, so long-idle handles are the ones closed
+        for conn, returned_at in self._idle:
+            if surplus > 0 and returned_at < cutoff:
+                surplus -= 1
+                evicted.append(conn)
+            else:
+                keep.append((conn, returned_at))
+        self._idle = keep
+        return evicted
+
+    @staticmethod
+    def _is_healthy(conn: object) -> bool:
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchone()
+            cur.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _discard(conn: object) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @classmethod
+    def _discard_all(cls, conns: Iterable[object]) -> None:
+        for conn in conns:
+            cls._discard(conn)
+
+
+# --- Registry keyed by saved connection name ---
+_pools: Dict[str, Tuple[Tuple, ConnectionPool]] = {}
+# Sessions currently using each pool; guarded by _pools_lock
+_holders: Dict[str, Set[str]] = {}
+_pools_lock = threading.Lock()
+
+
+def _record_fingerprint(record: Dict) -> Tuple:
+    return (record.get("host"), record.get("user"), record.get("database"), record.get("enc_password"))
+
+
+def _connect_factory(name: str, host: str) -> Callable[[], object]:
+    import pyodbc
+
+    conn_str = get_connection_string(name)
+    if conn_str is None:
+        raise RuntimeError("Stored password is missing or invalid. Please re-save this connection.")
+
+    def _connect() -> object:
+        with span("pool_connect", name):
+            return guarded_connect(host, lambda: pyodbc.connect(conn_str, timeout=CONNECT_TIMEOUT))
+
+    return _connect
+
+
+def get_pool(name: str) -> ConnectionPool:
+    """Return the pool for a saved connection, rebuilding it if the record changed."""
+    record = get_connection(name)
+    if not record:
+        close_pool(name)
+        raise KeyError(f"Unknown connection '{name}'")
+    fingerprint = _record_fingerprint(record)
+    stale: Optional[ConnectionPool] = None
+    with _pools_lock:
+        entry = _pools.get(name)
+        if entry and entry[0] == fingerprint:
+            return entry[1]
+        if entry:
+            stale = entry[1]
+        pool = ConnectionPool(name, _connect_factory(name, record.get("host", "")))
+        _pools[name] = (fingerprint, pool)
+    if stale is not None:
+        stale.close()
+    return pool
+
+
+def warm_pool(name: str) -> (bool, str):
+    """Open the pool's minimum connections; returns (ok, message) like test_sql_server_connection."""
+    try:
+        import pyodbc  # noqa: F401
+    except Exception:
+        return False, (
+            "pyodbc is not installed. Please install it: pip install pyodbc, "
+            "and ensure the appropriate SQL Server ODBC Driver is installed."
+        )
+    try:
+        pool = get_pool(name)
+        pool.warm()
+        # Validate one pooled handle so a successful warm means the login works
+        with pool.connection():
+            pass
+        return True, f"Connected successfully ({pool.stats()['idle']} pooled connection(s))."
+    except Exception as e:
+        return False, f"Connection failed: {e}"
+
+
+@contextmanager
+def pooled_connection(name: str, timeout: float = DEFAULT_CHECKOUT_TIMEOUT) -> Iterator[object]:
+    """Borrow a live pyodbc connection for a saved connection name."""
+    with get_pool(name).connection(timeout) as conn:
+        yield conn
+
+
+def hold_pool(name: str, holder: str) -> None:
+    """Record that ``holder`` (a session ID) uses the pool for ``name``; idempotent per holder."""
+    with _pools_lock:
+        _holders.setdefault(name, set()).add(holder)
+
+
+def release_pool(name: Optional[str], holder: str) -> None:
+    """Drop ``holder``'s claim on ``name`` and close the pool once nobody else holds it."""
+    if not name:
+        return
+    with _pools_lock:
+        holders = _holders.get(name)
+        if holders:
+            holders.discard(holder)
+            if holders:
+                return
+        _holders.pop(name, None)
+        entry = _pools.pop(name, None)
+    if entry:
+        entry[1].close()
+
+
+def close_pool(name: str) -> None:
+    """Close the pool for ``name`` regardless of holders (e.g. the record is gone)."""
+    with _pools_lock:
+        entry = _pools.pop(name, None)
+    if entry:
+        entry[1].close()
+
+
+def close_all_pools() -> None:
+    with _pools_lock:
+        entries = list(_pools.values())
+        _pools.clear()
+        _holders.clear()
+    for _, pool in entries:
+        pool.close()
+
+
+# Log pooled sessions off cleanly when the Streamlit server shuts down
+atexit.register(close_all_pools)
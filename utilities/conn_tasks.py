@@ -0,0 +1,61 @@
+"""Shared background executor for connection attempts.
+
+Provides:
+- submit(fn, *args): run a blocking call (pyodbc login, pool warm-up) off the
+  Streamlit script thread and return its Future
+- new_task(...) / get_task(task_id) / pop_task(task_id): pending attempts held
+  in process memory, so session_state only ever stores the task ID
+- elapsed(task): seconds since a task dict created by the UI was started
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+MAX_WORKERS = 4
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Pending attempts by ID; payloads may hold credentials and never enter session_state
+_tasks: Dict[str, Dict] = {}
+_tasks_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="conn-task")
+    return _executor
+
+
+def submit(fn: Callable[..., Any], *args: Any) -> Future:
+    """Run ``fn(*args)`` on the process-wide connection executor."""
+    return _get_executor().submit(fn, *args)
+
+
+def new_task(kind: str, name: str, future: Future, **payload: Any) -> str:
+    """Register a pending attempt and return its ID; payload carries what the UI needs on completion."""
+    task_id = uuid.uuid4().hex
+    with _tasks_lock:
+        _tasks[task_id] = {"id": task_id, "kind": kind, "name": name, "future": future,
+                           "started": time.monotonic(), **payload}
+    return task_id
+
+
+def get_task(task_id: Optional[str]) -> Optional[Dict]:
+    with _tasks_lock:
+        return _tasks.get(task_id) if task_id else None
+
+
+def pop_task(task_id: Optional[str]) -> Optional[Dict]:
+    with _tasks_lock:
+        return _tasks.pop(task_id, None) if task_id else None
+
+
+def elapsed(task: Dict) -> float:
+    return time.monotonic() - task.get("started", time.monotonic())
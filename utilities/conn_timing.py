@@ -0,0 +1,89 @@
+"""Timing spans for connection and store operations.
+
+Provides:
+- span(op, name): context manager that records how long a phase took
+- summary(): p50/p95/p99 per (connection name, operation)
+- recent_slow(): latest spans above a latency threshold
+
+Spans live in a bounded in-memory ring buffer, so recording is O(1) and
+memory stays flat no matter how long the process runs.
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional
+
+
+BUFFER_SIZE = 5000
+STORE_LABEL = "(store)"
+
+_spans: Deque[Dict] = deque(maxlen=BUFFER_SIZE)
+_spans_lock = threading.Lock()
+
+
+def record(op: str, name: Optional[str], ms: float, ok: bool = True) -> None:
+    with _spans_lock:
+        _spans.append({"op": op, "name": name or STORE_LABEL, "ms": ms, "ok": ok, "ts": time.time()})
+
+
+@contextmanager
+def span(op: str, name: Optional[str] = None) -> Iterator[None]:
+    """Time the enclosed block as ``op`` for connection ``name`` (store-wide if None)."""
+    start = time.perf_counter()
+    ok = True
+    try:
+        yield
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        record(op, name, (time.perf_counter() - start) * 1000, ok)
+
+
+def _percentile(sorted_ms: List[float], pct: float) -> float:
+    # Nearest-rank percentile; the buffer is small enough that sorting per call is fine
+    return sorted_ms[max(0, math.ceil(pct / 100 * len(sorted_ms)) - 1)]
+
+
+def snapshot() -> List[Dict]:
+    with _spans_lock:
+        return list(_spans)
+
+
+def summary(name: Optional[str] = None) -> List[Dict]:
+    """Return rows of {name, op, count, p50, p95, p99, errors}, optionally for one connection."""
+    groups: Dict[tuple, List[Dict]] = {}
+    for s in snapshot():
+        if name is None or s["name"] == name:
+            groups.setdefault((s["name"], s["op"]), []).append(s)
+    rows: List[Dict] = []
+    for (conn_name, op), spans in sorted(groups.items()):
+        ms = sorted(s["ms"] for s in spans)
+        rows.append({
+            "name": conn_name,
+            "op": op,
+            "count": len(ms),
+            "p50": round(_percentile(ms, 50), 2),
+            "p95": round(_percentile(ms, 95), 2),
+            "p99": round(_percentile(ms, 99), 2),
+            "errors": sum(1 for s in spans if not s["ok"]),
+        })
+    return rows
+
+
+def recent_slow(threshold_ms: float = 500.0, limit: int = 20) -> List[Dict]:
+    """Most recent spans slower than ``threshold_ms``, newest first."""
+    out: List[Dict] = []
+    for s in reversed(snapshot()):
+        if s["ms"] >= threshold_ms:
+            out.append(s)
+            if len(out) >= limit:
+                break
+    return out
+
+
+def clear() -> None:
+    with _spans_lock:
+        _spans.clear()
@@ -0,0 +1,129 @@
+"""Content-addressed, bounded on-disk cache of export files.
+
+Provides:
+- export_key(repo, fmt, options): digest of (rule-set version, format, options)
+- cached_export(key): metadata of a cached file, or None
+- store_export(key, build, suffix): build a file once and keep it
+- evict(): trim the cache to the configured [exports] budget
+
+Keys change whenever the rule store version does (every write bumps it),
+so entries never need invalidating; they simply stop being requested and
+age out. Recency is tracked with file mtimes, which makes the LRU shared
+by every process using the same APP_DIR.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, Optional
+
+from utilities.conn_manager import APP_DIR, load_app_config
+
+
+CACHE_DIR = os.path.join(APP_DIR, "exports", "cache")
+DEFAULT_CACHE_MB = 256
+DEFAULT_CACHE_ENTRIES = 32
+
+_lock = threading.Lock()
+
+
+def _limits() -> (int, int):
+    cfg = load_app_config().get("exports", {})
+    try:
+        max_bytes = int(float(cfg.get("cache_mb", DEFAULT_CACHE_MB)) * 1024 * 1024)
+        max_entries = int(cfg.get("cache_entries", DEFAULT_CACHE_ENTRIES))
+    except (TypeError, ValueError):
+        max_bytes, max_entries = DEFAULT_CACHE_MB * 1024 * 1024, DEFAULT_CACHE_ENTRIES
+    return max_bytes, max(1, max_entries)
+
+
+def export_key(repo, fmt: str, options: Optional[Dict] = None) -> str:
+    state = {"store": repo.store_id, "version": repo.version(), "format": fmt, "options": options or {}}
+    return hashlib.sha256(json.dumps(state, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _meta_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.meta.json")
+
+
+def cached_export(key: str) -> Optional[Dict]:
+    """{"path", "bytes", ...build metadata} for ``key``, marking it recently used; None on a miss."""
+    try:
+        with open(_meta_path(key), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        os.utime(meta["path"])
+    except (OSError, ValueError, KeyError):
+        return None
+    return meta
+
+
+def store_export(key: str, build: Callable[[str], Dict], suffix: str = "") -> Dict:
+    """Return the cached entry for ``key``, calling ``build(path)`` to write it on a miss.
+
+    ``build`` writes the file at ``path`` and returns metadata (e.g. row count)
+    that is kept alongside it.
+    """
+    meta = cached_export(key)
+    if meta is not None:
+        return meta
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".build-", suffix=suffix, dir=CACHE_DIR)
+    os.close(fd)
+    try:
+        info = build(tmp) or {}
+        path = os.path.join(CACHE_DIR, key + suffix)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    meta = dict(info, path=path, bytes=os.path.getsize(path))
+    fd, tmp_meta = tempfile.mkstemp(prefix=".meta-", dir=CACHE_DIR)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, _meta_path(key))
+    evict(keep=key)
+    return meta
+
+
+def evict(keep: Optional[str] = None) -> None:
+    """Drop least recently used entries until the cache fits its byte and entry budget."""
+    max_bytes, max_entries = _limits()
+    with _lock:
+        entries = []
+        try:
+            names = os.listdir(CACHE_DIR)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(".meta.json"):
+                continue
+            key = name[: -len(".meta.json")]
+            try:
+                with open(os.path.join(CACHE_DIR, name), "r", encoding="utf-8") as f:
+                    path = json.load(f)["path"]
+                stat = os.stat(path)
+            except (OSError, ValueError, KeyError):
+                _remove_entry(key, None)
+                continue
+            entries.append((stat.st_mtime, key, path, stat.st_size))
+        entries.sort()
+        total = sum(e[3] for e in entries)
+        while entries and (total > max_bytes or len(entries) > max_entries):
+            _, key, path, size = entries.pop(0)
+            if key == keep:
+                continue
+            _remove_entry(key, path)
+            total -= size
+
+
+def _remove_entry(key: str, path: Optional[str]) -> None:
+    for p in (_meta_path(key), path):
+        if p:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
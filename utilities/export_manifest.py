@@ -0,0 +1,185 @@
+"""Export manifests and delta computation.
+
+Provides:
+- ManifestRecorder: taps the row batches of an export, hashing each rule,
+  and saves a manifest once the export file is complete
+- list_manifests() / load_manifest(manifest_id): recorded exports, newest first
+- compute_delta(repo, manifest_id, **scope): rules added, changed or deleted
+  since a manifest, plus the state hashes for the manifest of the delta itself
+- row_hashes(cols, rows): content hash of each raw row's user-editable
+  columns, keyed by rule ID
+
+A manifest stores a watermark (the store version read before the export
+started) and a content hash per rule. Deltas read only rules whose
+row_version is above the watermark, drop those whose hash did not change,
+and find deletes by comparing the manifest's IDs with the store's. Store
+versions are handed out under the store's write lock, so a writer that
+commits late still lands above the watermark; manifests from before row
+versions existed fall back to comparing every rule.
+Every manifest, full or delta, describes the complete rule set of its scope
+(e.g. one connection's rules) at its time, so deltas can be chained.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utilities.conn_manager import APP_DIR
+from utilities.rule_model import Rule
+from utilities.rule_store import COLUMNS, rules_from_rows
+
+
+MANIFEST_DIR = os.path.join(APP_DIR, "exports", "manifests")
+MAX_MANIFESTS = 50
+HASHED_COLUMNS = tuple(COLUMNS.values())  # stored values; timestamps excluded
+
+
+def row_hashes(cols: List[str], rows: List[tuple]) -> Dict[int, str]:
+    """{rule ID: content hash} for one raw batch from RuleRepository.iter_rows / iter_changed.
+
+    Works on stored values (canonical action names) so no Rule objects are
+    built while a full export streams past.
+    """
+    id_idx = cols.index("id")
+    idx = [cols.index(c) for c in HASHED_COLUMNS]
+    out = {}
+    for row in rows:
+        # repr of str/int/float/None values is stable across runs and platforms
+        payload = repr([row[i] for i in idx]).encode("utf-8")
+        out[int(row[id_idx])] = hashlib.blake2b(payload, digest_size=16).hexdigest()
+    return out
+
+
+def _paths(manifest_id: str) -> Tuple[str, str]:
+    base = os.path.join(MANIFEST_DIR, manifest_id)
+    return base + ".json", base + ".hashes.json"
+
+
+def _write_json(path: str, payload) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=MANIFEST_DIR)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def save_manifest(summary: Dict, hashes: Dict[int, str]) -> str:
+    """Persist a manifest; returns its ID (sortable by creation time)."""
+    os.makedirs(MANIFEST_DIR, exist_ok=True)
+    manifest_id = time.strftime("%Y%m%dT%H%M%S", time.gmtime(summary["created_at"])) + "-" + uuid.uuid4().hex[:8]
+    summary = dict(summary, id=manifest_id, rules=len(hashes))
+    summary_path, hashes_path = _paths(manifest_id)
+    # Hashes first: a summary without its hashes is never visible
+    _write_json(hashes_path, {str(k): v for k, v in hashes.items()})
+    _write_json(summary_path, summary)
+    _prune()
+    return manifest_id
+
+
+def _prune() -> None:
+    for manifest in list_manifests()[MAX_MANIFESTS:]:
+        for path in _paths(manifest["id"]):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def list_manifests() -> List[Dict]:
+    """Manifest summaries (no hashes), newest first."""
+    try:
+        names = os.listdir(MANIFEST_DIR)
+    except OSError:
+        return []
+    out = []
+    for name in names:
+        if not name.endswith(".json") or name.endswith(".hashes.json") or name.startswith("."):
+            continue
+        try:
+            with open(os.path.join(MANIFEST_DIR, name), "r", encoding="utf-8") as f:
+                out.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(out, key=lambda m: m.get("id", ""), reverse=True)
+
+
+def load_manifest(manifest_id: str) -> Dict:
+    """Summary plus {"hashes": {rule_id: hash}}; raises ValueError if it is missing or unreadable."""
+    summary_path, hashes_path = _paths(os.path.basename(manifest_id))
+    try:
+        with open(summary_path, "r", encoding="utf-8") as f:
+            summary = json.load(f)
+        with open(hashes_path, "r", encoding="utf-8") as f:
+            summary["hashes"] = {int(k): v for k, v in json.load(f).items()}
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Export manifest '{manifest_id}' is not available: {e}")
+    return summary
+
+
+class ManifestRecorder:
+    """Collects rule hashes from an export's row batches, then saves the manifest."""
+
+    def __init__(self, repo, scope: Optional[Dict] = None) -> None:
+        self.repo = repo
+        self.scope = dict(scope or {})  # repository filters the export was taken with
+        self.hashes: Dict[int, str] = {}
+        self.created_at = time.time()
+        # Taken before reading, so writes racing the export land above the watermark
+        self.watermark = {"row_version": repo.version()}
+
+    def tap(self, batches: Iterable[Tuple[List[str], List[tuple]]]) -> Iterator[Tuple[List[str], List[tuple]]]:
+        for cols, rows in batches:
+            self.hashes.update(row_hashes(cols, rows))
+            yield cols, rows
+
+    def save(self, fmt: str, kind: str = "full", base: Optional[str] = None, **extra) -> str:
+        summary = {
+            "created_at": self.created_at,
+            "kind": kind,
+            "base": base,
+            "format": fmt,
+            "store": self.repo.store_id,
+            "scope": self.scope,
+            "watermark": self.watermark,
+        }
+        summary.update(extra)
+        return save_manifest(summary, self.hashes)
+
+
+def compute_delta(repo, manifest_id: str, **scope) -> Tuple[List[Tuple[str, Rule]], List[int], ManifestRecorder]:
+    """(upserts as ("add" | "change", rule), deleted IDs, recorder holding the new state).
+
+    ``scope`` holds the repository filters (e.g. connection) the base
+    manifest was recorded with; a rule that left the scope counts as deleted.
+    Cost is one indexed scan of changed rules plus an ID-only scan for deletes.
+    """
+    base = load_manifest(manifest_id)
+    if base.get("store") not in (None, repo.store_id):
+        raise ValueError(f"Manifest '{manifest_id}' was recorded for a different rule store")
+    if (base.get("scope") or {}) != scope:
+        raise ValueError(f"Manifest '{manifest_id}' was recorded for a different connection")
+    hashes = base["hashes"]
+    wm = base["watermark"]
+    recorder = ManifestRecorder(repo, scope)
+    recorder.hashes = dict(hashes)
+    if wm.get("row_version") is not None:
+        changed = repo.iter_changed(wm["row_version"], **scope)
+    else:
+        # Manifests from before row versions: compare every rule by hash
+        changed = repo.iter_rows(**scope)
+
+    upserts: List[Tuple[str, Rule]] = []
+    for cols, rows in recorder.tap(changed):
+        for rule in rules_from_rows(cols, rows):
+            old = hashes.get(rule.id)
+            if old is None:
+                upserts.append(("add", rule))
+            elif old != recorder.hashes[rule.id]:
+                upserts.append(("change", rule))
+    current = set(repo.ids(**scope))
+    deleted = sorted(i for i in hashes if i not in current)
+    for rule_id in deleted:
+        recorder.hashes.pop(rule_id, None)
+    return upserts, deleted, recorder
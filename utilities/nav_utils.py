@@ -3,9 +3,18 @@
 Provides:
 - render_header_enhanced(): responsive top bar with connection status
 - get_connection_status(): returns connection status info
+- session_holder(): stable ID of this browser session
+- activate_connection(name) / release_connection(name): take and drop this
+  session's hold on the shared pool and keepalive for a connection
 """
+import uuid
+from typing import Optional
+
 import streamlit as st
 
+from utilities.conn_keepalive import release_keepalive, start_keepalive
+from utilities.conn_pool import hold_pool, release_pool
+
 
 def render_header_enhanced(title: str = "Enterprise Rule Manager") -> None:
     """Render a professional top header with connection status badge."""
@@ -90,3 +99,32 @@ def render_metric_card(title: str, value: str, icon: str = "📊", color: str =
         unsafe_allow_html=True,
     )
 
+
+
+def session_holder() -> str:
+    """ID of this browser session, used to reference-count shared pools and keepalives."""
+    if "session_holder" not in st.session_state:
+        st.session_state["session_holder"] = uuid.uuid4().hex
+    return st.session_state["session_holder"]
+
+
+def activate_connection(name: str) -> None:
+    """Make ``name`` this session's active connection and hold its pool and keepalive.
+
+    Switching connections releases the previous one, so its pool is closed
+    once no other session holds it.
+    """
+    holder = session_holder()
+    previous = st.session_state.get("active_connection")
+    hold_pool(name, holder)
+    start_keepalive(name, holder)
+    st.session_state["active_connection"] = name
+    if previous and previous != name:
+        release_connection(previous)
+
+
+def release_connection(name: Optional[str]) -> None:
+    """Drop this session's hold on ``name``; the pool and keepalive close once no session holds them."""
+    holder = session_holder()
+    release_keepalive(name, holder)
+    release_pool(name, holder)
@@ -0,0 +1,208 @@
+"""Columnar (Parquet / Arrow IPC) rule export and import.
+
+Provides:
+- arrow_schema(): typed Arrow schema for rules (action enum, integer
+  priority, dictionary-encoded schema/table/connection, UTC timestamps)
+- write_parquet(batches, sink) / write_arrow(batches, sink): stream
+  RuleRepository.iter_rows batches into a Parquet file (one row group per
+  batch) or an Arrow IPC file; ``sink`` is a path or binary file object
+- read_rules_frame(data, filename): load an uploaded Parquet/Arrow file
+  into a normalized DataFrame, vectorized
+- import_rules_frame(repo, df): bulk-insert the frame's rules as new rules
+
+pyarrow is optional and imported lazily; every entry point raises
+ImportError when it is missing so pages can show an install hint.
+"""
+import io
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from utilities.rule_model import ACTION_ALIASES, Action, parse_columns
+
+
+ACTION_NAMES: List[str] = [a.title for a in sorted(Action)]  # dictionary order = Action value - 1
+BATCH_SIZE = 10000  # rules per record batch / Parquet row group
+
+# Rule key -> DB column as returned by RuleRepository.iter_rows
+_DB_COLUMNS: Dict[str, str] = {
+    "id": "id",
+    "name": "name",
+    "schema": "schema_name",
+    "table": "table_name",
+    "condition": "condition",
+    "action": "action",
+    "mask_columns": "mask_columns",
+    "priority": "priority",
+    "connection": "connection",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+IMPORT_COLUMNS = ("name", "schema", "table", "condition", "action", "mask_columns", "priority", "connection")
+
+
+def _pa():
+    import pyarrow as pa  # optional dependency
+    return pa
+
+
+def arrow_schema():
+    pa = _pa()
+    dict_str = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        pa.field("id", pa.int64(), nullable=False),
+        pa.field("name", pa.string(), nullable=False),
+        pa.field("schema", dict_str),
+        pa.field("table", dict_str),
+        pa.field("condition", pa.string()),
+        pa.field("action", pa.dictionary(pa.int8(), pa.string())),
+        pa.field("mask_columns", pa.string()),
+        pa.field("priority", pa.int32()),
+        pa.field("connection", dict_str),
+        pa.field("created_at", pa.timestamp("us", tz="UTC")),
+        pa.field("updated_at", pa.timestamp("us", tz="UTC")),
+    ])
+
+
+class _Dictionaries:
+    """Dictionary values per field, only ever appended to across batches.
+
+    Each batch's dictionary then extends the previous one, which is what the
+    Arrow IPC file format needs (it accepts deltas but not replacements).
+    """
+
+    def __init__(self) -> None:
+        self.values: Dict[str, pd.Index] = {}
+
+    def encode(self, field: str, col: pd.Series):
+        pa = _pa()
+        known = self.values.get(field, pd.Index([], dtype="object"))
+        new = pd.Index(col.dropna().unique()).difference(known, sort=False)
+        if len(new):
+            known = known.append(new)
+            self.values[field] = known
+        codes = pd.Categorical(col, categories=known).codes.astype("int32")
+        return pa.DictionaryArray.from_arrays(
+            pa.array(codes, mask=codes < 0, type=pa.int32()), pa.array(known.astype(str), pa.string()))
+
+
+def _batch(cols: List[str], rows: List[tuple], dicts: _Dictionaries):
+    """One repository row batch as a typed RecordBatch, built column-wise."""
+    pa = _pa()
+    schema = arrow_schema()
+    df = pd.DataFrame.from_records(rows, columns=cols)
+    codes = pd.Categorical(df["action"], categories=ACTION_NAMES).codes.astype("int8")
+    arrays = []
+    for field in schema:
+        col = df[_DB_COLUMNS[field.name]]
+        if field.name == "action":
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array(codes, mask=codes < 0, type=pa.int8()), pa.array(ACTION_NAMES, pa.string())))
+        elif field.name in ("created_at", "updated_at"):
+            # Epoch seconds (REAL) -> whole microseconds
+            micros = (pd.to_numeric(col, errors="coerce") * 1_000_000).round().astype("Int64")
+            arrays.append(pa.array(micros, type=pa.int64()).cast(field.type))
+        elif field.name in ("id", "priority"):
+            arrays.append(pa.array(pd.array(col, dtype="Int64"), type=field.type))
+        elif pa.types.is_dictionary(field.type):
+            arrays.append(dicts.encode(field.name, col))
+        else:
+            arrays.append(pa.array(col, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_parquet(batches: Iterable[Tuple[List[str], List[tuple]]], sink) -> int:
+    """Write row batches as Parquet; returns the number of rules written."""
+    import pyarrow.parquet as pq  # optional dependency
+    rows = 0
+    dicts = _Dictionaries()
+    with pq.ParquetWriter(sink, arrow_schema(), compression="zstd") as writer:
+        for cols, batch in batches:
+            writer.write_batch(_batch(cols, batch, dicts))
+            rows += len(batch)
+    return rows
+
+
+def write_arrow(batches: Iterable[Tuple[List[str], List[tuple]]], sink) -> int:
+    """Write row batches as an Arrow IPC file; returns the number of rules written."""
+    pa = _pa()
+    rows = 0
+    dicts = _Dictionaries()
+    options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+    with pa.ipc.new_file(sink, arrow_schema(), options=options) as writer:
+        for cols, batch in batches:
+            writer.write_batch(_batch(cols, batch, dicts))
+            rows += len(batch)
+    return rows
+
+
+def preview_frame(repo, n: int = 5, **filters) -> pd.DataFrame:
+    """The first ``n`` rules as they will appear in a columnar export (typed columns)."""
+    pa = _pa()
+    for cols, batch in repo.iter_rows(n, **filters):
+        return pa.Table.from_batches([_batch(cols, batch, _Dictionaries())]).to_pandas()
+    return pd.DataFrame(columns=arrow_schema().names)
+
+
+def read_rules_frame(data: bytes, filename: str) -> pd.DataFrame:
+    """Parse an uploaded .parquet or .arrow/.feather file into import-ready columns.
+
+    Actions may be the enum dictionary, names or UI labels; they are
+    normalized to canonical names. Raises ValueError for unusable files.
+    """
+    pa = _pa()
+    if filename.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        table = pq.read_table(io.BytesIO(data))
+    else:
+        try:
+            table = pa.ipc.open_file(pa.BufferReader(data)).read_all()
+        except pa.ArrowInvalid:
+            table = pa.ipc.open_stream(pa.BufferReader(data)).read_all()
+    if "name" not in table.column_names:
+        raise ValueError("The file has no 'name' column")
+    df = table.to_pandas()
+    out = pd.DataFrame(index=df.index)
+    for key in IMPORT_COLUMNS:
+        out[key] = df[key].astype("object") if key in df.columns else None
+
+    # Vectorized normalization: the same exact spellings Action.parse accepts ("✅ Allow", "allow", ...)
+    raw_action = out["action"].astype("string").str.strip().str.upper().replace("", pd.NA)
+    action = raw_action.map({text: a.title for text, a in ACTION_ALIASES.items()}).astype("string")
+    bad_action = raw_action.notna() & action.isna()
+    if bad_action.any():
+        rows = ", ".join(str(i + 1) for i in df.index[bad_action][:10])
+        raise ValueError(f"Unknown action in row(s) {rows}")
+    out["action"] = action.astype("object").where(action.notna(), None)
+
+    priority = pd.to_numeric(out["priority"], errors="coerce")
+    bad_priority = out["priority"].notna() & priority.isna()
+    if bad_priority.any():
+        rows = ", ".join(str(i + 1) for i in df.index[bad_priority][:10])
+        raise ValueError(f"Priority must be an integer in row(s) {rows}")
+    out["priority"] = priority.astype("Int64").astype("object").where(priority.notna(), None)
+
+    names = out["name"].astype("string").str.strip()
+    if (names.isna() | (names == "")).any():
+        rows = ", ".join(str(i + 1) for i in df.index[names.isna() | (names == "")][:10])
+        raise ValueError(f"Rule name is required in row(s) {rows}")
+    out["name"] = names.astype("object")
+    for key in ("schema", "table", "condition", "mask_columns", "connection"):
+        out[key] = out[key].where(out[key].notna(), None)
+    masks = out["mask_columns"].notna()
+    if masks.any():
+        out.loc[masks, "mask_columns"] = out.loc[masks, "mask_columns"].map(lambda v: ", ".join(parse_columns(v)) or None)
+    return out
+
+
+def import_rules_frame(repo, df: pd.DataFrame, connection: Optional[str] = None) -> int:
+    """Add every row of a frame from read_rules_frame as a new rule; returns how many were added.
+
+    Rows without a connection are assigned ``connection`` (the importing
+    session's). The frame's column arrays go to the store as they are (one
+    executemany), so no per-row dicts or Rule objects are built.
+    """
+    columns = {key: df[key].tolist() for key in IMPORT_COLUMNS}
+    if connection:
+        columns["connection"] = [c if c is not None else connection for c in columns["connection"]]
+    return repo.add_columns(columns)
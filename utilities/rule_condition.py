@@ -0,0 +1,631 @@
+"""Compiler for rule conditions (the SQL WHERE clause of a rule).
+
+Provides:
+- compile_condition(text): parse a condition into a cached CompiledCondition
+  (AST, referenced columns, canonical SQL)
+- ConditionError: syntax error with the character offset it was found at
+- UnsupportedConditionError: valid T-SQL the subset deliberately leaves out
+  (subqueries, CASE, COLLATE, variables, ...)
+- table_columns(connection, schema, table): column names of the target table
+- table_column_list(connection, schema, table): the same in ordinal order,
+  as the server spells them
+- validate_condition(text, connection, schema, table): (ok, message) for the UI
+- validate_mask_columns(columns, connection, schema, table): the same check
+  for a Mask rule's column list
+- to_sql(node, alias): render an AST back to T-SQL
+
+The accepted language is the predicate subset of T-SQL rules use:
+comparisons, AND/OR/NOT, IS [NOT] NULL, [NOT] IN, [NOT] BETWEEN,
+[NOT] LIKE [ESCAPE], arithmetic, scalar function calls (including datepart
+arguments such as DATEADD(day, ...)) and CAST/CONVERT to a type. Numeric
+literals are rendered exactly as written. Compiled conditions are cached by
+a hash of the condition text, so validation on save and SQL generation
+later reuse one parse. Syntax errors are refused; conditions using T-SQL
+the subset deliberately leaves out are saved with a warning, and the
+planner and conflict checks skip them.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+
+CACHE_SIZE = 1024  # compiled conditions kept in memory
+COLUMNS_TTL = 300.0  # seconds table metadata is trusted
+
+UNVERIFIED = "Unverified condition:"  # validate_condition message prefix for conditions saved with a warning
+
+COMPARISON_OPS = ("=", "<>", "!=", "<", "<=", ">", ">=")
+ARITHMETIC_OPS = ("+", "-", "*", "/", "%")
+
+
+class ConditionError(ValueError):
+    def __init__(self, message: str, position: int) -> None:
+        super().__init__(f"{message} (at character {position + 1})")
+        self.position = position
+
+
+class UnsupportedConditionError(ConditionError):
+    """The condition uses a T-SQL construct outside the supported subset."""
+
+
+# --- AST ---
+class Node:
+    __slots__ = ()
+
+    def _key(self) -> Tuple:
+        return tuple(getattr(self, s) for s in self.__slots__)
+
+    def __eq__(self, other: object) -> bool:
+        return type(self) is type(other) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash((type(self).__name__,) + self._key())
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{s}={getattr(self, s)!r}" for s in self.__slots__)
+        return f"{type(self).__name__}({args})"
+
+
+class Column(Node):
+    __slots__ = ("name",)
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+class Literal(Node):
+    __slots__ = ("value", "text")  # str, int, float or None (NULL); numbers keep their source text
+
+    def __init__(self, value, text: Optional[str] = None) -> None:
+        self.value = value
+        self.text = text
+
+
+class Keyword(Node):
+    """A bare word argument: a datepart (DATEADD(day, ...)) or a type (CAST(x AS INT))."""
+
+    __slots__ = ("word",)
+
+    def __init__(self, word: str) -> None:
+        self.word = word
+
+
+class Func(Node):
+    __slots__ = ("name", "args")
+
+    def __init__(self, name: str, args: Tuple[Node, ...]) -> None:
+        self.name = name
+        self.args = args
+
+
+class Arith(Node):
+    __slots__ = ("op", "left", "right")
+
+    def __init__(self, op: str, left: Node, right: Node) -> None:
+        self.op = op
+        self.left = left
+        self.right = right
+
+
+class Compare(Node):
+    __slots__ = ("op", "left", "right")
+
+    def __init__(self, op: str, left: Node, right: Node) -> None:
+        self.op = "<>" if op == "!=" else op
+        self.left = left
+        self.right = right
+
+
+class IsNull(Node):
+    __slots__ = ("expr", "negated")
+
+    def __init__(self, expr: Node, negated: bool = False) -> None:
+        self.expr = expr
+        self.negated = negated
+
+
+class InList(Node):
+    __slots__ = ("expr", "values", "negated")
+
+    def __init__(self, expr: Node, values: Tuple[Node, ...], negated: bool = False) -> None:
+        self.expr = expr
+        self.values = values
+        self.negated = negated
+
+
+class Between(Node):
+    __slots__ = ("expr", "low", "high", "negated")
+
+    def __init__(self, expr: Node, low: Node, high: Node, negated: bool = False) -> None:
+        self.expr = expr
+        self.low = low
+        self.high = high
+        self.negated = negated
+
+
+class Like(Node):
+    __slots__ = ("expr", "pattern", "negated", "escape")
+
+    def __init__(self, expr: Node, pattern: Node, negated: bool = False, escape: Optional[Node] = None) -> None:
+        self.expr = expr
+        self.pattern = pattern
+        self.negated = negated
+        self.escape = escape
+
+
+class BoolOp(Node):
+    __slots__ = ("op", "items")  # op is "AND" or "OR"
+
+    def __init__(self, op: str, items: Tuple[Node, ...]) -> None:
+        self.op = op
+        self.items = items
+
+
+class Not(Node):
+    __slots__ = ("item",)
+
+    def __init__(self, item: Node) -> None:
+        self.item = item
+
+
+_PREDICATES = (Compare, IsNull, InList, Between, Like, BoolOp, Not)
+
+
+# --- Tokenizer ---
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+  | (?P<string>N?'(?:[^']|'')*')
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)
+  | (?P<ident>\[(?:[^\]]|\]\])+\]|"(?:[^"]|"")+"|[A-Za-z_@#][A-Za-z0-9_@#$]*)
+  | (?P<op><>|!=|<=|>=|[=<>+\-*/%(),.])
+    """,
+    re.VERBOSE,
+)
+_KEYWORDS = {"AND", "OR", "NOT", "IS", "NULL", "IN", "BETWEEN", "LIKE", "ESCAPE"}
+
+# Functions whose first argument is a datepart word rather than a column
+_DATEPART_FUNCS = {"DATEADD", "DATEDIFF", "DATEDIFF_BIG", "DATEPART", "DATENAME", "DATETRUNC", "DATE_BUCKET"}
+_DATEPARTS = {
+    "year", "yy", "yyyy", "quarter", "qq", "q", "month", "mm", "m", "dayofyear", "dy", "y",
+    "day", "dd", "d", "week", "wk", "ww", "weekday", "dw", "w", "hour", "hh", "minute", "mi", "n",
+    "second", "ss", "s", "millisecond", "ms", "microsecond", "mcs", "nanosecond", "ns",
+    "iso_week", "isowk", "isoww", "tzoffset", "tz",
+}
+_CAST_FUNCS = {"CAST", "TRY_CAST"}  # CAST(expr AS type)
+_CONVERT_FUNCS = {"CONVERT", "TRY_CONVERT"}  # CONVERT(type, expr [, style])
+# T-SQL words the subset deliberately does not model; hitting one is not a typo
+_UNSUPPORTED_WORDS = {"SELECT", "EXISTS", "CASE", "ANY", "ALL", "SOME", "OVER", "COLLATE", "CONTAINS", "FREETEXT"}
+
+
+def _unexpected(kind: str, value: str, pos: int, message: str) -> ConditionError:
+    """``message`` as a syntax error, unless the token starts a construct the subset leaves out."""
+    if kind == "ident" and (value.upper() in _UNSUPPORTED_WORDS or value.startswith("@")):
+        word = "Variables" if value.startswith("@") else value.upper()
+        return UnsupportedConditionError(f"{word} is not supported in rule conditions", pos)
+    return ConditionError(message, pos)
+
+
+def _tokenize(text: str) -> List[Tuple[str, str, int]]:
+    """(kind, value, position) tuples; kind is string/number/ident/keyword/op/end."""
+    tokens: List[Tuple[str, str, int]] = []
+    pos = 0
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if m is None:
+            if text[pos] == "'":
+                raise ConditionError("Unterminated string literal", pos)
+            raise ConditionError(f"Unexpected character {text[pos]!r}", pos)
+        kind = m.lastgroup
+        value = m.group()
+        if kind == "ident" and value.upper() in _KEYWORDS:
+            kind, value = "keyword", value.upper()
+        if kind != "ws":
+            tokens.append((kind, value, pos))
+        pos = m.end()
+    tokens.append(("end", "", len(text)))
+    return tokens
+
+
+def _unquote_ident(raw: str) -> str:
+    if raw.startswith("["):
+        return raw[1:-1].replace("]]", "]")
+    if raw.startswith('"'):
+        return raw[1:-1].replace('""', '"')
+    return raw
+
+
+# --- Parser ---
+class _Parser:
+    def __init__(self, text: str) -> None:
+        self.tokens = _tokenize(text)
+        self.i = 0
+
+    def peek(self, offset: int = 0) -> Tuple[str, str, int]:
+        return self.tokens[min(self.i + offset, len(self.tokens) - 1)]
+
+    def next(self) -> Tuple[str, str, int]:
+        tok = self.tokens[self.i]
+        self.i += 1
+        return tok
+
+    def accept(self, kind: str, value: Optional[str] = None) -> bool:
+        k, v, _ = self.peek()
+        if k == kind and (value is None or v == value):
+            self.i += 1
+            return True
+        return False
+
+    def expect(self, kind: str, value: Optional[str] = None, what: Optional[str] = None) -> Tuple[str, str, int]:
+        k, v, pos = self.peek()
+        if k != kind or (value is not None and v != value):
+            found = "end of condition" if k == "end" else repr(v)
+            raise _unexpected(k, v, pos, f"Expected {what or value or kind}, found {found}")
+        return self.next()
+
+    # condition := or_expr <end>
+    def parse(self) -> Node:
+        node = self.or_expr()
+        kind, value, pos = self.peek()
+        if kind != "end":
+            raise _unexpected(kind, value, pos, f"Unexpected {value!r}")
+        return self._boolean(node, 0)
+
+    @staticmethod
+    def _boolean(node: Node, pos: int) -> Node:
+        if not isinstance(node, _PREDICATES):
+            raise ConditionError("Expected a comparison such as col = value", pos)
+        return node
+
+    def or_expr(self) -> Node:
+        items = [self.and_expr()]
+        while True:
+            pos = self.peek()[2]
+            if not self.accept("keyword", "OR"):
+                break
+            items[-1] = self._boolean(items[-1], pos)
+            items.append(self._boolean(self.and_expr(), self.peek()[2]))
+        return items[0] if len(items) == 1 else BoolOp("OR", tuple(items))
+
+    def and_expr(self) -> Node:
+        items = [self.not_expr()]
+        while True:
+            pos = self.peek()[2]
+            if not self.accept("keyword", "AND"):
+                break
+            items[-1] = self._boolean(items[-1], pos)
+            items.append(self._boolean(self.not_expr(), self.peek()[2]))
+        return items[0] if len(items) == 1 else BoolOp("AND", tuple(items))
+
+    def not_expr(self) -> Node:
+        pos = self.peek()[2]
+        if self.accept("keyword", "NOT"):
+            return Not(self._boolean(self.not_expr(), pos))
+        return self.predicate()
+
+    def predicate(self) -> Node:
+        left = self.operand()
+        kind, value, pos = self.peek()
+        if kind == "op" and value in COMPARISON_OPS:
+            self.next()
+            return Compare(value, left, self.operand())
+        if kind == "keyword" and value == "IS":
+            self.next()
+            negated = self.accept("keyword", "NOT")
+            self.expect("keyword", "NULL", "NULL")
+            return IsNull(left, negated)
+        negated = False
+        if kind == "keyword" and value == "NOT" and self.peek(1)[1] in ("IN", "BETWEEN", "LIKE"):
+            self.next()
+            negated = True
+            kind, value, pos = self.peek()
+        if kind == "keyword" and value == "IN":
+            self.next()
+            self.expect("op", "(")
+            values = [self.operand()]
+            while self.accept("op", ","):
+                values.append(self.operand())
+            self.expect("op", ")")
+            return InList(left, tuple(values), negated)
+        if kind == "keyword" and value == "BETWEEN":
+            self.next()
+            low = self.operand()
+            self.expect("keyword", "AND", "AND")
+            return Between(left, low, self.operand(), negated)
+        if kind == "keyword" and value == "LIKE":
+            self.next()
+            pattern = self.operand()
+            escape = self.operand() if self.accept("keyword", "ESCAPE") else None
+            return Like(left, pattern, negated, escape)
+        # A bare operand; callers decide whether that is allowed here
+        return left
+
+    # operand := term (('+' | '-') term)*
+    def operand(self) -> Node:
+        node = self.term()
+        while self.peek()[0] == "op" and self.peek()[1] in ("+", "-"):
+            node = Arith(self.next()[1], node, self.term())
+        return node
+
+    def term(self) -> Node:
+        node = self.factor()
+        while self.peek()[0] == "op" and self.peek()[1] in ("*", "/", "%"):
+            node = Arith(self.next()[1], node, self.factor())
+        return node
+
+    def factor(self) -> Node:
+        kind, value, pos = self.next()
+        if kind == "op" and value == "(":
+            # Either a grouped boolean condition or grouped arithmetic
+            inner = self.or_expr()
+            self.expect("op", ")")
+            return inner
+        if kind == "op" and value == "-":
+            inner = self.factor()
+            if isinstance(inner, Literal) and isinstance(inner.value, (int, float)):
+                return Literal(-inner.value, "-" + inner.text)
+            return Arith("-", Literal(0), inner)
+        if kind == "number":
+            # The value serves range analysis; SQL is rendered from the exact source text
+            return Literal(float(value) if any(c in value for c in ".eE") else int(value), value)
+        if kind == "string":
+            body = value[2:-1] if value.startswith("N") else value[1:-1]
+            return Literal(body.replace("''", "'"))
+        if kind == "keyword" and value == "NULL":
+            return Literal(None)
+        if kind == "ident" and (value.upper() in _UNSUPPORTED_WORDS or value.startswith("@")):
+            raise _unexpected(kind, value, pos, "")
+        if kind == "ident":
+            parts = [_unquote_ident(value)]
+            while self.accept("op", "."):
+                parts.append(_unquote_ident(self.expect("ident", what="identifier")[1]))
+            if self.peek()[:2] == ("op", "("):
+                self.next()
+                return self.call(".".join(parts).upper())
+            # Qualified references (t.col, schema.table.col) name the column last
+            return Column(parts[-1])
+        found = "end of condition" if kind == "end" else repr(value)
+        raise ConditionError(f"Expected a column, value or '(' but found {found}", pos)
+
+
+    def call(self, name: str) -> Func:
+        """Arguments of ``name(`` up to the closing parenthesis."""
+        args: List[Node] = []
+        if name in _CAST_FUNCS:
+            args.append(self.operand())
+            kind, value, pos = self.peek()
+            if not (kind == "ident" and value.upper() == "AS"):
+                raise ConditionError(f"Expected AS in {name}", pos)
+            self.next()
+            args.append(self.type_name())
+        elif name in _CONVERT_FUNCS:
+            args.append(self.type_name())
+            while self.accept("op", ","):
+                args.append(self.operand())
+        elif not self.accept("op", ")"):
+            kind, value, _ = self.peek()
+            if name in _DATEPART_FUNCS and kind == "ident" and value.lower() in _DATEPARTS and self.peek(1)[1] == ",":
+                self.next()
+                args.append(Keyword(value.lower()))
+            else:
+                args.append(self.operand())
+            while self.accept("op", ","):
+                args.append(self.operand())
+        else:
+            return Func(name, ())
+        self.expect("op", ")")
+        return Func(name, tuple(args))
+
+    def type_name(self) -> Keyword:
+        """A SQL type such as INT, DECIMAL(18, 2) or NVARCHAR(MAX)."""
+        _, value, _ = self.expect("ident", what="a type name")
+        word = _unquote_ident(value).upper()
+        if self.accept("op", "("):
+            sizes = []
+            while True:
+                kind, size, pos = self.next()
+                if kind == "number" or (kind == "ident" and size.upper() == "MAX"):
+                    sizes.append(size.upper())
+                else:
+                    raise ConditionError(f"Expected a length in {word}(...)", pos)
+                if not self.accept("op", ","):
+                    break
+            self.expect("op", ")")
+            word += "(" + ", ".join(sizes) + ")"
+        return Keyword(word)
+
+
+# --- Rendering ---
+def _quote_ident(name: str) -> str:
+    return "[" + name.replace("]", "]]") + "]"
+
+
+def _literal_sql(lit: "Literal") -> str:
+    value = lit.value
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        return "N'" + value.replace("'", "''") + "'"
+    return lit.text if lit.text is not None else repr(value)
+
+
+def to_sql(node: Node, alias: Optional[str] = None) -> str:
+    """Canonical T-SQL for ``node``; columns are bracket-quoted and prefixed with ``alias``."""
+    def r(n: Node) -> str:
+        return to_sql(n, alias)
+
+    if isinstance(node, Column):
+        return f"{alias}.{_quote_ident(node.name)}" if alias else _quote_ident(node.name)
+    if isinstance(node, Literal):
+        return _literal_sql(node)
+    if isinstance(node, Keyword):
+        return node.word
+    if isinstance(node, Func):
+        if node.name in _CAST_FUNCS:
+            return f"{node.name}({r(node.args[0])} AS {r(node.args[1])})"
+        return f"{node.name}({', '.join(r(a) for a in node.args)})"
+    if isinstance(node, Arith):
+        return f"({r(node.left)} {node.op} {r(node.right)})"
+    if isinstance(node, Compare):
+        return f"{r(node.left)} {node.op} {r(node.right)}"
+    if isinstance(node, IsNull):
+        return f"{r(node.expr)} IS {'NOT ' if node.negated else ''}NULL"
+    if isinstance(node, InList):
+        return f"{r(node.expr)} {'NOT ' if node.negated else ''}IN ({', '.join(r(v) for v in node.values)})"
+    if isinstance(node, Between):
+        return f"{r(node.expr)} {'NOT ' if node.negated else ''}BETWEEN {r(node.low)} AND {r(node.high)}"
+    if isinstance(node, Like):
+        escape = f" ESCAPE {r(node.escape)}" if node.escape is not None else ""
+        return f"{r(node.expr)} {'NOT ' if node.negated else ''}LIKE {r(node.pattern)}{escape}"
+    if isinstance(node, BoolOp):
+        return "(" + f" {node.op} ".join(r(i) for i in node.items) + ")"
+    if isinstance(node, Not):
+        return f"NOT ({r(node.item)})"
+    raise TypeError(f"Unknown condition node: {node!r}")
+
+
+def _columns(node: Node, out: set) -> set:
+    if isinstance(node, Column):
+        out.add(node.name)
+    for slot in node.__slots__:
+        val = getattr(node, slot)
+        if isinstance(val, Node):
+            _columns(val, out)
+        elif isinstance(val, tuple):
+            for item in val:
+                if isinstance(item, Node):
+                    _columns(item, out)
+    return out
+
+
+# --- Compilation cache ---
+class CompiledCondition:
+    __slots__ = ("text", "digest", "ast", "columns", "sql")
+
+    def __init__(self, text: str, digest: str, ast: Optional[Node]) -> None:
+        self.text = text
+        self.digest = digest
+        self.ast = ast  # None for an empty condition (the rule applies to every row)
+        self.columns: FrozenSet[str] = frozenset(_columns(ast, set())) if ast is not None else frozenset()
+        self.sql = to_sql(ast) if ast is not None else ""
+
+
+_cache: "OrderedDict[str, CompiledCondition]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def condition_digest(text: Optional[str]) -> str:
+    return hashlib.sha1((text or "").strip().encode("utf-8")).hexdigest()
+
+
+def compile_condition(text: Optional[str]) -> CompiledCondition:
+    """Parse ``text`` (or return the cached parse); raises ConditionError on bad syntax."""
+    source = (text or "").strip()
+    digest = condition_digest(source)
+    with _cache_lock:
+        compiled = _cache.get(digest)
+        if compiled is not None:
+            _cache.move_to_end(digest)
+            return compiled
+    compiled = CompiledCondition(source, digest, _Parser(source).parse() if source else None)
+    with _cache_lock:
+        _cache[digest] = compiled
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return compiled
+
+
+# --- Column validation ---
+_columns_cache: Dict[Tuple, Tuple[float, Tuple[str, ...]]] = {}
+
+
+def table_column_list(connection: Optional[str], schema: Optional[str], table: Optional[str]) -> Optional[List[str]]:
+    """Column names of ``schema.table`` on ``connection`` in ordinal order.
+
+    Returns None when they cannot be looked up (no connection, no table or
+    the server is unreachable); an empty list means the table does not exist.
+    """
+    if not connection or not table:
+        return None
+    key = (connection, (schema or "dbo").lower(), table.lower())
+    hit = _columns_cache.get(key)
+    if hit is not None and time.monotonic() - hit[0] < COLUMNS_TTL:
+        return list(hit[1])
+    from utilities.conn_pool import pooled_connection
+    try:
+        with pooled_connection(connection) as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ? "
+                "ORDER BY ORDINAL_POSITION",
+                [schema or "dbo", table],
+            )
+            cols = tuple(str(row[0]) for row in cur.fetchall())
+            cur.close()
+    except Exception:
+        return None
+    _columns_cache[key] = (time.monotonic(), cols)
+    return list(cols)
+
+
+def table_columns(connection: Optional[str], schema: Optional[str], table: Optional[str]) -> Optional[FrozenSet[str]]:
+    """Lower-cased column names of ``schema.table``; None if unknown, empty if the table does not exist."""
+    cols = table_column_list(connection, schema, table)
+    return frozenset(c.lower() for c in cols) if cols is not None else None
+
+
+def validate_condition(
+    text: Optional[str],
+    connection: Optional[str] = None,
+    schema: Optional[str] = None,
+    table: Optional[str] = None,
+) -> (bool, str):
+    """Check syntax and, when the target table can be read, every column reference.
+
+    Syntax errors are refused. A condition using T-SQL the subset leaves out
+    (the server may still accept it) is ok with an "Unverified condition"
+    message and is left out of planning and conflict checks. When the table
+    cannot be read the columns go unchecked, also reported as unverified.
+    """
+    try:
+        compiled = compile_condition(text)
+    except UnsupportedConditionError as e:
+        return True, f"{UNVERIFIED} {e}. It is saved as written but skipped by the enforcement plan and conflict checks."
+    except ConditionError as e:
+        return False, f"Syntax error: {e}"
+    if compiled.ast is None:
+        return True, "No condition: the rule applies to every row"
+    known = table_columns(connection, schema, table)
+    if known is None:
+        return True, f"{UNVERIFIED} syntax OK, but columns were not checked (target table could not be read)"
+    target = f"{schema or 'dbo'}.{table}"
+    if not known:
+        return False, f"Table {target} was not found on {connection}"
+    unknown = sorted(c for c in compiled.columns if c.lower() not in known)
+    if unknown:
+        return False, f"Unknown column(s) on {target}: {', '.join(unknown)}"
+    return True, f"Condition OK ({len(compiled.columns)} column(s) checked against {target})"
+
+
+def validate_mask_columns(
+    columns: List[str],
+    connection: Optional[str] = None,
+    schema: Optional[str] = None,
+    table: Optional[str] = None,
+) -> (bool, str):
+    """Check a Mask rule's columns against the target table, like validate_condition does for conditions."""
+    if not columns:
+        return False, "A Mask rule must list the columns to mask"
+    known = table_columns(connection, schema, table)
+    if known is None:
+        return True, f"{UNVERIFIED} mask columns were not checked (target table could not be read)"
+    target = f"{schema or 'dbo'}.{table}"
+    if not known:
+        return False, f"Table {target} was not found on {connection}"
+    unknown = [c for c in columns if c.lower() not in known]
+    if unknown:
+        return False, f"Unknown mask column(s) on {target}: {', '.join(unknown)}"
+    return True, f"Mask columns OK ({len(columns)} checked against {target})"
@@ -0,0 +1,519 @@
+"""Conflict and shadowing analysis for rules.
+
+Provides:
+- RuleConflictIndex: rules indexed by (connection, schema, table) and
+  priority, maintained from repository writes
+- get_rule_conflicts(repo, connection): the index over one connection's rules,
+  kept in sync with a RuleRepository
+
+A rule's condition is reduced to per-column constraints (equality sets,
+range intervals, NULL tests) from its top-level AND terms; other terms
+(OR, LIKE, functions) are ignored, which can only widen the rule, so
+overlaps involving such rules are reported as possible rather than
+certain. Findings are dicts with kind ("conflict", "shadowed" or
+"redundant"), rule_id, other_id, scope and message:
+
+- conflict: same scope and priority, overlapping rows, different actions
+- shadowed: every row the rule matches is already exempted by an earlier Allow
+- redundant: every row is already covered by an earlier rule with the same action
+
+Checking one rule only looks at rules on the same table, so the check run
+on save is O(rules on that table) rather than a full O(N²) sweep. The full
+report indexes each table's rules by the values and intervals they put on
+each column, so a rule is only compared with rules that can overlap or
+cover it; findings are kept per table and a write recomputes only the
+table it touched.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from utilities.rule_condition import (
+    Between, BoolOp, Column, Compare, ConditionError, InList, IsNull, Literal, compile_condition,
+)
+from utilities.rule_model import Action, Rule
+from utilities.rule_store import DerivedView, rules_from_rows
+
+
+_FLIP = {"=": "=", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+
+def _norm(value):
+    return float(value) if isinstance(value, (int, float)) else value
+
+
+class _Range:
+    """Allowed values of one column: an interval, an optional value set and a NULL test.
+
+    ``null`` is True for IS NULL, False when NULL is excluded (any comparison
+    excludes it) and None when the column is unconstrained.
+    """
+
+    __slots__ = ("lo", "lo_incl", "hi", "hi_incl", "values", "null")
+
+    def __init__(self, lo=None, lo_incl=True, hi=None, hi_incl=True, values=None, null=False) -> None:
+        self.lo, self.lo_incl, self.hi, self.hi_incl = lo, lo_incl, hi, hi_incl
+        self.values = frozenset(values) if values is not None else None
+        self.null = null
+
+    def _in_interval(self, v) -> bool:
+        if self.lo is not None and (v < self.lo or (v == self.lo and not self.lo_incl)):
+            return False
+        if self.hi is not None and (v > self.hi or (v == self.hi and not self.hi_incl)):
+            return False
+        return True
+
+    def _members(self):
+        return None if self.values is None else frozenset(v for v in self.values if self._in_interval(v))
+
+    def intersect(self, other: "_Range") -> "_Range":
+        if self.null is True or other.null is True:
+            both_null = self.null is not False and other.null is not False
+            return _Range(values=() if not both_null else None, null=True if both_null else False)
+        lo, lo_incl = self.lo, self.lo_incl
+        if other.lo is not None and (lo is None or other.lo > lo or (other.lo == lo and not other.lo_incl)):
+            lo, lo_incl = other.lo, other.lo_incl
+        hi, hi_incl = self.hi, self.hi_incl
+        if other.hi is not None and (hi is None or other.hi < hi or (other.hi == hi and not other.hi_incl)):
+            hi, hi_incl = other.hi, other.hi_incl
+        values = self.values if other.values is None else other.values if self.values is None else self.values & other.values
+        return _Range(lo, lo_incl, hi, hi_incl, values, False)
+
+    def is_empty(self) -> bool:
+        if self.null is True:
+            return False
+        members = self._members()
+        if members is not None:
+            return not members
+        if self.lo is None or self.hi is None:
+            return False
+        return self.lo > self.hi or (self.lo == self.hi and not (self.lo_incl and self.hi_incl))
+
+    def contains(self, inner: "_Range") -> bool:
+        if self.null is True or inner.null is True:
+            return self.null is True and inner.null is True
+        outer_members, inner_members = self._members(), inner._members()
+        if outer_members is not None:
+            return inner_members is not None and inner_members <= outer_members
+        if inner_members is not None:
+            return all(self._in_interval(v) for v in inner_members)
+        if self.lo is not None:
+            if inner.lo is None or inner.lo < self.lo or (inner.lo == self.lo and inner.lo_incl and not self.lo_incl):
+                return False
+        if self.hi is not None:
+            if inner.hi is None or inner.hi > self.hi or (inner.hi == self.hi and inner.hi_incl and not self.hi_incl):
+                return False
+        return True
+
+
+def _term_range(node) -> Optional[Tuple[str, _Range]]:
+    """(column, range) for one analyzable predicate, else None."""
+    if isinstance(node, Compare):
+        left, right, op = node.left, node.right, node.op
+        if isinstance(right, Column) and isinstance(left, Literal):
+            left, right, op = right, left, _FLIP.get(op)
+        if not (isinstance(left, Column) and isinstance(right, Literal)) or op not in _FLIP or right.value is None:
+            return None
+        v = _norm(right.value)
+        ranges = {
+            "=": _Range(values=(v,)),
+            "<": _Range(hi=v, hi_incl=False),
+            "<=": _Range(hi=v),
+            ">": _Range(lo=v, lo_incl=False),
+            ">=": _Range(lo=v),
+        }
+        return left.name.lower(), ranges[op]
+    if isinstance(node, Between) and not node.negated and isinstance(node.expr, Column):
+        if isinstance(node.low, Literal) and isinstance(node.high, Literal) and None not in (node.low.value, node.high.value):
+            return node.expr.name.lower(), _Range(lo=_norm(node.low.value), hi=_norm(node.high.value))
+    if isinstance(node, InList) and not node.negated and isinstance(node.expr, Column):
+        if all(isinstance(v, Literal) and v.value is not None for v in node.values):
+            return node.expr.name.lower(), _Range(values=[_norm(v.value) for v in node.values])
+    if isinstance(node, IsNull) and isinstance(node.expr, Column):
+        return node.expr.name.lower(), _Range(null=False if node.negated else True)
+    return None
+
+
+class _Entry:
+    __slots__ = ("rule_id", "name", "action", "priority", "precedence", "label", "ranges", "exact", "empty")
+
+    def __init__(self, rule: Rule) -> None:
+        self.rule_id = rule.id
+        self.name = rule.name
+        self.action = rule.action
+        self.priority = rule.priority if rule.priority is not None else 0
+        self.precedence = (self.priority, self.rule_id if self.rule_id is not None else float("inf"))
+        # Formatted once: a report can mention the same rule in many findings
+        self.label = f"#{rule.id} '{rule.name}'" if rule.id is not None else f"'{rule.name}'"
+        self.ranges: Dict[str, _Range] = {}
+        self.exact = True  # every term of the condition was analyzed
+        self.empty = False  # the condition can never be true
+        ast = compile_condition(rule.condition).ast
+        terms = list(ast.items) if isinstance(ast, BoolOp) and ast.op == "AND" else [ast] if ast is not None else []
+        for term in terms:
+            found = _term_range(term)
+            if found is None:
+                self.exact = False
+                continue
+            col, rng = found
+            try:
+                rng = self.ranges[col].intersect(rng) if col in self.ranges else rng
+                self.empty = self.empty or rng.is_empty()
+            except TypeError:
+                # Mixed literal types (e.g. text vs number) on one column
+                self.exact = False
+                continue
+            self.ranges[col] = rng
+
+    def overlaps(self, other: "_Entry") -> bool:
+        if self.empty or other.empty:
+            return False
+        try:
+            return all(
+                not self.ranges[col].intersect(other.ranges[col]).is_empty()
+                for col in self.ranges.keys() & other.ranges.keys()
+            )
+        except TypeError:
+            return True
+
+    def covers(self, inner: "_Entry") -> bool:
+        """True if every row ``inner`` matches is matched by this rule."""
+        if not self.exact:
+            return False
+        if inner.empty:
+            return True
+        try:
+            return all(col in inner.ranges and rng.contains(inner.ranges[col]) for col, rng in self.ranges.items())
+        except TypeError:
+            return False
+
+
+def _numeric_interval(rng: _Range) -> Optional[Tuple[float, float]]:
+    """(lo, hi) with open ends as infinities for a numeric interval-only range, else None."""
+    if rng.null is not False or rng.values is not None or (rng.lo is None and rng.hi is None):
+        return None
+    if not all(b is None or isinstance(b, float) for b in (rng.lo, rng.hi)):
+        return None
+    return (-np.inf if rng.lo is None else rng.lo, np.inf if rng.hi is None else rng.hi)
+
+
+def _bounds(rng: _Range) -> Optional[Tuple[float, float]]:
+    """Numeric (lo, hi) spanned by a range's members or interval, else None."""
+    members = rng._members() if rng.null is not True else None
+    if members:
+        if all(isinstance(v, float) for v in members):
+            return min(members), max(members)
+        return None
+    return _numeric_interval(rng)
+
+
+class _Intervals:
+    """Numeric interval ranges on one column with vectorized bound checks.
+
+    Queries return a superset (inclusive bounds); callers confirm each
+    candidate with _Range.contains / intersect.
+    """
+
+    def __init__(self) -> None:
+        self.entries: List[_Entry] = []
+        self._lo: List[float] = []
+        self._hi: List[float] = []
+
+    def add(self, entry: _Entry, lo: float, hi: float) -> None:
+        self.entries.append(entry)
+        self._lo.append(lo)
+        self._hi.append(hi)
+
+    def freeze(self) -> None:
+        self.lo = np.array(self._lo, dtype=float)
+        self.hi = np.array(self._hi, dtype=float)
+
+    def containing(self, lo: float, hi: float) -> List[_Entry]:
+        return [self.entries[i] for i in np.flatnonzero((self.lo <= lo) & (self.hi >= hi))]
+
+    def intersecting(self, lo: float, hi: float) -> List[_Entry]:
+        return [self.entries[i] for i in np.flatnonzero((self.lo <= hi) & (self.hi >= lo))]
+
+
+class _ColumnIndex:
+    """Entries indexed by the constraint each puts on each column.
+
+    ``values`` maps a column to {value: entries allowing that value} for
+    value-set ranges, ``intervals`` holds numeric intervals and ``other``
+    the rest (NULL tests, text intervals); entries that do not constrain a
+    column are found through ``unconstrained``.
+    """
+
+    def __init__(self, entries: Iterable[_Entry]) -> None:
+        self.entries: List[_Entry] = list(entries)
+        self.values: Dict[str, Dict] = {}
+        self.intervals: Dict[str, _Intervals] = {}
+        self.other: Dict[str, List[_Entry]] = {}
+        self.constrained: Dict[str, Set[int]] = {}
+        self.free: List[_Entry] = [e for e in self.entries if not e.ranges]
+        self._unconstrained: Dict[str, List[_Entry]] = {}
+        for e in self.entries:
+            for col, rng in e.ranges.items():
+                self.constrained.setdefault(col, set()).add(id(e))
+                members = rng._members() if rng.null is not True else None
+                if members is not None:
+                    by_value = self.values.setdefault(col, {})
+                    for v in members:
+                        by_value.setdefault(v, []).append(e)
+                    continue
+                interval = _numeric_interval(rng)
+                if interval is not None:
+                    self.intervals.setdefault(col, _Intervals()).add(e, *interval)
+                else:
+                    self.other.setdefault(col, []).append(e)
+        for intervals in self.intervals.values():
+            intervals.freeze()
+
+    def unconstrained(self, col: str) -> List[_Entry]:
+        found = self._unconstrained.get(col)
+        if found is None:
+            has = self.constrained.get(col, set())
+            found = self._unconstrained[col] = [e for e in self.entries if id(e) not in has]
+        return found
+
+    def overlapping(self, entry: _Entry) -> Iterable[_Entry]:
+        """Superset of the entries whose ranges can intersect ``entry``'s."""
+        best: Optional[Tuple[str, frozenset]] = None
+        for col, rng in entry.ranges.items():
+            members = rng._members() if rng.null is not True else None
+            if members is not None and (best is None or len(members) < len(best[1])):
+                best = (col, members)
+        if best is None:
+            return self.entries
+        col, members = best
+        by_value = self.values.get(col, {})
+        found: Dict[int, _Entry] = {}
+        for v in members:
+            for e in by_value.get(v, ()):
+                found[id(e)] = e
+        intervals = self.intervals.get(col)
+        if intervals is not None:
+            bounds = _bounds(entry.ranges[col])
+            for e in intervals.intersecting(*bounds) if bounds else intervals.entries:
+                found[id(e)] = e
+        for e in self.other.get(col, ()):
+            found[id(e)] = e
+        for e in self.unconstrained(col):
+            found[id(e)] = e
+        return found.values()
+
+    def covering(self, entry: _Entry) -> Iterable[_Entry]:
+        """Superset of the entries that can cover ``entry``.
+
+        A coverer constrains only columns ``entry`` constrains, each to a
+        superset, so it is found through any of its columns; coverers with
+        no columns at all match every row.
+        """
+        found: Dict[int, _Entry] = {id(e): e for e in self.free}
+        for col, rng in entry.ranges.items():
+            members = rng._members() if rng.null is not True else None
+            if members:
+                # Every member must be allowed, so any one of them is a complete key
+                lists = [self.values.get(col, {}).get(v, ()) for v in members]
+                for e in min(lists, key=len):
+                    found[id(e)] = e
+            intervals = self.intervals.get(col)
+            if intervals is not None:
+                bounds = _bounds(rng)
+                if bounds is not None:
+                    for e in intervals.containing(*bounds):
+                        found[id(e)] = e
+            for e in self.other.get(col, ()):
+                found[id(e)] = e
+        return found.values()
+
+
+def _scope(rule: Rule) -> Tuple:
+    return (rule.connection or "", (rule.schema or "dbo").lower(), (rule.table or "").lower())
+
+
+class RuleConflictIndex(DerivedView):
+    def __init__(self, connection: Optional[str] = None) -> None:
+        super().__init__(connection)
+        # scope -> priority -> rule_id -> entry
+        self._scopes: Dict[Tuple, Dict[int, Dict[int, _Entry]]] = {}
+        self._where: Dict[int, Tuple[Tuple, int]] = {}  # rule_id -> (scope, priority)
+        self._findings: Dict[Tuple, List[Dict]] = {}  # scope -> findings, dropped when the scope changes
+        self._report: Optional[Tuple[Optional[int], List[Dict]]] = None  # (version, findings)
+
+    # --- Maintenance ---
+    def _remove(self, rule_id: int) -> None:
+        where = self._where.pop(rule_id, None)
+        if where is None:
+            return
+        scope, priority = where
+        buckets = self._scopes[scope]
+        buckets[priority].pop(rule_id, None)
+        if not buckets[priority]:
+            del buckets[priority]
+            if not buckets:
+                del self._scopes[scope]
+
+    def _add(self, rule: Rule) -> None:
+        if not (rule.table or "").strip():
+            return
+        try:
+            entry = _Entry(rule)
+        except ConditionError:
+            return
+        scope = _scope(rule)
+        self._scopes.setdefault(scope, {}).setdefault(entry.priority, {})[rule.id] = entry
+        self._where[rule.id] = (scope, entry.priority)
+
+    def apply(self, event: str, rule_id: int, rule: Optional[Rule]) -> None:
+        self._report = None
+        where = self._where.get(rule_id)
+        if where is not None:
+            self._findings.pop(where[0], None)
+        self._remove(rule_id)
+        if event != "delete" and rule is not None:
+            self._findings.pop(_scope(rule), None)
+            self._add(rule)
+
+    def rebuild(self, repo) -> None:
+        self._report = None
+        self._findings.clear()
+        self._scopes.clear()
+        self._where.clear()
+        for cols, rows in repo.iter_rows(connection=self.connection):
+            for rule in rules_from_rows(cols, rows):
+                self._add(rule)
+
+    # --- Analysis ---
+    @staticmethod
+    def _conflict(entry: _Entry, other: _Entry, scope: Tuple) -> Optional[Dict]:
+        if entry.action is None or other.action is None or entry.action == other.action:
+            return None
+        if not entry.overlaps(other):
+            return None
+        certainty = "overlap" if entry.exact and other.exact else "may overlap"
+        return {
+            "kind": "conflict",
+            "rule_id": entry.rule_id,
+            "other_id": other.rule_id,
+            "scope": scope,
+            "message": f"{entry.label} ({entry.action.title}) and {other.label} ({other.action.title}) {certainty} "
+                       f"on {scope[1]}.{scope[2]} at priority {entry.priority}",
+        }
+
+    @staticmethod
+    def _coverage(first: _Entry, later: _Entry, scope: Tuple) -> Optional[Dict]:
+        """Finding if ``first`` (higher precedence) makes ``later`` shadowed or redundant."""
+        if first.action is None or later.action is None or later.empty:
+            return None
+        if first.action is Action.ALLOW and later.action is not Action.ALLOW:
+            kind = "shadowed"
+        elif first.action == later.action:
+            kind = "redundant"
+        else:
+            return None
+        if not first.covers(later):
+            return None
+        if kind == "shadowed":
+            why = f"is exempted by the earlier Allow {first.label}"
+        else:
+            why = f"is already covered by {first.label}"
+        return {
+            "kind": kind,
+            "rule_id": later.rule_id,
+            "other_id": first.rule_id,
+            "scope": scope,
+            "message": f"{later.label} on {scope[1]}.{scope[2]} {why}",
+        }
+
+    def _analyze(self, entry: _Entry, scope: Tuple) -> List[Dict]:
+        """Findings for ``entry`` against its table; caller holds the lock."""
+        findings: List[Dict] = []
+        buckets = self._scopes.get(scope, {})
+        for other in buckets.get(entry.priority, {}).values():
+            if other.rule_id == entry.rule_id:
+                continue
+            found = self._conflict(entry, other, scope)
+            if found is not None:
+                findings.append(found)
+        conflicting = {f["other_id"] for f in findings}
+        ordered = sorted(
+            (e for bucket in buckets.values() for e in bucket.values()
+             if e.rule_id != entry.rule_id and e.rule_id not in conflicting),
+            key=lambda e: e.precedence,
+        )
+        # Only the highest-precedence rule covering this one is reported
+        for first in ordered:
+            if first.precedence > entry.precedence:
+                break
+            found = self._coverage(first, entry, scope)
+            if found is not None:
+                findings.append(found)
+                break
+        for later in ordered:
+            if later.precedence > entry.precedence:
+                found = self._coverage(entry, later, scope)
+                if found is not None:
+                    findings.append(found)
+        return findings
+
+    def check(self, rule: Rule) -> List[Dict]:
+        """Findings between ``rule`` (saved or not yet saved) and the other rules on its table."""
+        if not (rule.table or "").strip():
+            return []
+        try:
+            entry = _Entry(rule)
+        except ConditionError:
+            return []
+        with self._lock:
+            return self._analyze(entry, _scope(rule))
+
+    def report(self) -> List[Dict]:
+        """Conflicting pairs plus, per rule, the earliest rule shadowing it.
+
+        Cached per store version; after a write only the tables it touched
+        are analyzed again.
+        """
+        with self._lock:
+            if self._report is None or self._report[0] != self.version:
+                for scope in self._scopes:
+                    if scope not in self._findings:
+                        self._findings[scope] = self._report_scope(scope)
+                self._report = (self.version, [f for scope in self._scopes for f in self._findings[scope]])
+            return list(self._report[1])
+
+    def _report_scope(self, scope: Tuple) -> List[Dict]:
+        findings: List[Dict] = []
+        buckets = self._scopes[scope]
+        for bucket in buckets.values():
+            index = _ColumnIndex(bucket.values())
+            for entry in sorted(bucket.values(), key=lambda e: e.precedence):
+                # Each pair once: ``other`` is the one with higher precedence
+                earlier = sorted((o for o in index.overlapping(entry) if o.precedence < entry.precedence),
+                                 key=lambda e: e.precedence)
+                for other in earlier:
+                    found = self._conflict(entry, other, scope)
+                    if found is not None:
+                        findings.append(found)
+        # Possible coverers: exact, satisfiable rules with an action
+        ordered = sorted((e for b in buckets.values() for e in b.values()), key=lambda e: e.precedence)
+        index = _ColumnIndex(e for e in ordered if e.exact and not e.empty and e.action is not None)
+        for entry in ordered:
+            if entry.action is None or entry.empty:
+                continue
+            candidates = sorted(
+                (f for f in index.covering(entry)
+                 if f.precedence < entry.precedence and (f.action is Action.ALLOW or f.action == entry.action)
+                 and not (f.priority == entry.priority and f.action != entry.action)),  # reported as a conflict
+                key=lambda e: e.precedence,
+            )
+            for first in candidates:
+                found = self._coverage(first, entry, scope)
+                if found is not None:
+                    findings.append(found)
+                    break
+        return findings
+
+
+def get_rule_conflicts(repo, connection: Optional[str] = None) -> RuleConflictIndex:
+    return repo.view(RuleConflictIndex, connection)
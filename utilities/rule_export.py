@@ -0,0 +1,342 @@
+"""Streaming rule export.
+
+Provides:
+- FORMATS: export format -> (file extension, MIME type)
+- iter_export(rules, fmt): generator of text chunks for "json", "csv" or "yaml"
+- write_export(repo, fmt, path, compression, chunk_rows): stream every
+  rule into ``path``, optionally gzip/xz-compressed on the fly and/or split
+  into fixed-size chunks zipped with a manifest; "parquet" and "arrow" are
+  written column-wise by utilities.rule_columnar
+- write_delta(repo, fmt, path, since, compression): only the rules added,
+  changed or deleted since export manifest ``since`` (deletes as tombstones)
+- export_file(repo, fmt, options): the export for the current rule-set
+  version from the on-disk export cache, built on first request
+- preview_export(rules, fmt): serialize only the given (small) slice
+
+Writers consume rules one at a time (see RuleRepository.iter_all), so
+memory stays flat however many rules are exported; the output matches
+what json.dump / csv.DictWriter / yaml.dump produce for the whole list.
+
+Every complete export records a manifest (see utilities.export_manifest),
+which later delta exports can be taken against. Delta records carry an
+"op" field first: "add" and "change" records are full rules, "delete"
+records are tombstones holding only the rule ID.
+"""
+import csv
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utilities.export_cache import cached_export, export_key, store_export
+from utilities.export_manifest import ManifestRecorder, compute_delta
+from utilities.rule_model import Rule
+from utilities.rule_store import rules_from_rows
+
+
+CSV_FLUSH_ROWS = 500  # rows buffered before a CSV chunk is yielded
+BATCH_ROWS = 10000  # rules fetched from the store per batch
+HASH_BLOCK = 1024 * 1024
+MANIFEST_NAME = "manifest.json"
+
+FORMATS: Dict[str, tuple] = {
+    "json": ("json", "application/json"),
+    "csv": ("csv", "text/csv"),
+    "yaml": ("yaml", "application/x-yaml"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "arrow": ("arrow", "application/vnd.apache.arrow.file"),
+}
+COMPRESSIONS: Dict[str, tuple] = {
+    "gzip": ("gz", "application/gzip"),
+    "xz": ("xz", "application/x-xz"),
+}
+FIELDNAMES: List[str] = sorted(Rule.__slots__)
+DELTA_FIELDNAMES: List[str] = ["op"] + FIELDNAMES
+DELTA_FORMATS = ("json", "csv", "yaml")
+
+
+class DeltaRecord:
+    """One delta export entry: a full rule for "add"/"change", just the ID for a "delete" tombstone."""
+
+    __slots__ = ("op", "rule_id", "rule")
+
+    def __init__(self, op: str, rule_id: int, rule: Optional[Rule] = None) -> None:
+        self.op = op
+        self.rule_id = rule_id
+        self.rule = rule
+
+    def to_dict(self) -> Dict:
+        if self.rule is None:
+            return {"op": self.op, "id": self.rule_id}
+        return {"op": self.op, **self.rule.to_dict()}
+
+
+def _iter_json(rules: Iterable[Rule]) -> Iterator[str]:
+    first = True
+    yield "["
+    for rule in rules:
+        body = json.dumps(rule.to_dict(), indent=2).replace("\n", "\n  ")
+        yield ("\n  " if first else ",\n  ") + body
+        first = False
+    yield "]" if first else "\n]"
+
+
+def _iter_csv(rules: Iterable[Rule], fieldnames: List[str] = FIELDNAMES) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=fieldnames)
+    writer.writeheader()
+    pending = 0
+    for rule in rules:
+        writer.writerow(rule.to_dict())
+        pending += 1
+        if pending >= CSV_FLUSH_ROWS:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    yield buf.getvalue()
+
+
+def _iter_yaml(rules: Iterable[Rule]) -> Iterator[str]:
+    import yaml  # optional dependency; ImportError is reported by the page
+    # The libyaml emitter produces the same text several times faster when available
+    dumper = getattr(yaml, "CDumper", yaml.Dumper)
+    empty = True
+    for rule in rules:
+        # A one-item list dumps as "- key: value" lines; concatenated they form the full list
+        yield yaml.dump([rule.to_dict()], default_flow_style=False, Dumper=dumper)
+        empty = False
+    if empty:
+        yield yaml.dump([], default_flow_style=False, Dumper=dumper)
+
+
+_WRITERS = {"json": _iter_json, "csv": _iter_csv, "yaml": _iter_yaml}
+
+
+def iter_export(rules: Iterable[Rule], fmt: str, fieldnames: List[str] = FIELDNAMES) -> Iterator[str]:
+    """Text chunks for ``rules`` (anything with ``to_dict()``); ``fieldnames`` sets the CSV columns."""
+    writer = _WRITERS.get(fmt)
+    if writer is None:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return writer(rules, fieldnames) if fmt == "csv" else writer(rules)
+
+
+def preview_export(rules: Iterable[Rule], fmt: str) -> str:
+    return "".join(iter_export(rules, fmt))
+
+
+class _Counting:
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self._rules = rules
+        self.count = 0
+
+    def __iter__(self) -> Iterator[Rule]:
+        for rule in self._rules:
+            self.count += 1
+            yield rule
+
+
+def export_extension(fmt: str, options: Optional[Dict] = None) -> Tuple[str, str]:
+    """(file extension, MIME type) of an export with ``options`` (compression, chunk_rows)."""
+    options = options or {}
+    if options.get("chunk_rows"):
+        return "zip", "application/zip"
+    ext, mime = FORMATS[fmt]
+    compression = options.get("compression")
+    if compression:
+        c_ext, c_mime = COMPRESSIONS[compression]
+        return f"{ext}.{c_ext}", c_mime
+    return ext, mime
+
+
+def _open_sink(path: str, compression: Optional[str]) -> BinaryIO:
+    """Binary file for ``path`` that compresses on the fly, so nothing is buffered whole."""
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+    if compression == "xz":
+        return lzma.open(path, "wb", preset=6)
+    if compression:
+        raise ValueError(f"Unsupported compression: {compression}")
+    return open(path, "wb")
+
+
+def _write_batches(batches: Iterable[Tuple[List[str], List[tuple]]], fmt: str, sink: BinaryIO) -> int:
+    if fmt in ("parquet", "arrow"):
+        from utilities.rule_columnar import write_arrow, write_parquet
+        return (write_parquet if fmt == "parquet" else write_arrow)(batches, sink)
+    rules = _Counting(rule for cols, rows in batches for rule in rules_from_rows(cols, rows))
+    _write_text(rules, fmt, sink)
+    return rules.count
+
+
+def _write_text(records: Iterable, fmt: str, sink: BinaryIO, fieldnames: List[str] = FIELDNAMES) -> None:
+    text = io.TextIOWrapper(sink, encoding="utf-8", newline="")
+    for chunk in iter_export(records, fmt, fieldnames):
+        text.write(chunk)
+    text.flush()
+    text.detach()  # the caller closes the sink
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _split_batches(batches: Iterable, chunk_rows: int) -> Iterator[Iterator]:
+    """Re-slice row batches into chunks of at most ``chunk_rows`` rules.
+
+    Each chunk is a lazy iterator of batches and must be consumed before the
+    next one is requested.
+    """
+    source = iter(batches)
+    pending: List = []
+
+    def chunk() -> Iterator:
+        remaining = chunk_rows
+        while remaining:
+            if not pending:
+                nxt = next(source, None)
+                if nxt is None:
+                    return
+                pending.append(nxt)
+            cols, rows = pending.pop()
+            take, rest = rows[:remaining], rows[remaining:]
+            if rest:
+                pending.append((cols, rest))
+            remaining -= len(take)
+            yield cols, take
+
+    while True:
+        if not pending:
+            nxt = next(source, None)
+            if nxt is None:
+                return
+            pending.append(nxt)
+        yield chunk()
+
+
+def _id_range(batches: Iterable, info: Dict) -> Iterator:
+    for cols, rows in batches:
+        idx = cols.index("id")
+        info.setdefault("first_id", rows[0][idx])
+        info["last_id"] = rows[-1][idx]
+        yield cols, rows
+
+
+def write_export(
+    repo,
+    fmt: str,
+    path: str,
+    compression: Optional[str] = None,
+    chunk_rows: Optional[int] = None,
+    **filters,
+) -> Dict:
+    """Stream every matching rule into ``path``; returns {"format", "compression", "rows", ...}.
+
+    With ``chunk_rows`` the output is a zip of standalone files of at most
+    that many rules each, plus a MANIFEST_NAME entry with per-chunk row
+    counts and SHA-256 checksums. Every export also records an export
+    manifest for its ``filters``, returned as "manifest", for later delta
+    exports.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    recorder = ManifestRecorder(repo, filters)
+    batches = recorder.tap(repo.iter_rows(min(chunk_rows or BATCH_ROWS, BATCH_ROWS), **filters))
+    if not chunk_rows:
+        with _open_sink(path, compression) as sink:
+            rows = _write_batches(batches, fmt, sink)
+        return {"format": fmt, "compression": compression, "rows": rows, "manifest": recorder.save(fmt)}
+
+    ext = export_extension(fmt, {"compression": compression})[0]
+    workdir = tempfile.mkdtemp(prefix=".chunks-", dir=os.path.dirname(path) or None)
+    try:
+        chunks: List[Dict] = []
+        for n, chunk in enumerate(_split_batches(batches, int(chunk_rows)), start=1):
+            entry: Dict = {"file": f"rules-{n:05d}.{ext}"}
+            chunk_path = os.path.join(workdir, entry["file"])
+            with _open_sink(chunk_path, compression) as sink:
+                entry["rows"] = _write_batches(_id_range(chunk, entry), fmt, sink)
+            entry["bytes"] = os.path.getsize(chunk_path)
+            entry["sha256"] = _sha256(chunk_path)
+            chunks.append(entry)
+        manifest = {
+            "format": fmt,
+            "compression": compression,
+            "chunk_rows": int(chunk_rows),
+            "total_rows": sum(c["rows"] for c in chunks),
+            "created_at": time.time(),
+            "chunks": chunks,
+        }
+        # Chunks are already compressed (or meant to be read as-is), so the zip only stores them
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+            zf.writestr(MANIFEST_NAME, json.dumps(manifest, indent=2))
+            for c in chunks:
+                zf.write(os.path.join(workdir, c["file"]), c["file"])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {"format": fmt, "compression": compression, "rows": manifest["total_rows"], "chunks": len(chunks),
+            "manifest": recorder.save(fmt)}
+
+
+def write_delta(repo, fmt: str, path: str, since: str, compression: Optional[str] = None, **filters) -> Dict:
+    """Write the changes to the rules matching ``filters`` since export manifest ``since`` to ``path``.
+
+    Records are ordered adds/changes by ID, then delete tombstones. A new
+    manifest for the resulting state is recorded and returned as "manifest",
+    so the next delta can be taken against it. Raises ValueError for an
+    unknown manifest or a columnar format.
+    """
+    if fmt not in DELTA_FORMATS:
+        raise ValueError(f"Delta exports support {', '.join(DELTA_FORMATS)}, not {fmt}")
+    upserts, deleted, recorder = compute_delta(repo, since, **filters)
+    records = [DeltaRecord(op, rule.id, rule) for op, rule in upserts]
+    records += [DeltaRecord("delete", rule_id) for rule_id in deleted]
+    with _open_sink(path, compression) as sink:
+        _write_text(records, fmt, sink, DELTA_FIELDNAMES if fmt == "csv" else FIELDNAMES)
+    counts = {op: sum(1 for r in records if r.op == op) for op in ("add", "change", "delete")}
+    manifest = recorder.save(fmt, kind="delta", base=since, changes=counts)
+    return {"format": fmt, "compression": compression, "rows": len(records), "since": since,
+            "changes": counts, "manifest": manifest}
+
+
+def export_file(repo, fmt: str, options: Optional[Dict] = None, build: bool = True) -> Optional[Dict]:
+    """Cached export of the current rule set: {"path", "bytes", "format", "rows", ...}.
+
+    ``options`` may set "connection" to export only that connection's rules,
+    "compression" ("gzip" or "xz") and "chunk_rows", or "since" (a manifest
+    ID) for a delta export, which ignores "chunk_rows". Reruns and format
+    switches reuse the cached file; any rule write changes the key. With
+    ``build=False`` a miss returns None instead of writing.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    options = {k: v for k, v in (options or {}).items() if v}
+    if options.get("since"):
+        options.pop("chunk_rows", None)
+    key = export_key(repo, fmt, options)
+    if not build:
+        return cached_export(key)
+    ext = export_extension(fmt, options)[0]
+    scope = {"connection": options["connection"]} if options.get("connection") else {}
+    if options.get("since"):
+        return store_export(
+            key,
+            lambda path: write_delta(repo, fmt, path, options["since"], options.get("compression"), **scope),
+            suffix=f".{ext}",
+        )
+    return store_export(
+        key,
+        lambda path: write_export(repo, fmt, path, options.get("compression"), options.get("chunk_rows"), **scope),
+        suffix=f".{ext}",
+    )
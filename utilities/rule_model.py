@@ -0,0 +1,153 @@
+"""Typed rule model.
+
+Provides:
+- Action: interned integer enum for Allow / Block / Mask with UI labels
+- Rule: compact ``__slots__`` record with integer priority and stable ID
+- parse_columns(value): a masked-column list from "a, b" text or a sequence
+
+Rule keeps a dict-like ``get``/``[]`` so page templates can read fields the
+same way they did when rules were plain dicts; ``to_dict`` produces the
+plain form used for exports.
+"""
+from enum import IntEnum
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+
+class Action(IntEnum):
+    ALLOW = 1
+    BLOCK = 2
+    MASK = 3
+
+    @property
+    def title(self) -> str:
+        return self.name.capitalize()
+
+    @property
+    def label(self) -> str:
+        """Label used by the segmented controls, e.g. "✅ Allow"."""
+        return ACTION_LABELS[self]
+
+    @property
+    def color(self) -> str:
+        return ACTION_COLORS[self]
+
+    def __str__(self) -> str:
+        return self.title
+
+    def __format__(self, spec: str) -> str:
+        return format(self.title, spec)
+
+    @classmethod
+    def parse(cls, value: Union["Action", int, str, None]) -> Optional["Action"]:
+        """Accept an Action, its int value, its name (any case) or a UI label ("🎭 Mask").
+
+        Text must match one of those exactly (surrounding spaces aside), so
+        values such as "Disallow" raise ValueError instead of guessing.
+        """
+        if value is None or value == "":
+            return None
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, int):
+            return cls(value)
+        action = ACTION_ALIASES.get(str(value).strip().upper())
+        if action is None:
+            raise ValueError(f"Unknown rule action: {value!r}")
+        return action
+
+
+ACTION_LABELS: Dict[Action, str] = {Action.ALLOW: "✅ Allow", Action.BLOCK: "🚫 Block", Action.MASK: "🎭 Mask"}
+# Accepted spellings, upper-cased: enum names and UI labels
+ACTION_ALIASES: Dict[str, Action] = {
+    **{a.name: a for a in Action},
+    **{label.upper(): a for a, label in ACTION_LABELS.items()},
+}
+ACTION_COLORS: Dict[Action, str] = {Action.ALLOW: "#1F8A70", Action.BLOCK: "#B91C1C", Action.MASK: "#B7791F"}
+DEFAULT_COLOR = "#6B7280"
+
+
+def parse_columns(value: Union[str, Iterable[str], None]) -> List[str]:
+    """Column names from "ssn, email" (brackets allowed) or a list, without duplicates."""
+    if not value:
+        return []
+    parts = value.split(",") if isinstance(value, str) else list(value)
+    out: List[str] = []
+    for part in parts:
+        name = str(part).strip()
+        if name.startswith("[") and name.endswith("]"):
+            name = name[1:-1].replace("]]", "]")
+        if name and name.lower() not in {c.lower() for c in out}:
+            out.append(name)
+    return out
+
+
+class Rule:
+    __slots__ = (
+        "id",
+        "name",
+        "schema",
+        "table",
+        "condition",
+        "action",
+        "mask_columns",
+        "priority",
+        "connection",
+        "created_at",
+        "updated_at",
+    )
+
+    def __init__(
+        self,
+        id: Optional[int] = None,
+        name: str = "",
+        schema: Optional[str] = None,
+        table: Optional[str] = None,
+        condition: Optional[str] = None,
+        action: Union[Action, int, str, None] = None,
+        mask_columns: Union[str, Iterable[str], None] = None,
+        priority: Optional[int] = None,
+        connection: Optional[str] = None,
+        created_at: Optional[float] = None,
+        updated_at: Optional[float] = None,
+    ) -> None:
+        self.id = int(id) if id is not None else None
+        self.name = name
+        self.schema = schema
+        self.table = table
+        self.condition = condition
+        self.action = Action.parse(action)
+        self.mask_columns = ", ".join(parse_columns(mask_columns)) or None
+        self.priority = int(priority) if priority is not None and priority != "" else None
+        self.connection = connection
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Rule":
+        return cls(**{k: data.get(k) for k in cls.__slots__ if k in data})
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = {k: getattr(self, k) for k in self.__slots__}
+        out["action"] = self.action.title if self.action is not None else None
+        return out
+
+    @property
+    def masked_columns(self) -> List[str]:
+        """Columns a Mask rule overwrites (its condition only selects the rows)."""
+        return parse_columns(self.mask_columns)
+
+    # Dict-style access for templates written against plain dict rules
+    def get(self, key: str, default: Any = None) -> Any:
+        val = getattr(self, key, None) if key in self.__slots__ else None
+        return default if val is None else val
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Rule) and all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"Rule(id={self.id!r}, name={self.name!r}, action={self.action!s}, priority={self.priority!r})"
@@ -0,0 +1,240 @@
+"""Set-based enforcement planner for rules.
+
+Provides:
+- build_plan(rules, mask_value, columns_of): group rules by (connection,
+  schema, table) and produce one statement per table
+- explain(plan): human-readable plan with rule order, SQL and warnings
+- plan_script(plan): the whole plan as one T-SQL script
+- execute_plan(plan, connection): create each table's view on the pooled
+  connection
+
+Within a table, rules are applied in priority order (lower first, ties by
+ID) and the first matching rule decides for a row: an Allow exempts the
+row from every later rule. Enforcement never changes the base table: each
+table gets one ``<table>_enforced`` view whose select list replaces every
+masked column (the rule's explicit mask_columns; the condition only
+selects rows) with a CASE expression, and whose WHERE clause drops blocked
+rows. The table is read once however many rules target it.
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utilities.rule_condition import ConditionError, compile_condition, table_column_list
+from utilities.rule_model import Action, Rule
+
+
+DEFAULT_MASK_VALUE = "NULL"  # SQL expression shown in place of masked values
+TRUE_SQL = "1 = 1"
+VIEW_SUFFIX = "_enforced"  # the view each table's rules are enforced through
+
+
+def _quote(name: str) -> str:
+    return "[" + name.replace("]", "]]") + "]"
+
+
+class TablePlan:
+    __slots__ = ("connection", "schema", "table", "rules", "masks", "blocks", "sql", "warnings")
+
+    def __init__(self, connection: Optional[str], schema: str, table: str) -> None:
+        self.connection = connection
+        self.schema = schema
+        self.table = table
+        self.rules: List[Rule] = []  # enforcement order
+        self.masks: Dict[str, str] = {}  # column -> CASE expression
+        self.blocks: Optional[str] = None  # combined block predicate
+        self.sql: Optional[str] = None  # the CREATE OR ALTER VIEW statement
+        self.warnings: List[str] = []
+
+    @property
+    def target(self) -> str:
+        return f"{_quote(self.schema)}.{_quote(self.table)}"
+
+    @property
+    def view(self) -> str:
+        return f"{_quote(self.schema)}.{_quote(self.table + VIEW_SUFFIX)}"
+
+
+def _scope_key(rule: Rule) -> Tuple:
+    return (rule.connection or "", (rule.schema or "dbo").lower(), (rule.table or "").lower())
+
+
+def _condition_sql(rule: Rule) -> str:
+    return compile_condition(rule.condition).sql or TRUE_SQL
+
+
+def _any(preds: List[str]) -> str:
+    return preds[0] if len(preds) == 1 else "(" + " OR ".join(preds) + ")"
+
+
+def _plan_table(tp: TablePlan, mask_value: str, columns: Optional[List[str]]) -> None:
+    # Table spelling of each column, so the view keeps the table's names
+    known = {c.lower(): c for c in columns or []}
+    # Walk rules in priority order, building first-match CASE branches
+    mask_branches: Dict[str, List[Tuple[str, str]]] = {}  # column -> [(pred, result)]
+    block_branches: List[Tuple[str, str]] = []
+    allows: List[str] = []
+    for rule in tp.rules:
+        pred = _condition_sql(rule)
+        if rule.action is Action.ALLOW:
+            allows.append(pred)
+            for branches in mask_branches.values():
+                branches.append((pred, "keep"))
+            block_branches.append((pred, "0"))
+        elif rule.action is Action.BLOCK:
+            block_branches.append((pred, "1"))
+        elif rule.action is Action.MASK:
+            masked = rule.masked_columns
+            if not masked:
+                tp.warnings.append(f"Rule #{rule.id} '{rule.name}': Mask rule lists no columns to mask; skipped")
+                continue
+            if columns:
+                unknown = [c for c in masked if c.lower() not in known]
+                if unknown:
+                    tp.warnings.append(f"Rule #{rule.id} '{rule.name}': mask column(s) not on {tp.target}: "
+                                       f"{', '.join(unknown)}; skipped")
+                    masked = [c for c in masked if c.lower() in known]
+            for col in masked:
+                # Earlier allows also take precedence for a column first masked here
+                branches = mask_branches.setdefault(col.lower(), [(a, "keep") for a in allows])
+                branches.append((pred, "mask"))
+        else:
+            tp.warnings.append(f"Rule #{rule.id} '{rule.name}': no action set; skipped")
+
+    names = {c.lower(): c for r in tp.rules for c in r.masked_columns}
+    names.update(known)
+    for key, branches in sorted(mask_branches.items()):
+        col = _quote(names[key])
+        # Trailing "keep" branches are the same as ELSE
+        while branches and branches[-1][1] == "keep":
+            branches.pop()
+        whens = " ".join(f"WHEN {p} THEN {col if r == 'keep' else mask_value}" for p, r in branches)
+        tp.masks[names[key]] = f"CASE {whens} ELSE {col} END"
+
+    while block_branches and block_branches[-1][1] == "0":
+        block_branches.pop()
+    block_case = None  # 1 for a blocked row, 0 otherwise (never NULL)
+    if block_branches:
+        if all(r == "1" for _, r in block_branches):
+            tp.blocks = _any([p for p, _ in block_branches])
+            block_case = f"CASE WHEN {tp.blocks} THEN 1 ELSE 0 END"
+        else:
+            # Merge consecutive branches with the same outcome into one WHEN
+            merged: List[Tuple[List[str], str]] = []
+            for p, r in block_branches:
+                if merged and merged[-1][1] == r:
+                    merged[-1][0].append(p)
+                else:
+                    merged.append(([p], r))
+            whens = " ".join(f"WHEN {_any(ps)} THEN {r}" for ps, r in merged)
+            block_case = f"CASE {whens} ELSE 0 END"
+            tp.blocks = f"{block_case} = 1"
+
+    if tp.masks and not columns:
+        # Masked columns are replaced in the select list, which needs every column of the table
+        reason = "was not found" if columns is not None else "could not be read"
+        tp.warnings.append(f"{tp.target} {reason}; no view planned (masks need the table's column list)")
+        return
+    if not tp.masks and not tp.blocks:
+        return
+    if tp.masks:
+        masks = {c.lower(): expr for c, expr in tp.masks.items()}
+        select = ",\n       ".join(
+            f"{masks[c.lower()]} AS {_quote(c)}" if c.lower() in masks else _quote(c) for c in columns
+        )
+    else:
+        select = "*"
+    # A row is hidden only when a block predicate is TRUE; NULL (unknown) keeps it
+    where = f"\nWHERE {block_case} = 0" if block_case else ""
+    tp.sql = f"CREATE OR ALTER VIEW {tp.view} AS\nSELECT {select}\nFROM {tp.target}{where};"
+
+
+def build_plan(
+    rules: Iterable[Rule],
+    mask_value: str = DEFAULT_MASK_VALUE,
+    columns_of: Callable[[Optional[str], str, str], Optional[List[str]]] = table_column_list,
+) -> List[TablePlan]:
+    """One TablePlan per (connection, schema, table), in a stable order.
+
+    ``columns_of(connection, schema, table)`` returns the table's columns in
+    order (None if unknown); tables with masks need it for the view's
+    select list, and mask columns the table lacks are skipped with a warning.
+    """
+    plans: Dict[Tuple, TablePlan] = {}
+    unscoped: List[Rule] = []
+    for rule in rules:
+        if not (rule.table or "").strip():
+            unscoped.append(rule)
+            continue
+        key = _scope_key(rule)
+        tp = plans.get(key)
+        if tp is None:
+            tp = plans[key] = TablePlan(rule.connection, rule.schema or "dbo", rule.table)
+        try:
+            compile_condition(rule.condition)
+        except ConditionError as e:
+            tp.warnings.append(f"Rule #{rule.id} '{rule.name}': {e}; skipped")
+            continue
+        tp.rules.append(rule)
+
+    out = []
+    for key in sorted(plans):
+        tp = plans[key]
+        tp.rules.sort(key=lambda r: (r.priority if r.priority is not None else 0, r.id or 0))
+        # Only masks need the column list; block-only views select *
+        has_masks = any(r.action is Action.MASK and r.masked_columns for r in tp.rules)
+        _plan_table(tp, mask_value, columns_of(tp.connection, tp.schema, tp.table) if has_masks else None)
+        out.append(tp)
+    if unscoped and out:
+        out[0].warnings.append(f"{len(unscoped)} rule(s) without a target table were not planned")
+    return out
+
+
+def explain(plan: List[TablePlan]) -> str:
+    lines: List[str] = []
+    for n, tp in enumerate(plan, 1):
+        lines.append(f"[{n}] {tp.connection or '(no connection)'} :: {tp.target}  —  {'VIEW' if tp.sql else 'no statement'}")
+        for rule in tp.rules:
+            cond = compile_condition(rule.condition).sql or "(all rows)"
+            prio = rule.priority if rule.priority is not None else "-"
+            lines.append(f"    priority {prio!s:<4} #{rule.id!s:<6} {rule.action!s:<5}  {rule.name}  WHERE {cond}")
+        for col in tp.masks:
+            lines.append(f"    mask column {_quote(col)}")
+        if tp.blocks:
+            lines.append(f"    block predicate: {tp.blocks}  (rows hidden from {tp.view})")
+        for w in tp.warnings:
+            lines.append(f"    ! {w}")
+        if tp.sql:
+            lines.extend("    | " + line for line in tp.sql.splitlines())
+        lines.append("")
+    return "\n".join(lines) if lines else "No rules to plan."
+
+
+def plan_script(plan: List[TablePlan]) -> str:
+    parts = []
+    for tp in plan:
+        if tp.sql:
+            parts.append(f"-- {tp.connection or '(no connection)'} :: {tp.target} ({len(tp.rules)} rule(s))\n{tp.sql}\nGO")
+    return "\n\n".join(parts) + "\n"
+
+
+def execute_plan(plan: List[TablePlan], connection: str) -> List[Tuple[str, bool, str]]:
+    """Create or alter the views planned for ``connection``; returns (view, ok, message) per table."""
+    from utilities.conn_pool import pooled_connection
+    results: List[Tuple[str, bool, str]] = []
+    for tp in plan:
+        if not tp.sql or (tp.connection or "") != (connection or ""):
+            continue
+        try:
+            with pooled_connection(connection) as conn:
+                cur = conn.cursor()
+                try:
+                    cur.execute(tp.sql)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    cur.close()
+            results.append((tp.view, True, f"View {tp.view} created over {tp.target}"))
+        except Exception as e:
+            results.append((tp.view, False, str(e)))
+    return results
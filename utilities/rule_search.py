@@ -0,0 +1,160 @@
+"""Inverted-index search over rules.
+
+Provides:
+- RuleSearchIndex: tokenized index over name/schema/table/action/condition
+  with exact, prefix and single-edit fuzzy matching and ranked results
+- get_rule_search_index(repo, connection): the index over one connection's
+  rules, kept in sync with a RuleRepository
+
+The index is updated incrementally from repository write notifications and
+rebuilt only when the store version shows a write from another process.
+"""
+import bisect
+import re
+from typing import Dict, List, Optional, Set
+
+from utilities.rule_model import Rule
+from utilities.rule_store import DerivedView, rules_from_rows
+
+
+# Field weights: a hit in the rule name matters more than one in the condition
+FIELD_WEIGHTS: Dict[str, float] = {"name": 3.0, "table": 2.0, "schema": 2.0, "action": 1.5, "condition": 1.0}
+EXACT, PREFIX, FUZZY = 1.0, 0.6, 0.3
+FUZZY_MIN_LEN = 4  # shorter tokens are too ambiguous to fuzz
+
+_TOKEN_RE = re.compile(r"[0-9a-z_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case alphanumeric tokens; snake_case words also yield their parts."""
+    out: List[str] = []
+    for tok in _TOKEN_RE.findall(str(text or "").lower()):
+        out.append(tok)
+        if "_" in tok:
+            out.extend(p for p in tok.split("_") if p)
+    return out
+
+
+def _deletes(token: str) -> Set[str]:
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+class RuleSearchIndex(DerivedView):
+    def __init__(self, connection: Optional[str] = None) -> None:
+        super().__init__(connection)
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._docs: Dict[int, Dict[str, float]] = {}
+        self._vocab: List[str] = []  # sorted, for prefix scans
+        self._delete_map: Dict[str, Set[str]] = {}  # single-deletion variant -> tokens
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # --- Maintenance ---
+    def add(self, rule: Rule) -> None:
+        rule_id = rule.id
+        weights: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for tok in tokenize(getattr(rule, field)):
+                weights[tok] = max(weights.get(tok, 0.0), weight)
+        with self._lock:
+            self.remove(rule_id)
+            self._docs[rule_id] = weights
+            for tok, weight in weights.items():
+                posting = self._postings.get(tok)
+                if posting is None:
+                    posting = self._postings[tok] = {}
+                    bisect.insort(self._vocab, tok)
+                    if len(tok) >= FUZZY_MIN_LEN:
+                        for d in _deletes(tok):
+                            self._delete_map.setdefault(d, set()).add(tok)
+                posting[rule_id] = weight
+
+    def remove(self, rule_id: int) -> None:
+        with self._lock:
+            weights = self._docs.pop(int(rule_id), None)
+            if not weights:
+                return
+            for tok in weights:
+                posting = self._postings.get(tok)
+                if posting is None:
+                    continue
+                posting.pop(int(rule_id), None)
+                if not posting:
+                    del self._postings[tok]
+                    i = bisect.bisect_left(self._vocab, tok)
+                    if i < len(self._vocab) and self._vocab[i] == tok:
+                        self._vocab.pop(i)
+                    if len(tok) >= FUZZY_MIN_LEN:
+                        for d in _deletes(tok):
+                            variants = self._delete_map.get(d)
+                            if variants:
+                                variants.discard(tok)
+                                if not variants:
+                                    del self._delete_map[d]
+
+    def apply(self, event: str, rule_id: int, rule: Optional[Rule]) -> None:
+        if event == "delete" or rule is None:
+            self.remove(rule_id)
+        else:
+            self.add(rule)
+
+    def rebuild(self, repo) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._docs.clear()
+            self._vocab.clear()
+            self._delete_map.clear()
+            for cols, rows in repo.iter_rows(connection=self.connection):
+                for rule in rules_from_rows(cols, rows):
+                    self.add(rule)
+
+    # --- Query ---
+    def _term_matches(self, term: str) -> Dict[str, float]:
+        """Vocabulary tokens matching ``term`` with their match-quality factor."""
+        matches: Dict[str, float] = {}
+        if term in self._postings:
+            matches[term] = EXACT
+        i = bisect.bisect_left(self._vocab, term)
+        while i < len(self._vocab) and self._vocab[i].startswith(term):
+            matches.setdefault(self._vocab[i], PREFIX)
+            i += 1
+        if not matches and len(term) >= FUZZY_MIN_LEN:
+            # Insertion, deletion and substitution at edit distance 1
+            candidates = set(self._delete_map.get(term, ()))
+            term_deletes = _deletes(term)
+            candidates.update(d for d in term_deletes if d in self._postings)
+            for d in term_deletes:
+                candidates.update(self._delete_map.get(d, ()))
+            for tok in candidates:
+                matches.setdefault(tok, FUZZY)
+        return matches
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """Rule IDs matching every query term, best score first (ties by ID)."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            scores: Optional[Dict[int, float]] = None
+            for term in terms:
+                term_scores: Dict[int, float] = {}
+                for tok, quality in self._term_matches(term).items():
+                    for rule_id, weight in self._postings[tok].items():
+                        s = quality * weight
+                        if s > term_scores.get(rule_id, 0.0):
+                            term_scores[rule_id] = s
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {rid: sc + term_scores[rid] for rid, sc in scores.items() if rid in term_scores}
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        ids = [rid for rid, _ in ranked]
+        return ids[:limit] if limit is not None else ids
+
+
+def get_rule_search_index(repo, connection: Optional[str] = None) -> RuleSearchIndex:
+    """Return the search index for ``connection``'s rules, rebuilding it if another process wrote rules."""
+    return repo.view(RuleSearchIndex, connection)
@@ -0,0 +1,117 @@
+"""Incrementally maintained rule aggregates.
+
+Provides:
+- RuleStats: counters by action, connection, schema and table plus a
+  recency list, updated on every repository write
+- get_rule_stats(repo, connection): the RuleStats view for a repository,
+  limited to one connection's rules
+
+Pages read O(1) summaries from here instead of scanning the rule set. A
+rebuild runs one GROUP BY per dimension and reads only the recency window,
+never the rules themselves.
+"""
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from utilities.rule_model import Rule
+from utilities.rule_store import DerivedView
+
+
+RECENT_SIZE = 20
+DIMENSIONS = ("action", "connection", "schema", "table")
+
+
+class RuleStats(DerivedView):
+    def __init__(self, connection: Optional[str] = None) -> None:
+        super().__init__(connection)
+        self._total = 0
+        self._counters: Dict[str, Counter] = {dim: Counter() for dim in DIMENSIONS}
+        # Dimension values of rules written since the last rebuild, so their
+        # updates and deletes can decrement the right buckets
+        self._keys: Dict[int, Tuple] = {}
+        # Set when an older rule changed; its previous buckets are unknown, so recount on next read
+        self._counts_stale = False
+        self._recent: Deque[Rule] = deque(maxlen=RECENT_SIZE)  # newest first
+        self._recent_stale = False
+        self._repo = None
+
+    # --- Maintenance ---
+    def _count(self, rule_id: int, rule: Optional[Rule], sign: int) -> None:
+        key = tuple(getattr(rule, dim) for dim in DIMENSIONS) if rule is not None else self._keys.get(rule_id)
+        if key is None:
+            self._counts_stale = True
+            return
+        for dim, value in zip(DIMENSIONS, key):
+            counter = self._counters[dim]
+            counter[value] += sign
+            if counter[value] <= 0:
+                del counter[value]
+        self._total += sign
+        if sign > 0:
+            self._keys[rule_id] = key
+        else:
+            self._keys.pop(rule_id, None)
+
+    def apply(self, event: str, rule_id: int, rule: Optional[Rule]) -> None:
+        # An "add" for an ID already counted replaces it, so replays are harmless
+        if event in ("update", "delete") or rule_id in self._keys:
+            self._count(rule_id, None, -1)
+        if event in ("add", "update") and rule is not None:
+            self._count(rule_id, rule, +1)
+
+        if any(r.id == rule_id for r in self._recent):
+            if event != "delete" and rule is not None:
+                self._recent = deque((rule if r.id == rule_id else r for r in self._recent), maxlen=RECENT_SIZE)
+            else:
+                self._recent = deque((r for r in self._recent if r.id != rule_id), maxlen=RECENT_SIZE)
+                # An older rule now belongs in the window; refill on next read
+                self._recent_stale = True
+        elif event == "add" and rule is not None:
+            self._recent.appendleft(rule)
+
+    def rebuild(self, repo) -> None:
+        self._repo = repo
+        self._keys.clear()
+        self._recount()
+        self._refill_recent()
+
+    def _recount(self) -> None:
+        for dim in DIMENSIONS:
+            self._counters[dim] = Counter(self._repo.count_by(dim, connection=self.connection))
+        self._total = sum(self._counters["action"].values())
+        self._counts_stale = False
+
+    def _refill_recent(self) -> None:
+        self._recent = deque(
+            self._repo.list(order_by="id", descending=True, limit=RECENT_SIZE, connection=self.connection),
+            maxlen=RECENT_SIZE,
+        )
+        self._recent_stale = False
+
+    # --- Reads ---
+    def _fresh_counts(self) -> None:
+        if self._counts_stale and self._repo is not None:
+            self._recount()
+
+    @property
+    def total(self) -> int:
+        with self._lock:
+            self._fresh_counts()
+            return self._total
+
+    def by(self, dimension: str) -> Dict:
+        """Counts per value of ``dimension`` (action, connection, schema or table); actions are keyed by Action."""
+        with self._lock:
+            self._fresh_counts()
+            return dict(self._counters[dimension])
+
+    def recent(self, n: int = 5) -> List[Rule]:
+        """The ``n`` most recently created rules, newest first (n <= RECENT_SIZE)."""
+        with self._lock:
+            if self._recent_stale and self._repo is not None:
+                self._refill_recent()
+            return list(self._recent)[:n]
+
+
+def get_rule_stats(repo, connection: Optional[str] = None) -> RuleStats:
+    return repo.view(RuleStats, connection)
@@ -0,0 +1,597 @@
+"""Persistent, indexed rule repository.
+
+Provides:
+- RuleRepository: CRUD by stable integer ID plus indexed filtering on
+  connection, schema, table, action and priority
+- DerivedView: base for in-memory views (search index, statistics) that are
+  updated from write notifications and rebuilt when another process wrote
+- get_rule_repository(connection_name): the repository selected by the
+  [rules].backend setting in config.toml
+
+Rules are returned as utilities.rule_model.Rule records (id, name, schema,
+table, condition, action, mask_columns, priority, connection, created_at,
+updated_at);
+writes accept a Rule or a plain dict with those keys. Actions are stored by
+canonical name ("Allow", "Block", "Mask") whatever label the UI passed in.
+Every write bumps a store-wide version counter so callers can
+cache anything derived from the rule set, and in-process subscribers are
+told about each insert, update and delete as it happens. Each row also
+keeps the version of its last write (row_version), which is what delta
+exports read changes by.
+"""
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+from contextlib import contextmanager
+from itertools import repeat
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utilities.conn_manager import APP_DIR, load_app_config
+from utilities.rule_model import Action, Rule, parse_columns
+
+
+RULES_DB_FILE = os.path.join(APP_DIR, "rules.db")
+RULES_TABLE = "erm_rules"
+META_TABLE = "erm_rule_meta"
+
+# Rule dict key -> column name (schema/table are avoided as bare column names)
+COLUMNS: Dict[str, str] = {
+    "name": "name",
+    "schema": "schema_name",
+    "table": "table_name",
+    "condition": "condition",
+    "action": "action",
+    "mask_columns": "mask_columns",
+    "priority": "priority",
+    "connection": "connection",
+}
+SORTABLE = {"id", "name", "priority", "created_at", "updated_at"}
+
+_SQLITE_DDL = [
+    f"""CREATE TABLE IF NOT EXISTS {RULES_TABLE} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        schema_name TEXT,
+        table_name TEXT,
+        condition TEXT,
+        action TEXT,
+        mask_columns TEXT,
+        priority INTEGER,
+        connection TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        row_version INTEGER NOT NULL DEFAULT 0
+    )""",
+    f"CREATE TABLE IF NOT EXISTS {META_TABLE} (k TEXT PRIMARY KEY, v INTEGER NOT NULL)",
+    f"CREATE INDEX IF NOT EXISTS ix_{RULES_TABLE}_connection ON {RULES_TABLE} (connection)",
+    f"CREATE INDEX IF NOT EXISTS ix_{RULES_TABLE}_scope ON {RULES_TABLE} (schema_name, table_name)",
+    f"CREATE INDEX IF NOT EXISTS ix_{RULES_TABLE}_action ON {RULES_TABLE} (action)",
+    f"CREATE INDEX IF NOT EXISTS ix_{RULES_TABLE}_priority ON {RULES_TABLE} (priority)",
+]
+
+_MSSQL_DDL = [
+    f"""IF OBJECT_ID('dbo.{RULES_TABLE}', 'U') IS NULL
+    CREATE TABLE dbo.{RULES_TABLE} (
+        id INT IDENTITY(1,1) PRIMARY KEY,
+        name NVARCHAR(400) NOT NULL,
+        schema_name NVARCHAR(128) NULL,
+        table_name NVARCHAR(128) NULL,
+        condition NVARCHAR(MAX) NULL,
+        action NVARCHAR(32) NULL,
+        mask_columns NVARCHAR(MAX) NULL,
+        priority INT NULL,
+        connection NVARCHAR(200) NULL,
+        created_at FLOAT NOT NULL,
+        updated_at FLOAT NOT NULL,
+        row_version BIGINT NOT NULL DEFAULT 0
+    )""",
+    f"""IF OBJECT_ID('dbo.{META_TABLE}', 'U') IS NULL
+    CREATE TABLE dbo.{META_TABLE} (k NVARCHAR(64) PRIMARY KEY, v BIGINT NOT NULL)""",
+    # Stores created before masked-column lists existed
+    f"""IF COL_LENGTH('dbo.{RULES_TABLE}', 'mask_columns') IS NULL
+    ALTER TABLE dbo.{RULES_TABLE} ADD mask_columns NVARCHAR(MAX) NULL""",
+    # Stores created before delta exports read changes by row version
+    f"""IF COL_LENGTH('dbo.{RULES_TABLE}', 'row_version') IS NULL
+    ALTER TABLE dbo.{RULES_TABLE} ADD row_version BIGINT NOT NULL DEFAULT 0""",
+] + [
+    f"""IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_{RULES_TABLE}_{suffix}')
+    CREATE INDEX ix_{RULES_TABLE}_{suffix} ON dbo.{RULES_TABLE} ({cols})"""
+    for suffix, cols in (
+        ("connection", "connection"),
+        ("scope", "schema_name, table_name"),
+        ("action", "action"),
+        ("priority", "priority"),
+        ("row_version", "row_version"),
+    )
+]
+
+
+class DerivedView(ABC):
+    """In-memory structure derived from a repository's rules.
+
+    Subclasses implement ``apply`` (one write) and ``rebuild`` (from scratch).
+    Obtain instances through ``RuleRepository.view(cls, connection)``, which
+    subscribes them to writes and resyncs whenever the store version moved
+    without them. A view scoped to a connection only sees that connection's
+    rules (``rebuild`` passes ``connection=self.connection`` to its reads);
+    None means every rule in the store.
+    """
+
+    # Rebuilds attempted per sync while other writers keep moving the version
+    SYNC_ATTEMPTS = 3
+
+    def __init__(self, connection: Optional[str] = None) -> None:
+        self._lock = threading.RLock()
+        self.connection = connection
+        self.version: Optional[int] = None  # repository version the view reflects
+
+    @abstractmethod
+    def apply(self, event: str, rule_id: int, rule: Optional[Rule]) -> None:
+        """Fold one write into the view."""
+
+    @abstractmethod
+    def rebuild(self, repo: "RuleRepository") -> None:
+        """Recompute the view from every rule in ``repo``."""
+
+    def on_write(self, event: str, rule_id: int, rule: Optional[Rule], version: int) -> None:
+        with self._lock:
+            if self.version is not None and version <= self.version:
+                # Committed before a rebuild read the rules, so it is already reflected
+                return
+            if self.version is None or version != self.version + 1:
+                # Missed a write (e.g. from another process); resync on next use
+                self.version = None
+                return
+            if self.connection is not None and rule is not None and rule.connection != self.connection:
+                # Outside this view's scope, or just moved out of it by an update
+                event, rule = "delete", None
+            self.apply(event, rule_id, rule)
+            self.version = version
+
+    def sync(self, repo: "RuleRepository") -> None:
+        with self._lock:
+            for _ in range(self.SYNC_ATTEMPTS):
+                current = repo.version()
+                if self.version == current:
+                    return
+                self.rebuild(repo)
+                # A write that committed while rebuild() was reading may or may not
+                # be in the result; only claim the version if nothing moved.
+                if repo.version() == current:
+                    self.version = current
+                    return
+            self.version = None
+
+
+class RuleRepository:
+    """Rule CRUD over a DB-API connection using ``?`` parameters.
+
+    ``dialect`` is "sqlite" or "mssql"; the two differ only in DDL, how the
+    new ID is returned and how pages of results are requested.
+    """
+
+    def __init__(self, connect: Callable[[], object], dialect: str = "sqlite", store_id: Optional[str] = None) -> None:
+        if dialect not in ("sqlite", "mssql"):
+            raise ValueError(f"Unsupported rule store dialect: {dialect}")
+        self._connect = connect
+        self.dialect = dialect
+        # Identifies the underlying store, so (store_id, version()) names one rule-set state
+        self.store_id = store_id or f"{dialect}:{id(self)}"
+        self._table = RULES_TABLE if dialect == "sqlite" else f"dbo.{RULES_TABLE}"
+        self._meta = META_TABLE if dialect == "sqlite" else f"dbo.{META_TABLE}"
+        self._listeners: List[Callable[[str, int, Optional[Rule], int], None]] = []
+        self._views: Dict[Tuple[type, Optional[str]], DerivedView] = {}
+        self._views_lock = threading.Lock()
+        self._ensure_schema()
+
+    # --- Connection handling ---
+    @contextmanager
+    def _cursor(self, write: bool = False) -> Iterator[object]:
+        with self._connect() as conn:
+            cur = conn.cursor()
+            try:
+                yield cur
+                if write:
+                    conn.commit()
+            except Exception:
+                if write:
+                    conn.rollback()
+                raise
+            finally:
+                cur.close()
+
+    def _ensure_schema(self) -> None:
+        with self._cursor(write=True) as cur:
+            for stmt in _SQLITE_DDL if self.dialect == "sqlite" else _MSSQL_DDL:
+                cur.execute(stmt)
+            if self.dialect == "sqlite":
+                cur.execute(f"PRAGMA table_info({RULES_TABLE})")
+                existing = {row[1] for row in cur.fetchall()}
+                if "mask_columns" not in existing:
+                    cur.execute(f"ALTER TABLE {RULES_TABLE} ADD COLUMN mask_columns TEXT")
+                if "row_version" not in existing:
+                    cur.execute(f"ALTER TABLE {RULES_TABLE} ADD COLUMN row_version INTEGER NOT NULL DEFAULT 0")
+                cur.execute(f"CREATE INDEX IF NOT EXISTS ix_{RULES_TABLE}_row_version ON {RULES_TABLE} (row_version)")
+            self._normalize_actions(cur)
+
+    def _normalize_actions(self, cur) -> None:
+        """Rewrite UI labels such as "✅ Allow" stored by older versions to canonical names."""
+        names = [a.title for a in Action]
+        marks = ", ".join("?" for _ in names)
+        cur.execute(f"SELECT DISTINCT action FROM {self._table} WHERE action IS NOT NULL AND action NOT IN ({marks})", names)
+        legacy = [row[0] for row in cur.fetchall()]
+        for label in legacy:
+            try:
+                action = Action.parse(label)
+            except ValueError:
+                continue
+            cur.execute(f"UPDATE {self._table} SET action = ? WHERE action = ?", [action.title, label])
+
+    # --- Row mapping ---
+    @staticmethod
+    def _row_to_rule(cols: List[str], row) -> Rule:
+        raw = dict(zip(cols, row))
+        return Rule(
+            id=raw["id"],
+            created_at=raw.get("created_at"),
+            updated_at=raw.get("updated_at"),
+            **{key: raw.get(col) for key, col in COLUMNS.items()},
+        )
+
+    def _fetch(self, cur) -> List[Rule]:
+        cols = [d[0] for d in cur.description]
+        return [self._row_to_rule(cols, row) for row in cur.fetchall()]
+
+    @staticmethod
+    def _column_value(key: str, val):
+        if val is None:
+            return None
+        if key == "priority":
+            return int(val)
+        if key == "action":
+            return Action.parse(val).title
+        if key == "mask_columns":
+            return ", ".join(parse_columns(val)) or None
+        return val
+
+    @classmethod
+    def _values(cls, rule) -> List:
+        return [cls._column_value(key, rule.get(key)) for key in COLUMNS]
+
+    def _where(self, filters: Dict) -> (str, List):
+        clauses, params = [], []
+        for key, val in filters.items():
+            if val is None:
+                continue
+            if key not in COLUMNS:
+                raise ValueError(f"Cannot filter rules by '{key}'")
+            clauses.append(f"[{COLUMNS[key]}] = ?")
+            params.append(self._column_value(key, val))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _insert(self, cur, cols: str, marks: str, params: List) -> int:
+        """Insert one row (rule values, created_at, updated_at, row_version); returns its new ID."""
+        head = f"INSERT INTO {self._table} ({cols}, created_at, updated_at, row_version)"
+        if self.dialect == "mssql":
+            cur.execute(f"{head} OUTPUT INSERTED.id VALUES ({marks}, ?, ?, ?)", params)
+            return int(cur.fetchone()[0])
+        cur.execute(f"{head} VALUES ({marks}, ?, ?, ?)", params)
+        return int(cur.lastrowid)
+
+    def _bump_version(self, cur) -> int:
+        """Increment the store version inside the caller's write transaction and return it.
+
+        The version row stays locked until the transaction ends, so writers
+        commit in version order and row_version values never commit out of
+        order the way wall-clock timestamps can.
+        """
+        cur.execute(f"UPDATE {self._meta} SET v = v + 1 WHERE k = 'version'")
+        if cur.rowcount == 0:
+            cur.execute(f"INSERT INTO {self._meta} (k, v) VALUES ('version', 1)")
+        cur.execute(f"SELECT v FROM {self._meta} WHERE k = 'version'")
+        return int(cur.fetchone()[0])
+
+    def subscribe(self, listener: Callable[[str, int, Optional[Rule], int], None]) -> None:
+        """Register ``listener(event, rule_id, rule, version)`` for writes made through this repository.
+
+        ``event`` is "add", "update" or "delete" (``rule`` is None for deletes).
+        Writes from other processes are not seen; compare version() to catch up.
+        """
+        self._listeners.append(listener)
+
+    def view(self, cls: type, connection: Optional[str] = None) -> DerivedView:
+        """Return this repository's instance of a DerivedView subclass for ``connection``, brought up to date."""
+        with self._views_lock:
+            view = self._views.get((cls, connection))
+            if view is None:
+                view = self._views[(cls, connection)] = cls(connection)
+                self.subscribe(view.on_write)
+        view.sync(self)
+        return view
+
+    def _notify(self, event: str, rule_id: int, rule: Optional[Rule], version: int) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(event, rule_id, rule, version)
+            except Exception:
+                # A broken derived view must never fail the write itself
+                pass
+
+    # --- Public operations ---
+    def version(self) -> int:
+        """Store-wide counter bumped by every write (0 for an empty, never-written store)."""
+        with self._cursor() as cur:
+            cur.execute(f"SELECT v FROM {self._meta} WHERE k = 'version'")
+            row = cur.fetchone()
+        return int(row[0]) if row else 0
+
+    def add(self, rule) -> int:
+        if not (rule.get("name") or "").strip():
+            raise ValueError("Rule name is required")
+        now = time.time()
+        cols = ", ".join(f"[{c}]" for c in COLUMNS.values())
+        marks = ", ".join("?" for _ in COLUMNS)
+        with self._cursor(write=True) as cur:
+            version = self._bump_version(cur)
+            new_id = self._insert(cur, cols, marks, self._values(rule) + [now, now, version])
+        stored = Rule(id=new_id, created_at=now, updated_at=now, **dict(zip(COLUMNS, self._values(rule))))
+        self._notify("add", new_id, stored, version)
+        return new_id
+
+    def add_many(self, rules: List) -> List[int]:
+        """Insert many rules in one transaction; returns their new IDs in order.
+
+        The version is still bumped once per rule so derived views can apply
+        each insert incrementally. Nothing is written if any rule lacks a name.
+        """
+        missing = [i for i, r in enumerate(rules, start=1) if not (r.get("name") or "").strip()]
+        if missing:
+            raise ValueError(f"Rule name is required (rows {', '.join(map(str, missing[:10]))})")
+        now = time.time()
+        cols = ", ".join(f"[{c}]" for c in COLUMNS.values())
+        marks = ", ".join("?" for _ in COLUMNS)
+        values = [self._values(r) for r in rules]
+        added: List[Tuple[int, List, int]] = []
+        with self._cursor(write=True) as cur:
+            for vals in values:
+                version = self._bump_version(cur)
+                added.append((self._insert(cur, cols, marks, vals + [now, now, version]), vals, version))
+        for new_id, vals, version in added:
+            stored = Rule(id=new_id, created_at=now, updated_at=now, **dict(zip(COLUMNS, vals)))
+            self._notify("add", new_id, stored, version)
+        return [new_id for new_id, _, _ in added]
+
+    def add_columns(self, columns: Dict[str, Sequence]) -> int:
+        """Bulk-insert rules given column-wise (rule key -> equal-length values); returns the count.
+
+        Values must already be normalized as stored (canonical action names,
+        integer priorities), as utilities.rule_columnar.read_rules_frame
+        produces them. All rows go in with one executemany in one
+        transaction, and the version is bumped once for the whole batch;
+        derived views are not told about each row but resync once on next
+        use. Nothing is written if any rule lacks a name.
+        """
+        unknown = sorted(set(columns) - set(COLUMNS))
+        if unknown:
+            raise ValueError(f"Unknown rule column(s): {', '.join(unknown)}")
+        names = columns.get("name")
+        if names is None:
+            raise ValueError("Rule name is required")
+        missing = [i for i, name in enumerate(names, start=1) if not (name or "").strip()]
+        if missing:
+            raise ValueError(f"Rule name is required (rows {', '.join(map(str, missing[:10]))})")
+        if not len(names):
+            return 0
+        keys = [k for k in COLUMNS if k in columns]
+        now = time.time()
+        cols = ", ".join(f"[{COLUMNS[k]}]" for k in keys)
+        marks = ", ".join("?" for _ in keys)
+        with self._cursor(write=True) as cur:
+            version = self._bump_version(cur)
+            rows = list(zip(*(columns[k] for k in keys), repeat(now), repeat(now), repeat(version)))
+            if self.dialect == "mssql" and hasattr(cur, "fast_executemany"):
+                cur.fast_executemany = True  # one round trip per batch instead of per row
+            cur.executemany(
+                f"INSERT INTO {self._table} ({cols}, created_at, updated_at, row_version) VALUES ({marks}, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def update(self, rule_id: int, fields: Dict) -> bool:
+        changes = {k: v for k, v in fields.items() if k in COLUMNS}
+        if not changes:
+            return False
+        sets = ", ".join(f"[{COLUMNS[k]}] = ?" for k in changes)
+        params = [self._column_value(k, v) for k, v in changes.items()]
+        with self._cursor(write=True) as cur:
+            cur.execute(f"UPDATE {self._table} SET {sets}, updated_at = ? WHERE id = ?", params + [time.time(), int(rule_id)])
+            changed = cur.rowcount > 0
+            if changed:
+                version = self._bump_version(cur)
+                cur.execute(f"UPDATE {self._table} SET row_version = ? WHERE id = ?", [version, int(rule_id)])
+        if changed:
+            self._notify("update", int(rule_id), self.get(rule_id), version)
+        return changed
+
+    def delete(self, rule_id: int) -> bool:
+        with self._cursor(write=True) as cur:
+            cur.execute(f"DELETE FROM {self._table} WHERE id = ?", [int(rule_id)])
+            changed = cur.rowcount > 0
+            if changed:
+                version = self._bump_version(cur)
+        if changed:
+            self._notify("delete", int(rule_id), None, version)
+        return changed
+
+    def get(self, rule_id: int) -> Optional[Rule]:
+        with self._cursor() as cur:
+            cur.execute(f"SELECT * FROM {self._table} WHERE id = ?", [int(rule_id)])
+            rows = self._fetch(cur)
+        return rows[0] if rows else None
+
+    def get_many(self, rule_ids: List[int]) -> List[Rule]:
+        """Rules for ``rule_ids`` in the given order; unknown IDs are skipped."""
+        ids = [int(i) for i in rule_ids]
+        found: Dict[int, Rule] = {}
+        with self._cursor() as cur:
+            # Chunked to stay under driver parameter limits (SQL Server allows 2100)
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                cur.execute(f"SELECT * FROM {self._table} WHERE id IN ({', '.join('?' for _ in chunk)})", chunk)
+                for rule in self._fetch(cur):
+                    found[rule.id] = rule
+        return [found[i] for i in ids if i in found]
+
+    def list(
+        self,
+        order_by: str = "id",
+        descending: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        **filters,
+    ) -> List[Rule]:
+        """Rules matching exact-value ``filters`` (connection, schema, table, action, priority)."""
+        if order_by not in SORTABLE:
+            raise ValueError(f"Cannot sort rules by '{order_by}'")
+        where, params = self._where(filters)
+        order = f" ORDER BY [{order_by}] {'DESC' if descending else 'ASC'}, id {'DESC' if descending else 'ASC'}"
+        sql = f"SELECT * FROM {self._table}{where}{order}"
+        if limit is not None:
+            if self.dialect == "mssql":
+                sql += " OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+                params += [int(offset), int(limit)]
+            else:
+                sql += " LIMIT ? OFFSET ?"
+                params += [int(limit), int(offset)]
+        with self._cursor() as cur:
+            cur.execute(sql, params)
+            return self._fetch(cur)
+
+    def iter_rows(self, batch_size: int = 1000, **filters) -> Iterator[Tuple[List[str], List[tuple]]]:
+        """Raw (column names, rows) batches in ID order using keyset pagination.
+
+        Only one batch is held in memory, so exports can stream any number of
+        rules; columnar writers turn each batch into a frame without building
+        Rule objects.
+        """
+        where, params = self._where(filters)
+        return self._iter_keyset(f"{where} AND" if where else " WHERE", params, batch_size)
+
+    def iter_changed(self, since_version: int, batch_size: int = 1000, **filters) -> Iterator[Tuple[List[str], List[tuple]]]:
+        """Raw batches (as iter_rows) of matching rules added or updated by a write after store version ``since_version``.
+
+        Served by the row_version index, so delta exports read only the churn.
+        """
+        where, params = self._where(filters)
+        where = f"{where} AND" if where else " WHERE"
+        return self._iter_keyset(f"{where} row_version > ? AND", params + [int(since_version)], batch_size)
+
+    def _iter_keyset(self, where: str, params: List, batch_size: int) -> Iterator[Tuple[List[str], List[tuple]]]:
+        """Batches of ``SELECT *{where} id > ?`` in ID order; ``where`` ends with WHERE or AND."""
+        top = "TOP (?) " if self.dialect == "mssql" else ""
+        tail = "" if self.dialect == "mssql" else " LIMIT ?"
+        last_id = 0
+        while True:
+            args = ([int(batch_size)] if top else []) + params + [last_id] + ([] if top else [int(batch_size)])
+            with self._cursor() as cur:
+                cur.execute(f"SELECT {top}* FROM {self._table}{where} id > ? ORDER BY id{tail}", args)
+                cols = [d[0] for d in cur.description]
+                rows = [tuple(r) for r in cur.fetchall()]
+            if rows:
+                yield cols, rows
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][cols.index("id")]
+
+    def ids(self, **filters) -> List[int]:
+        """Every matching rule ID (index-only scan); used to detect deletes."""
+        where, params = self._where(filters)
+        with self._cursor() as cur:
+            cur.execute(f"SELECT id FROM {self._table}{where}", params)
+            return [int(r[0]) for r in cur.fetchall()]
+
+    def iter_all(self, batch_size: int = 1000, **filters) -> Iterator[Rule]:
+        """Rules matching ``filters`` in ID order, one batch in memory at a time."""
+        for cols, rows in self.iter_rows(batch_size, **filters):
+            yield from rules_from_rows(cols, rows)
+
+    def count(self, **filters) -> int:
+        where, params = self._where(filters)
+        with self._cursor() as cur:
+            cur.execute(f"SELECT COUNT(*) FROM {self._table}{where}", params)
+            return int(cur.fetchone()[0])
+
+    def count_by(self, key: str, **filters) -> Dict:
+        """Counts of matching rules grouped by one indexed column, e.g. count_by("action") (keyed by Action)."""
+        if key not in COLUMNS:
+            raise ValueError(f"Cannot group rules by '{key}'")
+        col = COLUMNS[key]
+        where, params = self._where(filters)
+        with self._cursor() as cur:
+            cur.execute(f"SELECT [{col}], COUNT(*) FROM {self._table}{where} GROUP BY [{col}]", params)
+            rows = cur.fetchall()
+        if key == "action":
+            return {Action.parse(row[0]): int(row[1]) for row in rows}
+        return {row[0]: int(row[1]) for row in rows}
+
+
+def rules_from_rows(cols: List[str], rows: List[tuple]) -> Iterator[Rule]:
+    """Rule records for one raw batch from RuleRepository.iter_rows."""
+    for row in rows:
+        yield RuleRepository._row_to_rule(cols, row)
+
+
+# --- Backends ---
+class _SqliteConnector:
+    """One shared sqlite3 connection per process, serialized with a lock.
+
+    WAL mode lets other processes read while one writes.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def __call__(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            yield self._conn
+
+
+_repos: Dict[str, RuleRepository] = {}
+_repos_lock = threading.Lock()
+
+
+def rule_backend() -> str:
+    return str(load_app_config().get("rules", {}).get("backend", "sqlite")).strip().lower() or "sqlite"
+
+
+def get_rule_repository(connection_name: Optional[str] = None) -> RuleRepository:
+    """Return the process-wide repository for the configured backend.
+
+    With backend "sqlserver" the rules live in the database of
+    ``connection_name`` (the active connection) and are read through its pool.
+    """
+    backend = rule_backend()
+    if backend == "sqlserver":
+        if not connection_name:
+            raise RuntimeError("The sqlserver rule backend needs an active connection")
+        key = f"sqlserver:{connection_name}"
+    else:
+        key = "sqlite"
+    repo = _repos.get(key)
+    if repo is not None:
+        return repo
+    with _repos_lock:
+        repo = _repos.get(key)
+        if repo is None:
+            if backend == "sqlserver":
+                from utilities.conn_pool import pooled_connection
+                repo = RuleRepository(lambda: pooled_connection(connection_name), dialect="mssql", store_id=key)
+            else:
+                repo = RuleRepository(_SqliteConnector(RULES_DB_FILE), dialect="sqlite", store_id=f"sqlite:{RULES_DB_FILE}")
+            _repos[key] = repo
+    return repo